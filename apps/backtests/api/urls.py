@@ -1,8 +1,28 @@
 from django.urls import path
-from .views import run_backtest_view, get_user_backtest, save_backtest_view
+from .views import (
+    run_backtest_view,
+    get_user_backtest,
+    save_backtest_view,
+    refresh_backtest_view,
+    optimize_backtest_view,
+    walk_forward_view,
+    monte_carlo_backtest_view,
+    portfolio_backtest_view,
+    submit_backtest_job_view,
+    backtest_job_view,
+    cancel_backtest_job_view,
+)
 
 urlpatterns = [
     path("run/", run_backtest_view, name="run_backtest"),  # Endpoint to run a backtest
     path("get/", get_user_backtest, name="user_backtests"),  # Endpoint to get user's backtests
     path("save/", save_backtest_view, name="save_backtest"),  # Endpoint to save a backtest
+    path("<int:backtest_id>/refresh/", refresh_backtest_view, name="refresh_backtest"),  # Endpoint to extend a saved backtest with new candles
+    path("optimize/", optimize_backtest_view, name="optimize_backtest"),  # Endpoint to run a parameter sweep
+    path("walk-forward/", walk_forward_view, name="walk_forward"),  # Endpoint to run a walk-forward analysis
+    path("monte-carlo/", monte_carlo_backtest_view, name="monte_carlo_backtest"),  # Endpoint to run a Monte Carlo backtest
+    path("portfolio/", portfolio_backtest_view, name="portfolio_backtest"),  # Endpoint to run a multi-asset backtest
+    path("jobs/submit/", submit_backtest_job_view, name="submit_backtest_job"),  # Endpoint to queue a backtest
+    path("jobs/<int:job_id>/", backtest_job_view, name="backtest_job"),  # Endpoint to poll a queued backtest
+    path("jobs/<int:job_id>/cancel/", cancel_backtest_job_view, name="cancel_backtest_job"),  # Endpoint to cancel a queued backtest
 ]
@@ -1,13 +1,28 @@
 import json
 import logging
+from django.core.exceptions import PermissionDenied
 from django.http import JsonResponse
 from apps.strategies.models import Strategy
 from django.views.decorators.csrf import csrf_protect
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
 
-from apps.backtests.services.services import run_backtest
-from apps.backtests.models import Backtest, Asset, Trade
+from apps.backtests.models import Backtest
+from apps.backtests.services.services import (
+    BACKTESTS_PAGE_SIZE,
+    cancel_backtest_job,
+    get_backtest_job,
+    get_user_backtests_page,
+    refresh_backtest,
+    run_backtest,
+    run_monte_carlo_backtest,
+    run_portfolio_backtest,
+    run_parameter_sweep,
+    run_walk_forward,
+    save_backtest,
+    submit_backtest_job,
+)
+from apps.backtests.serializers import serialize_backtest, serialize_backtest_job
 
 # from ccxt.base.errors import RequestTimeout
 
@@ -25,9 +40,13 @@ def run_backtest_view(request):
         "initial_balance": float (optional, default=1000),
         "token": str (optional, default="BTC"),
         "timeframe": str (optional, default="1h"),
-        "candle_amount": int (optional, default=500)
+        "candle_amount": int (optional, default=500),
+        "vectorized": bool (optional, default=False),
+        "save": bool (optional, default=False),
+        "intrabar": bool (optional, default=False)
     }
     Returns a JSON response with the backtest results.
+    With "save": true the backtest is saved on the server and the response contains only its backtest_id and summary, without the trades.
     """
 
     # Check authentication
@@ -72,7 +91,14 @@ def run_backtest_view(request):
             token=payload.get("token", "BTCUSDT"),
             timeframe=payload.get("timeframe", "1h"),
             candle_amount=payload.get("candle_amount", 500),
+            vectorized=payload.get("vectorized", False),
+            save=bool(payload.get("save", False)),
+            intrabar=bool(payload.get("intrabar", False)),
         )
+        if "backtest_id" in result:
+            return JsonResponse(
+                {"status": "success", "backtest_id": result["backtest_id"], "result": result}, status=201
+            )
         return JsonResponse({"status": "success", "result": result})
 
     except Strategy.DoesNotExist:
@@ -88,6 +114,468 @@ def run_backtest_view(request):
         return JsonResponse({"status": "error", "message": str(e)}, status=504)
 
 
+@csrf_protect
+@require_http_methods(["POST"])
+def submit_backtest_job_view(request):
+    """
+    View to queue a backtest to run in the background.
+    Expects the same JSON body as run_backtest_view.
+    Returns a JSON response with the job ID, which can be polled with backtest_job_view.
+    """
+
+    if not request.user.is_authenticated:
+        return JsonResponse(
+            {"status": "error", "message": "Authentication required"}, status=401
+        )
+
+    if not request.content_type.startswith("application/json"):
+        return JsonResponse(
+            {"status": "error", "message": "Expected application/json"}, status=415
+        )
+
+    # Limit payload size to 1MB
+    if len(request.body) > 1024 * 1024:
+        return JsonResponse(
+            {"status": "error", "message": "Payload too large"}, status=413
+        )
+
+    try:
+        payload = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+
+    try:
+        strategy_id = int(payload.get("strategy_id"))
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse(
+            {"status": "error", "message": "Invalid strategy_id"}, status=400
+        )
+
+    try:
+        strategy = Strategy.objects.get(id=strategy_id)
+        job = submit_backtest_job(
+            user=request.user,
+            strategy=strategy,
+            initial_balance=payload.get("initial_balance", 1000),
+            token=payload.get("token", "BTCUSDT"),
+            timeframe=payload.get("timeframe", "1h"),
+            candle_amount=payload.get("candle_amount", 500),
+            vectorized=payload.get("vectorized", False),
+            intrabar=bool(payload.get("intrabar", False)),
+        )
+        return JsonResponse({"status": "success", "job_id": job.id}, status=202)
+
+    except Strategy.DoesNotExist:
+        return JsonResponse(
+            {"status": "error", "message": "Strategy not found"}, status=404
+        )
+    except PermissionDenied as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=403)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error submitting backtest job: {e}", exc_info=True)
+        return JsonResponse(
+            {"status": "error", "message": "Internal server error"}, status=500
+        )
+
+
+@require_http_methods(["GET"])
+def backtest_job_view(request, job_id: int):
+    """
+    View to poll status, progress and result of a queued backtest.
+    """
+
+    if not request.user.is_authenticated:
+        return JsonResponse(
+            {"status": "error", "message": "Authentication required"}, status=401
+        )
+
+    job = get_backtest_job(request.user, job_id)
+    if job is None:
+        return JsonResponse({"status": "error", "message": "Job not found"}, status=404)
+
+    return JsonResponse({"status": "success", "job": serialize_backtest_job(job)})
+
+
+@csrf_protect
+@require_http_methods(["POST"])
+def cancel_backtest_job_view(request, job_id: int):
+    """
+    View to cancel a queued or running backtest.
+    """
+
+    if not request.user.is_authenticated:
+        return JsonResponse(
+            {"status": "error", "message": "Authentication required"}, status=401
+        )
+
+    job = cancel_backtest_job(request.user, job_id)
+    if job is None:
+        return JsonResponse({"status": "error", "message": "Job not found"}, status=404)
+
+    return JsonResponse({"status": "success", "job": serialize_backtest_job(job)})
+
+
+@csrf_protect
+@require_http_methods(["POST"])
+def refresh_backtest_view(request, backtest_id: int):
+    """
+    View to extend a saved backtest with the candles closed since it was saved or last refreshed.
+    Only the new candles are evaluated, resuming from the checkpoint stored with the backtest.
+    Returns the updated backtest without its trades.
+    """
+
+    if not request.user.is_authenticated:
+        return JsonResponse(
+            {"status": "error", "message": "Authentication required"}, status=401
+        )
+
+    try:
+        backtest = refresh_backtest(request.user, backtest_id)
+        return JsonResponse(
+            {"status": "success", "backtest": serialize_backtest(backtest, include_trades=False)}
+        )
+
+    except Backtest.DoesNotExist:
+        return JsonResponse(
+            {"status": "error", "message": "Backtest not found"}, status=404
+        )
+    except PermissionDenied as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=403)
+    except RuntimeError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=504)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error refreshing backtest: {e}", exc_info=True)
+        return JsonResponse(
+            {"status": "error", "message": "Internal server error"}, status=500
+        )
+
+
+@csrf_protect
+@require_http_methods(["POST"])
+def optimize_backtest_view(request):
+    """
+    View to run a parameter sweep of a given strategy.
+    Expects a JSON body with the following structure:
+    {
+        "strategy_id": int,
+        "parameter_ranges": {
+            "indicators": [
+                {
+                    "name": "SMA",
+                    "parameters": [
+                        {"name": "short_window", "min": 5, "max": 20, "step": 5},
+                        {"name": "long_window", "values": [30, 50, 100]}
+                    ]
+                }
+            ]
+        },
+        "initial_balance": float (optional, default=1000),
+        "token": str (optional, default="BTCUSDT"),
+        "timeframe": str (optional, default="1h"),
+        "candle_amount": int (optional, default=500),
+        "rank_by": str (optional, default="profit_loss"),
+        "limit": int (optional, default=20)
+    }
+    Returns a JSON response with the ranked results.
+    """
+
+    if not request.user.is_authenticated:
+        return JsonResponse(
+            {"status": "error", "message": "Authentication required"}, status=401
+        )
+
+    if not request.content_type.startswith("application/json"):
+        return JsonResponse(
+            {"status": "error", "message": "Expected application/json"}, status=415
+        )
+
+    # Limit payload size to 1MB
+    if len(request.body) > 1024 * 1024:
+        return JsonResponse(
+            {"status": "error", "message": "Payload too large"}, status=413
+        )
+
+    try:
+        payload = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+
+    try:
+        strategy_id = int(payload.get("strategy_id"))
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse(
+            {"status": "error", "message": "Invalid strategy_id"}, status=400
+        )
+
+    try:
+        strategy = Strategy.objects.get(id=strategy_id)
+        result = run_parameter_sweep(
+            user=request.user,
+            strategy=strategy,
+            parameter_ranges=payload.get("parameter_ranges", {}),
+            initial_balance=payload.get("initial_balance", 1000),
+            token=payload.get("token", "BTCUSDT"),
+            timeframe=payload.get("timeframe", "1h"),
+            candle_amount=payload.get("candle_amount", 500),
+            rank_by=payload.get("rank_by", "profit_loss"),
+            limit=payload.get("limit", 20),
+        )
+        return JsonResponse({"status": "success", "result": result})
+
+    except Strategy.DoesNotExist:
+        return JsonResponse(
+            {"status": "error", "message": "Strategy not found"}, status=404
+        )
+    except PermissionDenied as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=403)
+    except RuntimeError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=504)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error running parameter sweep: {e}", exc_info=True)
+        return JsonResponse(
+            {"status": "error", "message": "Internal server error"}, status=500
+        )
+
+
+@csrf_protect
+@require_http_methods(["POST"])
+def walk_forward_view(request):
+    """
+    View to run a walk-forward analysis of a given strategy.
+    Expects a JSON body with the following structure:
+    {
+        "strategy_id": int,
+        "parameter_ranges": {...} (same as in optimize_backtest_view),
+        "train_size": int, candles of every training window
+        "test_size": int, candles of every test window
+        "step": int (optional, default=test_size),
+        "initial_balance": float (optional, default=1000),
+        "token": str (optional, default="BTCUSDT"),
+        "timeframe": str (optional, default="1h"),
+        "candle_amount": int (optional, default=500),
+        "rank_by": str (optional, default="profit_loss")
+    }
+    Returns a JSON response with the best parameters and the test results of every window.
+    """
+
+    if not request.user.is_authenticated:
+        return JsonResponse(
+            {"status": "error", "message": "Authentication required"}, status=401
+        )
+
+    if not request.content_type.startswith("application/json"):
+        return JsonResponse(
+            {"status": "error", "message": "Expected application/json"}, status=415
+        )
+
+    # Limit payload size to 1MB
+    if len(request.body) > 1024 * 1024:
+        return JsonResponse(
+            {"status": "error", "message": "Payload too large"}, status=413
+        )
+
+    try:
+        payload = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+
+    try:
+        strategy_id = int(payload.get("strategy_id"))
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse(
+            {"status": "error", "message": "Invalid strategy_id"}, status=400
+        )
+
+    try:
+        strategy = Strategy.objects.get(id=strategy_id)
+        result = run_walk_forward(
+            user=request.user,
+            strategy=strategy,
+            parameter_ranges=payload.get("parameter_ranges", {}),
+            train_size=payload.get("train_size"),
+            test_size=payload.get("test_size"),
+            step=payload.get("step"),
+            initial_balance=payload.get("initial_balance", 1000),
+            token=payload.get("token", "BTCUSDT"),
+            timeframe=payload.get("timeframe", "1h"),
+            candle_amount=payload.get("candle_amount", 500),
+            rank_by=payload.get("rank_by", "profit_loss"),
+        )
+        return JsonResponse({"status": "success", "result": result})
+
+    except Strategy.DoesNotExist:
+        return JsonResponse(
+            {"status": "error", "message": "Strategy not found"}, status=404
+        )
+    except PermissionDenied as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=403)
+    except RuntimeError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=504)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error running walk-forward analysis: {e}", exc_info=True)
+        return JsonResponse(
+            {"status": "error", "message": "Internal server error"}, status=500
+        )
+
+
+@csrf_protect
+@require_http_methods(["POST"])
+def monte_carlo_backtest_view(request):
+    """
+    View to run a Monte Carlo backtest of a given strategy.
+    Expects a JSON body with the following structure:
+    {
+        "strategy_id": int,
+        "trials": int (optional, default=100),
+        "seed": int (optional, random if not provided),
+        "initial_balance": float (optional, default=1000),
+        "token": str (optional, default="BTCUSDT"),
+        "timeframe": str (optional, default="1h"),
+        "candle_amount": int (optional, default=500)
+    }
+    Returns a JSON response with the distribution of the final balance and drawdown over the trials.
+    """
+
+    if not request.user.is_authenticated:
+        return JsonResponse(
+            {"status": "error", "message": "Authentication required"}, status=401
+        )
+
+    if not request.content_type.startswith("application/json"):
+        return JsonResponse(
+            {"status": "error", "message": "Expected application/json"}, status=415
+        )
+
+    # Limit payload size to 1MB
+    if len(request.body) > 1024 * 1024:
+        return JsonResponse(
+            {"status": "error", "message": "Payload too large"}, status=413
+        )
+
+    try:
+        payload = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+
+    try:
+        strategy_id = int(payload.get("strategy_id"))
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse(
+            {"status": "error", "message": "Invalid strategy_id"}, status=400
+        )
+
+    try:
+        strategy = Strategy.objects.get(id=strategy_id)
+        result = run_monte_carlo_backtest(
+            user=request.user,
+            strategy=strategy,
+            trials=payload.get("trials", 100),
+            seed=payload.get("seed"),
+            initial_balance=payload.get("initial_balance", 1000),
+            token=payload.get("token", "BTCUSDT"),
+            timeframe=payload.get("timeframe", "1h"),
+            candle_amount=payload.get("candle_amount", 500),
+        )
+        return JsonResponse({"status": "success", "result": result})
+
+    except Strategy.DoesNotExist:
+        return JsonResponse(
+            {"status": "error", "message": "Strategy not found"}, status=404
+        )
+    except PermissionDenied as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=403)
+    except RuntimeError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=504)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error running Monte Carlo backtest: {e}", exc_info=True)
+        return JsonResponse(
+            {"status": "error", "message": "Internal server error"}, status=500
+        )
+
+
+@csrf_protect
+@require_http_methods(["POST"])
+def portfolio_backtest_view(request):
+    """
+    View to run a strategy on several assets with one shared balance.
+    Expects a JSON body with the following structure:
+    {
+        "strategy_id": int,
+        "tokens": list[str], e.g. ["BTCUSDT", "ETHUSDT"]
+        "initial_balance": float (optional, default=1000),
+        "timeframe": str (optional, default="1h"),
+        "candle_amount": int (optional, default=500)
+    }
+    Returns a JSON response with the portfolio results, per-asset results and trades.
+    """
+
+    if not request.user.is_authenticated:
+        return JsonResponse(
+            {"status": "error", "message": "Authentication required"}, status=401
+        )
+
+    if not request.content_type.startswith("application/json"):
+        return JsonResponse(
+            {"status": "error", "message": "Expected application/json"}, status=415
+        )
+
+    # Limit payload size to 1MB
+    if len(request.body) > 1024 * 1024:
+        return JsonResponse(
+            {"status": "error", "message": "Payload too large"}, status=413
+        )
+
+    try:
+        payload = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+
+    try:
+        strategy_id = int(payload.get("strategy_id"))
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse(
+            {"status": "error", "message": "Invalid strategy_id"}, status=400
+        )
+
+    try:
+        strategy = Strategy.objects.get(id=strategy_id)
+        result = run_portfolio_backtest(
+            user=request.user,
+            strategy=strategy,
+            tokens=payload.get("tokens"),
+            initial_balance=payload.get("initial_balance", 1000),
+            timeframe=payload.get("timeframe", "1h"),
+            candle_amount=payload.get("candle_amount", 500),
+        )
+        return JsonResponse({"status": "success", "result": result})
+
+    except Strategy.DoesNotExist:
+        return JsonResponse(
+            {"status": "error", "message": "Strategy not found"}, status=404
+        )
+    except PermissionDenied as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=403)
+    except RuntimeError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=504)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error running portfolio backtest: {e}", exc_info=True)
+        return JsonResponse(
+            {"status": "error", "message": "Internal server error"}, status=500
+        )
+
+
 logger = logging.getLogger(__name__)
 
 
@@ -105,7 +593,8 @@ def save_backtest_view(request):
         "initial_capital": float,
         "candles_amount": int,
         "created_at": str (ISO format),
-        "result": dict (Results from backtest run api)
+        "result": dict (Results from backtest run api),
+        "trade_storage": "rows" | "columnar" (optional, default "columnar" for at least BACKTEST_TRADE_BLOB_MIN_TRADES trades)
     }
     Returns a JSON response with the saved backtest ID and a success message.
     """
@@ -121,12 +610,6 @@ def save_backtest_view(request):
             data = data[0]
 
         token_symbol = data.get("token_symbol")
-        if (token_symbol.endswith("USDT")):
-            token_symbol = token_symbol[:-4]
-
-        asset_obj, created = Asset.objects.get_or_create(
-            symbol=token_symbol, defaults={"name": token_symbol}
-        )
 
         strategy_id = data.get("strategy_id")
         if not Strategy.objects.filter(id=strategy_id).exists():
@@ -185,46 +668,18 @@ def save_backtest_view(request):
                 {"status": "error", "message": "initial_capital is required"}, status=400
             )
 
-        backtest_result = {
-            "final_balance": data.get("result", {}).get("final_balance"),
-            "profit_loss": data.get("result", {}).get("profit_loss"),
-            "total_trades": data.get("result", {}).get("total_trades"),
-            "total_wins": data.get("result", {}).get("total_wins"),
-            "total_losses": data.get("result", {}).get("total_losses"),
-            "not_closed_trades": data.get("result", {}).get("not_closed_trades"),
-        }
-
-        backtest = Backtest.objects.create(
-            user=request.user,
-            strategy=strategy_obj,
-            asset=asset_obj,
+        backtest = save_backtest(
+            request.user,
+            strategy_obj,
+            token=token_symbol,
             timeframe=timeframe,
             start_date=start_date,
             end_date=end_date,
             initial_capital=initial_capital,
             candles_amount=candles_amount,
-            created_at=created_at,
-            result=backtest_result,
-        )
-
-        trades = [
-            Trade(
-                backtest=backtest,
-                entry_price=t.get("entry_price"),
-                exit_price=t.get("exit_price"),
-                entry_time=t.get("entry_time"),
-                exit_time=t.get("exit_time"),
-                quantity=t.get("quantity"),
-                trade_type=t.get("trade_type"),
-                stop_loss=t.get("stop_loss"),
-                take_profit=t.get("take_profit"),
-                status=t.get("status"),
-                result=t.get("result"),
-            )
-            for t in data.get("result", {}).get("trades", [])
-        ]
-
-        Trade.objects.bulk_create(trades)
+            result=data.get("result", {}),
+            trade_storage=data.get("trade_storage"),
+        )
 
         return JsonResponse(
             {
@@ -235,6 +690,8 @@ def save_backtest_view(request):
             status=201,
         )
 
+    except ValueError as err:
+        return JsonResponse({"status": "error", "message": str(err)}, status=400)
     except Exception as err:
         logger.error(f"Error saving backtest: {err}", exc_info=True)
         return JsonResponse(
@@ -245,7 +702,12 @@ def save_backtest_view(request):
 @require_http_methods(["GET"])
 def get_user_backtest(request):
     """
-    Retrieves backtests filtered by user_id if provided.
+    Retrieves one page of the user's backtests, newest first.
+    Query parameters:
+        limit (int, optional, default=20, max 100): Page size
+        cursor (int, optional): next_cursor from the previous page
+        include_trades (bool, optional, default=true): Set to "false" to leave out the trades
+    Returns a JSON response with the backtests and next_cursor (null on the last page).
     """
 
     if not request.user.is_authenticated:
@@ -253,48 +715,32 @@ def get_user_backtest(request):
             {"status": "error", "message": "Authentication required"}, status=401
         )
 
-    user = request.user
+    try:
+        limit = int(request.GET.get("limit", BACKTESTS_PAGE_SIZE))
+        cursor = request.GET.get("cursor")
+        cursor = int(cursor) if cursor else None
+    except ValueError:
+        return JsonResponse(
+            {"status": "error", "message": "limit and cursor must be integers"}, status=400
+        )
+
+    include_trades = request.GET.get("include_trades", "true").lower() not in ("false", "0")
 
     try:
-        backtests = Backtest.objects.filter(user=user)
+        backtests, next_cursor = get_user_backtests_page(
+            request.user, limit=limit, cursor=cursor, include_trades=include_trades
+        )
 
-        data = [
+        return JsonResponse(
             {
-                "id": b.id,
-                "user_id": b.user.id,
-                "strategy": {
-                    "id": b.strategy_id,
-                    "name": b.strategy.name,
-                    "parameters": b.strategy.parameters,
-                },
-                "asset": {
-                    "id": b.asset_id,
-                    "symbol": b.asset.symbol,
-                    "name": b.asset.name,
-                },
-                "start_date": b.start_date.isoformat() if b.start_date else None,
-                "end_date": b.end_date.isoformat() if b.end_date else None,
-                "initial_capital": b.initial_capital,
-                "created_at": b.created_at.isoformat() if b.created_at else None,
-                "trades": [
-                    {
-                        "id": t.id,
-                        "time": t.time.isoformat(),
-                        "price": t.price,
-                        "quantity": t.quantity,
-                        "profit": t.profit,
-                        "type": "BUY" if t.is_buy else "SELL",
-                    }
-                    for t in b.trades.all()
-                ],
+                "status": "success",
+                "backtests": [serialize_backtest(b, include_trades=include_trades) for b in backtests],
+                "next_cursor": next_cursor,
             }
-            for b in backtests
-        ]
-
-        return JsonResponse({"status": "success", "backtests": data})
+        )
 
     except Exception as e:
-        logger.error(f"Error retrieving strategies: {e}", exc_info=True)
+        logger.error(f"Error retrieving backtests: {e}", exc_info=True)
         return JsonResponse(
             {"status": "error", "message": "Internal server error"}, status=500
         )
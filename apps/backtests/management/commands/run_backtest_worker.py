@@ -0,0 +1,69 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.backtests.services.services import claim_next_backtest_job, execute_backtest_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued backtests in a pool of local worker processes. "
+        "The database is the queue, no message broker is needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Number of worker processes (default 2)")
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before polling again when the queue is empty (default 1.0)",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Exit when the queue is empty instead of polling"
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        worker_args = (options["poll_interval"], options["once"])
+
+        if workers == 1:
+            work(*worker_args)
+            return
+
+        # Each process has to open its own database connection
+        connections.close_all()
+
+        processes = [
+            multiprocessing.Process(target=work, args=worker_args, daemon=True)
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+
+        self.stdout.write(f"Started {workers} backtest workers")
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+
+
+def work(poll_interval: float, once: bool) -> None:
+    """
+    Worker loop: claim the oldest pending job (or a running one abandoned by a killed worker), run it, repeat.
+    """
+    while True:
+        job = claim_next_backtest_job()
+
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+
+        execute_backtest_job(job)
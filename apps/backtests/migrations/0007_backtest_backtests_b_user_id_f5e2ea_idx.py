@@ -0,0 +1,20 @@
+# Generated by Django 5.0 on 2026-10-18 10:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backtests', '0006_backtestjob'),
+        ('strategies', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='backtest',
+            index=models.Index(fields=['user', '-id'], name='backtests_b_user_id_f5e2ea_idx'),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 5.0 on 2026-10-18 10:51
+
+import numpy as np
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of apps.backtests.services.backtest.summary at the time of this migration,
+# so later changes of the application code do not change what the migration computes
+SUMMARY_FIELDS = ["return_pct", "max_drawdown_pct", "win_rate", "sharpe_ratio", "trade_count"]
+
+
+def get_backtest_summary(initial_capital, trade_results, final_balance=None):
+    initial_capital = float(initial_capital)
+    results = np.array([float(r) for r in trade_results if r is not None], dtype=np.float64)
+    equity = initial_capital + np.concatenate([[0.0], np.cumsum(results)])
+
+    if final_balance is None:
+        final_balance = equity[-1]
+
+    summary = {
+        "return_pct": None,
+        "max_drawdown_pct": None,
+        "win_rate": float(np.count_nonzero(results > 0) / len(trade_results) * 100) if trade_results else None,
+        "sharpe_ratio": None,
+        "trade_count": len(trade_results),
+    }
+
+    if initial_capital <= 0:
+        return summary
+
+    summary["return_pct"] = (float(final_balance) - initial_capital) / initial_capital * 100
+
+    peaks = np.maximum.accumulate(equity)
+    summary["max_drawdown_pct"] = float(np.max((peaks - equity) / peaks) * 100)
+
+    balances = equity[:-1]
+    if len(results) > 1 and np.all(balances > 0):
+        returns = results / balances
+        std = returns.std(ddof=1)
+        if std > 0:
+            summary["sharpe_ratio"] = float(returns.mean() / std)
+
+    return summary
+
+
+def fill_summary(apps, schema_editor):
+    Backtest = apps.get_model("backtests", "Backtest")
+
+    for backtest in Backtest.objects.prefetch_related("trades").iterator(chunk_size=100):
+        trade_results = [trade.result for trade in sorted(backtest.trades.all(), key=lambda t: (t.entry_time, t.id))]
+        final_balance = (backtest.result or {}).get("final_balance")
+
+        summary = get_backtest_summary(backtest.initial_capital, trade_results, final_balance)
+        for field in SUMMARY_FIELDS:
+            setattr(backtest, field, summary[field])
+        backtest.save(update_fields=SUMMARY_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backtests', '0007_backtest_backtests_b_user_id_f5e2ea_idx'),
+        ('strategies', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backtest',
+            name='max_drawdown_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='backtest',
+            name='return_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='backtest',
+            name='sharpe_ratio',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='backtest',
+            name='trade_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='backtest',
+            name='win_rate',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='backtest',
+            index=models.Index(fields=['user', 'return_pct'], name='backtests_b_user_id_05c02a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='backtest',
+            index=models.Index(fields=['user', 'max_drawdown_pct'], name='backtests_b_user_id_26b0d3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='backtest',
+            index=models.Index(fields=['user', 'win_rate'], name='backtests_b_user_id_ff2f5b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='backtest',
+            index=models.Index(fields=['user', 'sharpe_ratio'], name='backtests_b_user_id_70bd78_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='backtest',
+            index=models.Index(fields=['user', 'trade_count'], name='backtests_b_user_id_abab97_idx'),
+        ),
+        migrations.RunPython(fill_summary, migrations.RunPython.noop),
+    ]
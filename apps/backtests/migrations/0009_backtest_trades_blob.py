@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 10:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backtests', '0008_backtest_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backtest',
+            name='trades_blob',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backtests', '0009_backtest_trades_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backtest',
+            name='checkpoint',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backtests', '0010_backtest_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backtestjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last sign of life of the worker running the job, see JOB_LEASE_TIMEOUT', null=True),
+        ),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.functional import cached_property
 
+from apps.backtests.trade_columns import TradeColumns
 from apps.strategies.models import Strategy
 
 
@@ -24,9 +27,40 @@ class Backtest(models.Model):
     created_at = models.DateTimeField(null=True, blank=True, auto_now_add=True)
     result = models.JSONField(null=True, blank=True)
 
+    # Summary metrics computed on save (see services/backtest/summary.py), so lists can sort and filter in SQL
+    return_pct = models.FloatField(null=True, blank=True)
+    max_drawdown_pct = models.FloatField(null=True, blank=True)
+    win_rate = models.FloatField(null=True, blank=True)
+    sharpe_ratio = models.FloatField(null=True, blank=True)
+    trade_count = models.IntegerField(default=0)
+    # Trades stored as one compressed columnar blob (see trade_columns.py) instead of Trade rows
+    trades_blob = models.BinaryField(null=True, blank=True, editable=False)
+    # State of the engine after the last candle, to extend the backtest with new candles (see services/backtest/checkpoint.py)
+    checkpoint = models.BinaryField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the user's backtests (see get_user_backtests_page)
+            models.Index(fields=["user", "-id"]),
+            models.Index(fields=["user", "return_pct"]),
+            models.Index(fields=["user", "max_drawdown_pct"]),
+            models.Index(fields=["user", "win_rate"]),
+            models.Index(fields=["user", "sharpe_ratio"]),
+            models.Index(fields=["user", "trade_count"]),
+        ]
+
     def __str__(self):
         return f"Backtest {self.id} - {self.strategy.name} on {self.asset.symbol}"
 
+    @cached_property
+    def trade_columns(self) -> TradeColumns | None:
+        """
+        Trades of the backtest stored in trades_blob, decoded on first access. None if the trades are stored as Trade rows.
+        """
+        if self.trades_blob is None:
+            return None
+        return TradeColumns.from_bytes(self.trades_blob)
+
 
 class Trade(models.Model):
     backtest = models.ForeignKey(
@@ -48,3 +82,37 @@ class Trade(models.Model):
 
     def __str__(self):
         return f"Trade {self.id} ({self.trade_type}) - P/L: {self.result}"
+
+
+class BacktestJob(models.Model):
+    """
+    Backtest queued to run in the background by the run_backtest_worker command.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        RUNNING = "running"
+        COMPLETED = "completed"
+        FAILED = "failed"
+        CANCELLED = "cancelled"
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    strategy = models.ForeignKey(Strategy, on_delete=models.CASCADE)
+    parameters = models.JSONField(default=dict, blank=True, help_text="run_backtest keyword arguments")
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    progress = models.FloatField(default=0, help_text="0 - 100 %")
+    cancel_requested = models.BooleanField(default=False)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True, blank=True, help_text="Last sign of life of the worker running the job, see JOB_LEASE_TIMEOUT"
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"BacktestJob {self.id} ({self.status}) - {self.progress:.0f}%"
@@ -1,6 +1,6 @@
 from typing import Any
 
-from apps.backtests.models import Asset, Backtest, Trade
+from apps.backtests.models import Asset, Backtest, BacktestJob, Trade
 from apps.strategies.serializers import serialize_strategy
 
 
@@ -28,8 +28,8 @@ def serialize_trade(trade: Trade) -> dict[str, Any]:
     }
 
 
-def serialize_backtest(backtest: Backtest) -> dict[str, Any]:
-    return {
+def serialize_backtest(backtest: Backtest, include_trades: bool = True) -> dict[str, Any]:
+    data = {
         "id": backtest.id,
         "user_id": backtest.user_id,
         "strategy": serialize_strategy(backtest.strategy),
@@ -41,7 +41,32 @@ def serialize_backtest(backtest: Backtest) -> dict[str, Any]:
         "created_at": backtest.created_at.isoformat() if backtest.created_at else None,
         "candles_amount": backtest.candles_amount,
         "result": backtest.result if backtest.result else None,
-        "result_in_pct": backtest.result["profit_loss"] / float(backtest.initial_capital) * 100 if backtest.initial_capital and backtest.result else None,
+        "result_in_pct": backtest.return_pct,
         "result_in_currency": round(backtest.result["profit_loss"], 2) if backtest.result else None,
-        "trades": [serialize_trade(t) for t in backtest.trades.all()],
-    }
\ No newline at end of file
+        "max_drawdown_pct": backtest.max_drawdown_pct,
+        "win_rate": backtest.win_rate,
+        "sharpe_ratio": backtest.sharpe_ratio,
+        "trade_count": backtest.trade_count,
+    }
+    if include_trades:
+        if backtest.trade_columns is not None:
+            data["trades"] = backtest.trade_columns.to_dicts()
+        else:
+            data["trades"] = [serialize_trade(t) for t in backtest.trades.all()]
+    return data
+
+
+def serialize_backtest_job(job: BacktestJob) -> dict[str, Any]:
+    return {
+        "id": job.id,
+        "strategy_id": job.strategy_id,
+        "parameters": job.parameters,
+        "status": job.status,
+        "progress": round(job.progress, 2),
+        "cancel_requested": job.cancel_requested,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
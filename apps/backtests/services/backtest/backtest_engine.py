@@ -1,20 +1,44 @@
+import copy
+import random
+
+import numpy as np
+
+from apps.market.candle_series import CandleSeries
+from apps.backtests.services.backtest.checkpoint import CANDLES as CHECKPOINT_CANDLES, BacktestCheckpoint
 from apps.backtests.services.backtest.trade_engine import TradeEngine
+from apps.backtests.services.backtest_cache import get_strategy_hash
+from apps.strategies.services.core.strategy_stream import StrategyStream
 from apps.strategies.services.core.trade_risk_model import TradeRiskModel
 from apps.strategies.services.core.strategy_engine import StrategyEngine
 
 
+class BacktestCancelled(Exception):
+    """
+    Raised by a progress callback to stop a running backtest.
+    """
+
+    pass
+
+
 class BacktestEngine:
     def __init__(
         self,
         strategy: StrategyEngine,
-        candles: list[dict] | None = None,
+        candles: list[dict] | CandleSeries | None = None,
         initial_balance: float = 1000,
         token: str = "BTCUSDT",
         timeframe: str = "1h",
         candle_amount: int = 500,
+        intrabar_resolver=None,
+        rng: random.Random = None,
+        resume_from: BacktestCheckpoint = None,
     ):
 
         self.strategy = strategy
+        # Resolves candles which hit both stop-loss and take-profit of a trade, see intrabar.py
+        self.intrabar_resolver = intrabar_resolver
+        # Random generator of the trades, e.g. a seeded one for Monte Carlo trials (see monte_carlo.py)
+        self.rng = rng
 
         # Implement function to check candles input
         self.candles = candles or self.set_data(token, timeframe, candle_amount)
@@ -25,8 +49,24 @@ class BacktestEngine:
         self.trades = []
         self.previous_signal = "HOLD"
         self.active_trade = None
+        self.completed = False  # All candles processed, the run can be checkpointed
+        # Identifies the strategy in the checkpoint, taken before the run changes the relative risk models of the strategy
+        self.strategy_hash = resume_from.strategy_hash if resume_from is not None else get_strategy_hash(strategy)
+
+        # Resumed run continues after the checkpoint's last candle, candles are only the new ones (see checkpoint.py)
+        self.resume_from = resume_from
+        self.first_index = 0
+        if resume_from is not None:
+            self.current_balance = resume_from.balance
+            self.active_trade = resume_from.get_active_trade(intrabar_resolver, rng)
+            # The last candle of the checkpoint opens the trades of its signal, the ones before it feed the risk models
+            self.first_index = len(resume_from.candles) - 1
+            self.candles = _concat_candles(resume_from.candles, CandleSeries.from_candles(self.candles))
+
+    def _validate_candles(self, candles: list[dict] | CandleSeries):
+        if isinstance(candles, CandleSeries):
+            return  # Columns are always present
 
-    def _validate_candles(self, candles: list[dict]):
         required_keys = {"open", "high", "low", "close", "volume", "open_time"}
         for candle in candles:
             if not required_keys.issubset(candle.keys()):
@@ -39,20 +79,55 @@ class BacktestEngine:
 
         return get_binance_ohlcv(coin, interval, limit=candle_amount)
 
-    def run(self):
+    def run(self, vectorized: bool = False, progress_callback=None, signals: list[tuple] = None):
+        """
+        Run the backtest over the candles.
+
+        Args:
+            vectorized (bool): If True, indicators and signals are computed once over the whole series before the trade simulation,
+                instead of re-evaluating the strategy on every candle prefix. Results are the same in both modes.
+            progress_callback (callable): Optional function called as progress_callback(processed_candles, total_candles) about every 1 % of candles.
+                It can raise BacktestCancelled to stop the run.
+            signals (list[tuple]): Precomputed result of strategy.get_signal_and_risk_model_list_from_candles(candles) for the vectorized mode,
+                so several runs over the same candles compute the indicators only once.
+
+        Returns:
+            tuple[float, list[TradeEngine]]: Final balance and list of closed trades.
+        """
         if not self.candles:
             raise ValueError("No candles data provided for backtesting.")
         
         if not self.strategy:
             raise ValueError("No strategy provided for backtesting.")
 
+        if self.resume_from is not None:
+            # Indicators continue from the checkpoint's streaming state, only the new candles are evaluated
+            vectorized = True
+            self.stream = copy.deepcopy(self.resume_from.stream)
+            signals = [("HOLD", None)] * self.first_index + [self.resume_from.signal]
+            signals += [self.stream.update(self.candles[i]) for i in range(self.first_index + 1, len(self.candles))]
+            self.stream_signal = signals[-1]
+        elif vectorized and signals is None:
+            signals = self.strategy.get_signal_and_risk_model_list_from_candles(self.candles)
+
+        total_steps = len(self.candles) - 1 - self.first_index
+        progress_step = max(1, total_steps // 100)
+
         # Iterate through candles and evaluate strategy at each step.
         # TODO: open trade only when there is no open
-        for i in range(len(self.candles) - 1):
-            past_candles = self.candles[:i + 1]
+        for i in range(self.first_index, len(self.candles) - 1):
+            if progress_callback is not None and (i - self.first_index) % progress_step == 0:
+                progress_callback(i - self.first_index, total_steps)
+
             current_candle = self.candles[i + 1]
 
-            signal, trade_risk_model = self.strategy.get_signal_and_risk_model_from_candles(past_candles)
+            if vectorized:
+                signal, trade_risk_model = signals[i]
+                # Risk model looks only at the last ATR_PERIOD + 1 candles, so there is no need to copy the whole prefix
+                past_candles = self.candles[max(0, i - TradeRiskModel.ATR_PERIOD):i + 1]
+            else:
+                past_candles = self.candles[:i + 1]
+                signal, trade_risk_model = self.strategy.get_signal_and_risk_model_from_candles(past_candles)
 
             if signal != "BUY" and signal != "SELL" and signal != "HOLD":
                 raise ValueError(f"Invalid signal '{signal}' returned by strategy. Expected 'BUY', 'SELL', or 'HOLD'.")
@@ -80,6 +155,8 @@ class BacktestEngine:
                     take_profit_pct=take_profit,
                     quantity=quantity,
                     trade_type=(signal == "BUY" or signal == 1),  # Assuming signal can be "BUY"/"SELL" or 1/0
+                    intrabar_resolver=self.intrabar_resolver,
+                    rng=self.rng,
                 )
 
                 self.active_trade = trade
@@ -115,6 +192,42 @@ class BacktestEngine:
 
                     self.trades.append(self.active_trade)
                     self.active_trade = None
+        else:
+            self.completed = True
                 
+        if progress_callback is not None:
+            progress_callback(total_steps, total_steps)
 
         return self.current_balance, self.trades
+
+    def get_checkpoint(self) -> BacktestCheckpoint:
+        """
+        State of the backtest after its last candle, to continue it later with the next candles (see checkpoint.py).
+        Indicator states of a run which was not resumed are computed by streaming all the candles once.
+
+        Returns:
+            BacktestCheckpoint: Checkpoint for BacktestEngine(..., resume_from=checkpoint)
+        """
+        if not self.completed:
+            raise ValueError("Backtest did not process all candles (not run or balance depleted), it can not be resumed.")
+
+        if self.resume_from is not None:
+            stream = self.stream
+            signal = self.stream_signal
+        else:
+            stream = StrategyStream(self.strategy)
+            for candle in self.candles:
+                signal = stream.update(candle)
+
+        return BacktestCheckpoint(
+            balance=self.current_balance,
+            active_trade=self.active_trade,
+            stream=stream,
+            signal=signal,
+            candles=CandleSeries.from_candles(self.candles[-CHECKPOINT_CANDLES:]),
+            strategy_hash=self.strategy_hash,
+        )
+
+
+def _concat_candles(first: CandleSeries, second: CandleSeries) -> CandleSeries:
+    return CandleSeries.from_array(np.concatenate([first.to_array(), second.to_array()]), first.timeframe_ms)
@@ -0,0 +1,189 @@
+"""
+Backtest checkpoints.
+
+A `BacktestCheckpoint` is the state of a `BacktestEngine` after its last candle: the balance, the open trade,
+the streaming indicator states (see StrategyStream) and the last few candles needed by the risk models.
+A new engine created with `resume_from=checkpoint` continues the backtest with the candles after it,
+so a saved backtest is extended by only its new candles and new trades instead of recomputing the whole history.
+
+Checkpoints are stored as plain versioned state (zlib compressed JSON), not as Python objects, so renaming or changing
+the engine classes does not break stored checkpoints and loading one can not execute code. A checkpoint of another
+VERSION, or of other strategy parameters, can not be loaded and the backtest has to be recomputed from its start.
+"""
+
+import copy
+import json
+import random
+import struct
+import zlib
+from datetime import datetime, timezone
+
+from apps.backtests.services.backtest.trade_engine import TradeEngine
+from apps.backtests.services.backtest_cache import get_strategy_hash
+from apps.market.candle_series import COLUMNS, CandleSeries
+from apps.strategies.services.core.strategy_engine import StrategyEngine
+from apps.strategies.services.core.strategy_stream import StrategyStream
+from apps.strategies.services.core.trade_risk_model import TradeRiskModel
+
+MAGIC = b"BCP"
+VERSION = 2  # Bump on any change of the state layout, older checkpoints are then recomputed
+HEADER = struct.Struct("<3sB")  # magic, version
+CANDLES = TradeRiskModel.ATR_PERIOD + 1  # Candles kept for the risk models, see BacktestEngine.run
+TIME_FIELDS = ("open_time", "close_time")  # Datetime fields of candles, stored as epoch ms
+
+
+class BacktestCheckpoint:
+    def __init__(
+        self,
+        balance: float,
+        active_trade,
+        stream: StrategyStream,
+        signal: tuple,
+        candles: CandleSeries,
+        strategy_hash: str,
+    ):
+        """
+        Args:
+            balance (float): Balance after the last candle
+            active_trade (TradeEngine): Trade still open after the last candle, or None
+            stream (StrategyStream): Strategy stream fed with all the candles up to the last one
+            signal (tuple): (signal, risk model) of the last candle, it opens a trade at the next candle
+            candles (CandleSeries): Last CANDLES candles, the last one is the last processed candle
+            strategy_hash (str): get_strategy_hash of the strategy before the run (the run changes its relative risk models)
+        """
+        self.balance = balance
+        self.active_trade = _detach_trade(active_trade)
+        self.stream = stream
+        self.signal = signal
+        self.candles = candles
+        self.strategy_hash = strategy_hash
+
+    @property
+    def last_open_time(self) -> int:
+        """
+        Open time of the last processed candle in epoch ms.
+        """
+        return int(self.candles.open_time[-1])
+
+    @classmethod
+    def from_bytes(cls, blob: bytes, strategy: StrategyEngine) -> "BacktestCheckpoint":
+        """
+        Decode a blob created by to_bytes.
+
+        Args:
+            blob (bytes): Stored checkpoint
+            strategy (StrategyEngine): Strategy of the backtest, not run yet. The stream state is restored into a new stream of it.
+
+        Raises:
+            ValueError: Invalid blob, a checkpoint of another VERSION or of other strategy parameters
+        """
+        try:
+            data = zlib.decompress(blob)
+            magic, version = HEADER.unpack_from(data)
+        except (zlib.error, struct.error) as e:
+            raise ValueError("Invalid backtest checkpoint.") from e
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unsupported backtest checkpoint (magic {magic!r}, version {version}).")
+
+        try:
+            state = json.loads(data[HEADER.size:])
+        except ValueError as e:
+            raise ValueError("Invalid backtest checkpoint.") from e
+
+        if state.get("strategy") != get_strategy_hash(strategy):
+            raise ValueError("Backtest checkpoint belongs to other strategy parameters.")
+
+        try:
+            stream = StrategyStream(strategy)
+            stream.set_state(state["stream"])
+
+            signal, risk_model = state["signal"]
+            columns = state["candles"]
+
+            return cls(
+                balance=float(state["balance"]),
+                active_trade=_trade_from_state(state["trade"]) if state["trade"] is not None else None,
+                stream=stream,
+                signal=(signal, TradeRiskModel._from_json(risk_model) if risk_model is not None else None),
+                candles=CandleSeries(*(columns[name] for name in COLUMNS), timeframe_ms=columns["timeframe_ms"]),
+                strategy_hash=state["strategy"],
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError("Invalid backtest checkpoint.") from e
+
+    def to_bytes(self, level: int = 6) -> bytes:
+        """
+        Pack the checkpoint into one zlib compressed blob.
+        """
+        signal, risk_model = self.signal
+        state = {
+            "strategy": self.strategy_hash,
+            "balance": float(self.balance),
+            "trade": _trade_to_state(self.active_trade) if self.active_trade is not None else None,
+            "signal": [signal, risk_model.get_json() if risk_model is not None else None],
+            "stream": self.stream.get_state(),
+            "candles": {"timeframe_ms": self.candles.timeframe_ms, **self.candles.to_columns()},
+        }
+
+        return zlib.compress(HEADER.pack(MAGIC, VERSION) + json.dumps(state, separators=(",", ":")).encode(), level)
+
+    def get_active_trade(self, intrabar_resolver=None, rng=None):
+        """
+        Copy of the open trade attached to the resolver and random generator of the resumed engine, see TradeEngine.
+        """
+        if self.active_trade is None:
+            return None
+
+        trade = copy.copy(self.active_trade)
+        trade.intrabar_resolver = intrabar_resolver
+        trade.rng = rng or random
+        return trade
+
+
+def _detach_trade(trade):
+    # Resolver and random generator belong to the engine, not to the checkpoint
+    if trade is None:
+        return None
+
+    trade = copy.copy(trade)
+    trade.intrabar_resolver = None
+    trade.rng = None
+    return trade
+
+
+def _trade_to_state(trade: TradeEngine) -> dict:
+    return {
+        "open_candle": {name: _to_ms(value) if name in TIME_FIELDS else value for name, value in trade.open_candle.items()},
+        "quantity": trade.quantity,
+        "trade_type": trade.trade_type,
+        "stop_loss": trade.stop_loss,
+        "take_profit": trade.take_profit,
+        "exit_price": trade.exit_price,
+        "exit_time": _to_ms(trade.exit_time) if trade.exit_time is not None else None,
+        "status": trade.status,
+    }
+
+
+def _trade_from_state(state: dict) -> TradeEngine:
+    open_candle = {
+        name: _to_datetime(value) if name in TIME_FIELDS else value for name, value in state["open_candle"].items()
+    }
+    # Levels are restored as they were computed at the opening, not recomputed from percentages
+    trade = TradeEngine(open_candle, 0, 0, float(state["quantity"]), trade_type=bool(state["trade_type"]))
+    trade.stop_loss = float(state["stop_loss"])
+    trade.take_profit = float(state["take_profit"])
+    trade.exit_price = state["exit_price"]
+    trade.exit_time = _to_datetime(state["exit_time"]) if state["exit_time"] is not None else None
+    trade.status = bool(state["status"])
+    return _detach_trade(trade)
+
+
+def _to_ms(value) -> int:
+    if isinstance(value, datetime):
+        return int(round(value.timestamp() * 1000))
+    return int(value)
+
+
+def _to_datetime(value: int) -> datetime:
+    return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
@@ -0,0 +1,146 @@
+"""
+Intrabar fill resolution.
+
+When a candle touches both the stop-loss and the take-profit of a trade, the candle alone does not tell which one was hit first.
+`IntrabarResolver` looks at the lower-timeframe candles inside that candle (e.g. 1m candles inside a 1h candle) and returns the level
+which was reached first, so the backtest result is deterministic. Lower-timeframe candles are loaded only for such ambiguous candles,
+in batches of MAX_CANDLES_PER_REQUEST which usually cover the following ambiguous candles too, and through the local candle store.
+If they can not be fetched (exchange or network error), the candle is left to the random choice of the backtest.
+"""
+
+import logging
+from datetime import datetime, timezone
+
+import numpy as np
+
+from apps.market.candle_series import CandleSeries
+from apps.market.candle_store import MAX_CANDLES_PER_REQUEST
+
+logger = logging.getLogger(__name__)
+
+TIMEFRAME_UNITS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60, "w": 7 * 24 * 60 * 60}
+
+# Timeframe of the backtest -> timeframe used to resolve its candles
+LOWER_TIMEFRAMES = {
+    "3m": "1m",
+    "5m": "1m",
+    "15m": "1m",
+    "30m": "1m",
+    "1h": "1m",
+    "2h": "1m",
+    "4h": "1m",
+    "6h": "5m",
+    "8h": "5m",
+    "12h": "5m",
+    "1d": "15m",
+    "3d": "1h",
+    "1w": "1h",
+}
+
+
+class IntrabarResolver:
+    def __init__(self, token: str, timeframe: str, lower_timeframe: str = None, fetch_candles=None):
+        """
+        Args:
+            token (str): Symbol of the backtest, e.g. 'BTCUSDT'
+            timeframe (str): Timeframe of the backtest candles, e.g. '1h'
+            lower_timeframe (str): Timeframe used to resolve the candles, defaults to LOWER_TIMEFRAMES[timeframe]
+            fetch_candles (callable): Optional function fetch_candles(since_ms, limit) -> CandleSeries of lower-timeframe candles,
+                defaults to the local candle store / exchange
+        """
+        self.token = token
+        self.timeframe_ms = parse_timeframe_ms(timeframe)
+        self.lower_timeframe = lower_timeframe or LOWER_TIMEFRAMES.get(timeframe)
+        if self.lower_timeframe is None:
+            raise ValueError(f"No lower timeframe to resolve '{timeframe}' candles.")
+
+        self.lower_timeframe_ms = parse_timeframe_ms(self.lower_timeframe)
+        self.fetch_candles = fetch_candles or self._fetch_candles
+        self.batches = []  # (start ms, end ms, CandleSeries) of the fetched lower-timeframe candles
+
+    def is_stop_loss_first(self, candle: dict, trade) -> bool | None:
+        """
+        Decide whether the stop-loss of the trade was hit before its take-profit inside the candle.
+
+        Args:
+            candle (dict): Candle which touches both levels
+            trade (TradeEngine): Trade with stop_loss and take_profit
+
+        Returns:
+            bool | None: True for stop-loss, False for take-profit, None if no lower-timeframe candles are available
+        """
+        open_time = _to_ms(candle["open_time"])
+        lower_candles = self._get_lower_candles(open_time, open_time + self.timeframe_ms)
+        if not len(lower_candles):
+            return None
+
+        for i in range(len(lower_candles)):
+            lower_candle = {"low": lower_candles.low[i], "high": lower_candles.high[i]}
+            sl_hit, tp_hit = trade.get_hits(lower_candle)
+
+            if sl_hit and tp_hit:
+                # Both levels inside one lower candle too, the one closer to its open is assumed to be hit first
+                open_price = lower_candles.open[i]
+                return abs(open_price - trade.stop_loss) <= abs(open_price - trade.take_profit)
+            if sl_hit or tp_hit:
+                return sl_hit
+
+        return None
+
+    def _get_lower_candles(self, start: int, end: int) -> CandleSeries:
+        for batch_start, batch_end, candles in self.batches:
+            if batch_start <= start and end <= batch_end:
+                return _slice(candles, start, end)
+
+        from ccxt.base.errors import BaseError
+
+        batch_end = start + MAX_CANDLES_PER_REQUEST * self.lower_timeframe_ms
+        try:
+            candles = self.fetch_candles(start, MAX_CANDLES_PER_REQUEST)
+        except BaseError:
+            logger.warning("Lower-timeframe candles of %s could not be fetched", self.token, exc_info=True)
+            # Remembered as an empty batch, so the following candles of the batch do not wait for the exchange again
+            self.batches.append((start, batch_end, CandleSeries.empty(self.lower_timeframe_ms)))
+            candles = None
+
+        if candles is None or not len(candles):
+            return CandleSeries.empty(self.lower_timeframe_ms)
+
+        # A short batch means there are no later candles yet, so it covers the rest of the candle too
+        if len(candles) < MAX_CANDLES_PER_REQUEST:
+            batch_end = max(batch_end, end)
+        self.batches.append((start, batch_end, candles))
+
+        return _slice(candles, start, end)
+
+    def _fetch_candles(self, since: int, limit: int) -> CandleSeries:
+        from apps.market.services import get_binance_ohlcv_and_timestamp
+
+        return get_binance_ohlcv_and_timestamp(
+            self.token,
+            self.lower_timeframe,
+            candle_amount=limit,
+            start_date=datetime.fromtimestamp(since / 1000, tz=timezone.utc),
+            as_series=True,
+        )
+
+
+def parse_timeframe_ms(timeframe: str) -> int:
+    """
+    Length of a timeframe such as '15m' or '1h' in ms.
+    """
+    try:
+        return int(timeframe[:-1]) * TIMEFRAME_UNITS[timeframe[-1]] * 1000
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid timeframe '{timeframe}'.")
+
+
+def _slice(candles: CandleSeries, start: int, end: int) -> CandleSeries:
+    first, last = np.searchsorted(candles.open_time, [start, end])
+    return candles[first:last]
+
+
+def _to_ms(value) -> int:
+    if isinstance(value, datetime):
+        return int(round(value.timestamp() * 1000))
+    return int(value)
@@ -0,0 +1,158 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from apps.backtests.services.backtest.backtest_engine import BacktestEngine
+from apps.backtests.services.backtest.parameter_sweep import attach_candles, share_candles
+from apps.backtests.services.backtest.summary import get_backtest_summary
+from apps.market.candle_series import CandleSeries
+from apps.strategies.services.core.strategy_engine import StrategyEngine
+
+MAX_TRIALS = 10000
+PERCENTILES = [5, 25, 50, 75, 95]
+
+# Per-worker state, set by _init_worker
+_worker_shm = None  # Kept open for the lifetime of the worker, _worker_candles are views of it
+_worker_candles = None
+_worker_strategy = None
+_worker_signals = None
+_worker_initial_balance = None
+
+
+class MonteCarloBacktest:
+    """
+    Runs the same backtest many times with different outcomes of the random choices (same-candle stop-loss / take-profit hits)
+    and returns the distribution of the final balance and drawdown.
+    Every trial has its own seeded random generator, spawned from one seed, so the whole run is reproducible.
+    Signals and indicators are computed once and shared with the worker processes together with the candles.
+    """
+
+    def __init__(
+        self,
+        strategy_json: list,
+        candles: list[dict] | CandleSeries,
+        initial_balance: float = 1000,
+        trials: int = 100,
+        seed: int = None,
+        max_workers: int = None,
+    ):
+        """
+        Args:
+            strategy_json (list): Strategy parameters (list of conditions), as stored in Strategy.parameters.
+            candles (list[dict] | CandleSeries): OHLCV candles with open_time.
+            initial_balance (float): Initial balance of every trial.
+            trials (int): Number of trials, at most MAX_TRIALS.
+            seed (int): Seed of the trial generators, random if not provided. It is returned with the results.
+            max_workers (int): Number of worker processes, defaults to the number of CPUs.
+        """
+        if not candles:
+            raise ValueError("No candles data provided for Monte Carlo backtest.")
+        if not 1 <= trials <= MAX_TRIALS:
+            raise ValueError(f"Number of trials must be between 1 and {MAX_TRIALS}.")
+
+        self.strategy_json = strategy_json
+        self.candles = candles
+        self.initial_balance = initial_balance
+        self.trials = trials
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2**32)
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def get_trial_seeds(self) -> list[int]:
+        """
+        Independent seeds of the trials, spawned from self.seed.
+        """
+        return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(self.seed).spawn(self.trials)]
+
+    def run(self) -> dict:
+        """
+        Run all trials.
+
+        Returns:
+            dict: {
+                "trials": int,
+                "seed": int,
+                "final_balance": {"mean", "std", "min", "max", "p5", "p25", "p50", "p75", "p95"},
+                "max_drawdown_pct": {same statistics},
+                "probability_of_loss": Share of trials ending below the initial balance, 0-1
+            }
+        """
+        strategy = StrategyEngine._from_json(self.strategy_json)
+        candles = CandleSeries.from_candles(self.candles)
+        signals = strategy.get_signal_and_risk_model_list_from_candles(candles)
+
+        shm = share_candles(candles)
+        try:
+            workers = min(self.max_workers, self.trials)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(
+                    shm.name,
+                    len(candles),
+                    candles.timeframe_ms,
+                    self.strategy_json,
+                    signals,
+                    self.initial_balance,
+                ),
+            ) as executor:
+                chunksize = max(1, self.trials // (workers * 4))
+                results = list(executor.map(_run_trial, self.get_trial_seeds(), chunksize=chunksize))
+        finally:
+            shm.close()
+            shm.unlink()
+
+        final_balances = np.array([result[0] for result in results])
+        drawdowns = np.array([result[1] for result in results])
+
+        return {
+            "trials": self.trials,
+            "seed": self.seed,
+            "final_balance": get_distribution(final_balances),
+            "max_drawdown_pct": get_distribution(drawdowns),
+            "probability_of_loss": float(np.mean(final_balances < self.initial_balance)),
+        }
+
+
+def get_distribution(values: np.ndarray) -> dict:
+    """
+    Summary statistics of the trial values.
+    """
+    distribution = {
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+    }
+    for percentile, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        distribution[f"p{percentile}"] = float(value)
+
+    return distribution
+
+
+def _init_worker(
+    shm_name: str, length: int, timeframe_ms: int, strategy_json: list, signals: list, initial_balance: float
+) -> None:
+    global _worker_shm, _worker_candles, _worker_strategy, _worker_signals, _worker_initial_balance
+
+    _worker_shm, _worker_candles = attach_candles(shm_name, length, timeframe_ms)
+
+    _worker_strategy = StrategyEngine._from_json(strategy_json)
+    _worker_signals = signals
+    _worker_initial_balance = initial_balance
+
+
+def _run_trial(seed: int) -> tuple[float, float]:
+    backtest = BacktestEngine(
+        strategy=_worker_strategy,
+        candles=_worker_candles,
+        initial_balance=_worker_initial_balance,
+        rng=random.Random(seed),
+    )
+    final_balance, trades = backtest.run(vectorized=True, signals=_worker_signals)
+
+    summary = get_backtest_summary(
+        _worker_initial_balance, [trade.get_result() for trade in trades], final_balance
+    )
+    return final_balance, summary["max_drawdown_pct"] or 0.0
@@ -0,0 +1,292 @@
+import copy
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from apps.backtests.services.backtest.backtest_engine import BacktestEngine
+from apps.market.candle_series import CandleSeries
+from apps.strategies.services.core.strategy_engine import StrategyEngine
+
+MAX_PARAMETER_SETS = 5000
+RANK_METRICS = ["profit_loss", "final_balance", "win_rate", "total_trades"]
+CANDLE_COLUMNS = ["open_time", "open", "high", "low", "close", "volume"]
+
+# Per-worker state, set by _init_worker
+_worker_shm = None  # Kept open for the lifetime of the worker, _worker_candles are views of it
+_worker_candles = None
+_worker_initial_balance = None
+
+
+class ParameterSweep:
+    """
+    Runs the same strategy with every combination of the given indicator parameter ranges and ranks the results.
+    Backtests run in parallel in a process pool. Candles are loaded once and shared with the workers through shared memory.
+    """
+
+    def __init__(
+        self,
+        strategy_json: list,
+        parameter_ranges: dict | list,
+        candles: list[dict] | CandleSeries,
+        initial_balance: float = 1000,
+        max_workers: int = None,
+    ):
+        """
+        Args:
+            strategy_json (list): Strategy parameters (list of conditions), as stored in Strategy.parameters.
+            parameter_ranges (dict | list): Ranges in the format of indicators.json, with optional "step" (default 1) or explicit "values":
+                {
+                    "indicators": [
+                        {
+                            "name": "SMA",
+                            "parameters": [
+                                {"name": "short_window", "min": 5, "max": 20, "step": 5},
+                                {"name": "long_window", "values": [30, 50, 100]}
+                            ]
+                        }
+                    ]
+                }
+            candles (list[dict]): OHLCV candles with open_time.
+            initial_balance (float): Initial balance of every backtest.
+            max_workers (int): Number of worker processes, defaults to the number of CPUs.
+        """
+        if not candles:
+            raise ValueError("No candles data provided for parameter sweep.")
+
+        self.strategy_json = strategy_json
+        self.parameter_ranges = parameter_ranges
+        self.candles = candles
+        self.initial_balance = initial_balance
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def get_parameter_sets(self) -> list[dict]:
+        """
+        Expand the parameter ranges into all combinations.
+
+        Returns:
+            list[dict]: Combinations in format {"SMA": {"short_window": 5, "long_window": 30}, ...}
+        """
+        indicators = self.parameter_ranges
+        if isinstance(indicators, dict):
+            indicators = indicators.get("indicators", [])
+
+        if not isinstance(indicators, list) or not indicators:
+            raise ValueError("Parameter ranges must contain a non-empty 'indicators' list.")
+
+        keys = []
+        value_lists = []
+        for indicator in indicators:
+            for parameter in indicator.get("parameters", []):
+                keys.append((indicator.get("name", ""), parameter.get("name", "")))
+                value_lists.append(self._get_parameter_values(parameter))
+
+        total = 1
+        for values in value_lists:
+            total *= len(values)
+        if total > MAX_PARAMETER_SETS:
+            raise ValueError(
+                f"Too many parameter combinations ({total}). Maximum is {MAX_PARAMETER_SETS}."
+            )
+
+        parameter_sets = []
+        for combination in itertools.product(*value_lists):
+            parameter_set = {}
+            for (indicator_name, parameter_name), value in zip(keys, combination):
+                parameter_set.setdefault(indicator_name, {})[parameter_name] = value
+            parameter_sets.append(parameter_set)
+
+        return parameter_sets
+
+    def run(self, rank_by: str = "profit_loss") -> list[dict]:
+        """
+        Run a backtest for every parameter combination.
+
+        Args:
+            rank_by (str): Metric to sort the results by, descending. One of RANK_METRICS.
+
+        Returns:
+            list[dict]: Results sorted from the best, each containing "parameters" and summary metrics.
+                Combinations rejected by the strategy validation (e.g. short_window >= long_window) are left out.
+        """
+        if rank_by not in RANK_METRICS:
+            raise ValueError(f"Invalid rank_by '{rank_by}'. Use one of: {', '.join(RANK_METRICS)}.")
+
+        parameter_sets = self.get_parameter_sets()
+        tasks = [
+            (parameter_set, apply_parameter_set(self.strategy_json, parameter_set))
+            for parameter_set in parameter_sets
+        ]
+
+        candles = CandleSeries.from_candles(self.candles)
+        shm = share_candles(candles)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(self.max_workers, len(tasks)),
+                initializer=_init_worker,
+                initargs=(shm.name, len(candles), candles.timeframe_ms, self.initial_balance),
+            ) as executor:
+                chunksize = max(1, len(tasks) // (self.max_workers * 4))
+                results = [
+                    result
+                    for result in executor.map(_run_parameter_set, tasks, chunksize=chunksize)
+                    if result is not None
+                ]
+        finally:
+            shm.close()
+            shm.unlink()
+
+        return sorted(results, key=lambda r: r[rank_by], reverse=True)
+
+    @staticmethod
+    def _get_parameter_values(parameter: dict) -> list:
+        if "values" in parameter:
+            if not isinstance(parameter["values"], list):
+                raise ValueError(f"Values of parameter '{parameter.get('name')}' must be a list.")
+            values = list(parameter["values"])
+        else:
+            try:
+                minimum = parameter["min"]
+                maximum = parameter["max"]
+            except KeyError:
+                raise ValueError(
+                    f"Parameter '{parameter.get('name')}' needs 'min' and 'max', or 'values'."
+                )
+            step = parameter.get("step", 1)
+
+            if not all(_is_number(value) for value in (minimum, maximum, step)):
+                raise ValueError(
+                    f"Invalid range for parameter '{parameter.get('name')}': min, max and step must be numbers."
+                )
+            if step <= 0 or minimum > maximum:
+                raise ValueError(
+                    f"Invalid range for parameter '{parameter.get('name')}': min must be <= max and step must be > 0."
+                )
+
+            count = int((maximum - minimum) / step + 1e-9) + 1
+            values = [minimum + i * step for i in range(count)]
+            if all(isinstance(v, int) for v in (minimum, maximum, step)):
+                values = [int(v) for v in values]
+
+        if not values:
+            raise ValueError(f"No values for parameter '{parameter.get('name')}'.")
+
+        return values
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def apply_parameter_set(strategy_json: list, parameter_set: dict) -> list:
+    """
+    Return a copy of the strategy JSON with indicator parameters replaced by the given ones.
+    Every indicator of the matching name is updated, in all conditions.
+
+    Args:
+        strategy_json (list): Strategy parameters (list of conditions).
+        parameter_set (dict): {"SMA": {"short_window": 5}, ...}
+
+    Returns:
+        list: Updated copy of the strategy JSON.
+    """
+    strategy_json = copy.deepcopy(strategy_json)
+    parameter_set = {_normalize_name(name): values for name, values in parameter_set.items()}
+
+    for condition in strategy_json:
+        for indicator in condition.get("signal_models", {}).get("indicators", []):
+            values = parameter_set.get(_normalize_name(indicator.get("name", "")))
+            if values:
+                indicator.setdefault("parameters", {}).update(values)
+
+    return strategy_json
+
+
+def _normalize_name(name: str) -> str:
+    # Same matching as IndicatorStrategy._from_json, e.g. "SMA" and "SMA Strategy"
+    return name.strip().replace(" ", "").replace("Strategy", "").upper()
+
+
+def share_candles(candles: CandleSeries) -> shared_memory.SharedMemory:
+    """
+    Copy the candles into a new shared memory segment, one contiguous column after another, see attach_candles.
+    The caller closes and unlinks the segment once the workers are done.
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(candles)) * 8 * len(CANDLE_COLUMNS))
+    for view, name in zip(_get_column_views(shm, len(candles)), CANDLE_COLUMNS):
+        view[:] = getattr(candles, name)
+
+    return shm
+
+
+def attach_candles(shm_name: str, length: int, timeframe_ms: int) -> tuple[shared_memory.SharedMemory, CandleSeries]:
+    """
+    Open a segment created by share_candles. The columns of the returned CandleSeries are read-only views
+    of the segment, not copies, so the segment must stay open as long as the candles are used.
+
+    Returns:
+        tuple[SharedMemory, CandleSeries]: The open segment and the candles viewing it
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    views = _get_column_views(shm, length)
+    for view in views:
+        view.flags.writeable = False
+
+    return shm, CandleSeries(*views, timeframe_ms=timeframe_ms)
+
+
+def _get_column_views(shm: shared_memory.SharedMemory, length: int) -> list[np.ndarray]:
+    # open_time as int64 and the price columns as float64, 8 bytes per value, so CandleSeries uses them without conversion
+    return [
+        np.ndarray(length, dtype=np.int64 if name == "open_time" else np.float64, buffer=shm.buf, offset=i * length * 8)
+        for i, name in enumerate(CANDLE_COLUMNS)
+    ]
+
+
+def _init_worker(shm_name: str, length: int, timeframe_ms: int, initial_balance: float) -> None:
+    global _worker_shm, _worker_candles, _worker_initial_balance
+
+    _worker_shm, _worker_candles = attach_candles(shm_name, length, timeframe_ms)
+    _worker_initial_balance = initial_balance
+
+
+def _run_parameter_set(task: tuple) -> dict | None:
+    parameter_set, strategy_json = task
+
+    try:
+        strategy = StrategyEngine._from_json(strategy_json)
+    except ValueError:
+        return None  # Invalid combination, e.g. short_window >= long_window
+
+    backtest = BacktestEngine(
+        strategy=strategy, candles=_worker_candles, initial_balance=_worker_initial_balance
+    )
+    final_balance, trades = backtest.run(vectorized=True)
+
+    return {"parameters": parameter_set, **get_result_metrics(final_balance, trades, _worker_initial_balance)}
+
+
+def get_result_metrics(final_balance: float, trades: list, initial_balance: float) -> dict:
+    """
+    Metrics of one backtest run, including every metric in RANK_METRICS.
+
+    Args:
+        final_balance (float): Final balance returned by BacktestEngine.run
+        trades (list[TradeEngine]): Trades returned by BacktestEngine.run
+        initial_balance (float): Initial balance of the run
+    """
+    results = [trade.get_result() for trade in trades]
+    total_wins = len([r for r in results if r and r > 0])
+    total_losses = len([r for r in results if r and r <= 0])
+
+    return {
+        "final_balance": final_balance,
+        "profit_loss": final_balance - initial_balance,
+        "total_trades": len(trades),
+        "total_wins": total_wins,
+        "total_losses": total_losses,
+        "win_rate": total_wins / len(trades) * 100 if trades else 0,
+    }
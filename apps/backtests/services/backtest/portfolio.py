@@ -0,0 +1,223 @@
+"""
+Multi-asset portfolio backtest.
+
+Candles of all assets are aligned into one time-indexed price matrix (rows are candle open times, columns are assets),
+so every step of the simulation checks stop-losses and take-profits of all open positions with a few numpy operations.
+All assets trade from one shared balance: a new position is opened only with the part of the balance not already in open positions.
+Each asset has at most one open position, like the single-asset BacktestEngine.
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+from apps.market.candle_series import CandleSeries
+from apps.strategies.services.core.strategy_engine import StrategyEngine
+from apps.strategies.services.core.trade_risk_model import TradeRiskModel
+
+EPS = 1e-9  # Same tolerance as TradeEngine
+MAX_ASSETS = 500
+SIGNALS = {"BUY": 1, "SELL": -1}
+
+
+class PriceMatrix:
+    """
+    Candles of several assets aligned on the union of their open times. Missing candles are NaN.
+    """
+
+    def __init__(self, candles_by_symbol: dict[str, CandleSeries]):
+        """
+        Args:
+            candles_by_symbol (dict[str, CandleSeries]): {symbol: candles} of the same timeframe
+        """
+        if not candles_by_symbol:
+            raise ValueError("No candles data provided for portfolio backtest.")
+        if len(candles_by_symbol) > MAX_ASSETS:
+            raise ValueError(f"Too many assets ({len(candles_by_symbol)}). Maximum is {MAX_ASSETS}.")
+
+        self.symbols = list(candles_by_symbol)
+        self.candles = [CandleSeries.from_candles(candles_by_symbol[symbol]) for symbol in self.symbols]
+        self.timeframe_ms = self.candles[0].timeframe_ms
+
+        self.open_time = np.unique(np.concatenate([candles.open_time for candles in self.candles]))
+        shape = (len(self.open_time), len(self.symbols))
+
+        # Position of the candle in the asset's own series, -1 where the asset has no candle
+        self.index = np.full(shape, -1, dtype=np.int64)
+        self.open = np.full(shape, np.nan)
+        self.high = np.full(shape, np.nan)
+        self.low = np.full(shape, np.nan)
+
+        for column, candles in enumerate(self.candles):
+            rows = np.searchsorted(self.open_time, candles.open_time)
+            self.index[rows, column] = np.arange(len(candles))
+            self.open[rows, column] = candles.open
+            self.high[rows, column] = candles.high
+            self.low[rows, column] = candles.low
+
+    def __len__(self) -> int:
+        return len(self.open_time)
+
+
+class PortfolioBacktestEngine:
+    def __init__(
+        self,
+        strategy: StrategyEngine,
+        candles_by_symbol: dict[str, CandleSeries],
+        initial_balance: float = 1000,
+        rng: np.random.Generator = None,
+    ):
+        """
+        Args:
+            strategy (StrategyEngine): Strategy evaluated on every asset
+            candles_by_symbol (dict[str, CandleSeries]): {symbol: candles} of the same timeframe
+            initial_balance (float): Shared balance of all assets
+            rng (np.random.Generator): Generator deciding candles hitting both stop-loss and take-profit, like TradeEngine
+        """
+        self.strategy = strategy
+        self.prices = PriceMatrix(candles_by_symbol)
+        self.initial_balance = initial_balance
+        self.current_balance = initial_balance
+        self.rng = rng or np.random.default_rng()
+        self.trades = []
+
+    def get_signals(self) -> tuple[np.ndarray, dict]:
+        """
+        Evaluate the strategy on every asset, each in one vectorized pass over its whole series.
+
+        Returns:
+            tuple[np.ndarray, dict]: Signal matrix (1 buy, -1 sell, 0 hold) in the shape of the price matrix,
+                and {(row, column): TradeRiskModel} of the buy and sell signals
+        """
+        signals = np.zeros(self.prices.index.shape, dtype=np.int8)
+        risk_models = {}
+
+        for column, candles in enumerate(self.prices.candles):
+            rows = np.searchsorted(self.prices.open_time, candles.open_time)
+            for row, (signal, risk_model) in zip(
+                rows, self.strategy.get_signal_and_risk_model_list_from_candles(candles)
+            ):
+                if signal in SIGNALS:
+                    signals[row, column] = SIGNALS[signal]
+                    risk_models[(row, column)] = risk_model
+
+        return signals, risk_models
+
+    def run(self) -> tuple[float, list[dict]]:
+        """
+        Run the backtest over all assets.
+        As in BacktestEngine, a signal of a candle opens a position at the open of the asset's next candle,
+        which is then checked against the same candle.
+
+        Returns:
+            tuple[float, list[dict]]: Final balance and trades of all assets in order of closing, not closed ones at the end
+        """
+        prices = self.prices
+        signals, risk_models = self.get_signals()
+        assets = len(prices.symbols)
+
+        # Open position of every asset, one array element per asset
+        positions = {
+            "is_buy": np.zeros(assets, dtype=bool),
+            "entry_price": np.zeros(assets),
+            "entry_row": np.zeros(assets, dtype=np.int64),
+            "stop_loss": np.zeros(assets),
+            "take_profit": np.zeros(assets),
+            "quantity": np.zeros(assets),
+        }
+        active = np.zeros(assets, dtype=bool)
+        is_buy, stop_loss, take_profit, quantity = (
+            positions[name] for name in ("is_buy", "stop_loss", "take_profit", "quantity")
+        )
+
+        for row in range(len(prices) - 1):
+            next_row = row + 1
+
+            # Open positions of the assets which signalled and have the next candle
+            candidates = np.flatnonzero((signals[row] != 0) & ~active & (prices.index[next_row] >= 0))
+            for column in candidates:
+                risk_model = risk_models[(row, column)]
+                position = prices.index[row, column]
+                past_candles = prices.candles[column][max(0, position - TradeRiskModel.ATR_PERIOD):position + 1]
+
+                available = self.current_balance - quantity[active].sum()
+                size = min(risk_model.get_position_quantity(self.current_balance, candles=past_candles), available)
+                if size <= 0:
+                    continue
+
+                buy = signals[row, column] == 1
+                price = prices.open[next_row, column]
+                stop_loss_pct = risk_model.get_stop_loss(candles=past_candles)
+                take_profit_pct = risk_model.get_take_profit(candles=past_candles)
+
+                active[column] = True
+                is_buy[column] = buy
+                positions["entry_price"][column] = price
+                positions["entry_row"][column] = next_row
+                quantity[column] = size
+                stop_loss[column] = price * (1 - stop_loss_pct / 100) if buy else price * (1 + stop_loss_pct / 100)
+                take_profit[column] = price * (1 + take_profit_pct / 100) if buy else price * (1 - take_profit_pct / 100)
+
+            # Check all open positions against the next candle at once
+            high = prices.high[next_row]
+            low = prices.low[next_row]
+            with np.errstate(invalid="ignore"):  # NaN of missing candles compares as False
+                sl_hit = active & np.where(is_buy, low <= stop_loss + EPS, high >= stop_loss - EPS)
+                tp_hit = active & np.where(is_buy, high >= take_profit - EPS, low <= take_profit + EPS)
+
+            closed = sl_hit | tp_hit
+            if not closed.any():
+                continue
+
+            # Candles hitting both levels are decided randomly, like in TradeEngine
+            stop_loss_first = sl_hit & (~tp_hit | (self.rng.random(assets) < 0.5))
+            exit_price = np.where(stop_loss_first, stop_loss, take_profit)
+
+            for column in np.flatnonzero(closed):
+                trade = self._get_trade(positions, column, exit_price[column], next_row)
+                self.trades.append(trade)
+                self.current_balance = max(0, self.current_balance + trade["result"])
+
+            active &= ~closed
+            if self.current_balance <= 0:
+                break
+
+        for column in np.flatnonzero(active):
+            self.trades.append(self._get_trade(positions, column))
+
+        return self.current_balance, self.trades
+
+    def _get_trade(self, positions: dict, column: int, exit_price: float = None, exit_row: int = None) -> dict:
+        """
+        Trade of the asset's position in the format of TradeEngine.get_json, with the symbol.
+        Without exit_price the trade is not closed.
+        """
+        is_buy = bool(positions["is_buy"][column])
+        entry_price = float(positions["entry_price"][column])
+        quantity = float(positions["quantity"][column])
+
+        result = None
+        if exit_price is not None:
+            exit_price = float(exit_price)
+            if is_buy:
+                result = (exit_price / entry_price) * quantity - quantity
+            else:
+                result = (entry_price / exit_price) * quantity - quantity
+
+        return {
+            "symbol": self.prices.symbols[column],
+            "entry_price": entry_price,
+            "exit_price": exit_price,
+            "entry_time": _to_datetime(self.prices.open_time[positions["entry_row"][column]]),
+            "exit_time": _to_datetime(self.prices.open_time[exit_row]) if exit_row is not None else None,
+            "quantity": quantity,
+            "trade_type": 1 if is_buy else 0,
+            "stop_loss": float(positions["stop_loss"][column]),
+            "take_profit": float(positions["take_profit"][column]),
+            "status": 1 if result is None else 0,
+            "result": result,
+        }
+
+
+def _to_datetime(open_time: int) -> datetime:
+    return datetime.fromtimestamp(int(open_time) / 1000, tz=timezone.utc)
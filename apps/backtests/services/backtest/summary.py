@@ -0,0 +1,62 @@
+"""
+Summary metrics of a finished backtest.
+
+They are computed once when the backtest is saved and stored in the summary columns of `Backtest`,
+so lists of backtests can be sorted and filtered in SQL without loading the result JSON or the trades.
+"""
+
+import numpy as np
+
+SUMMARY_FIELDS = ["return_pct", "max_drawdown_pct", "win_rate", "sharpe_ratio", "trade_count"]
+
+
+def get_backtest_summary(initial_capital: float, trade_results: list, final_balance: float = None) -> dict:
+    """
+    Compute the summary metrics of a backtest.
+    Trades are run one after another, so the equity curve is the initial capital plus the cumulative trade results.
+
+    Args:
+        initial_capital (float): Balance at the start of the backtest
+        trade_results (list[float | None]): Profit/loss of every trade in chronological order, None for trades that are not closed
+        final_balance (float): Balance at the end of the backtest, defaults to initial capital plus the closed trade results
+
+    Returns:
+        dict: {field: value} for every field in SUMMARY_FIELDS. Metrics which can not be computed are None.
+            return_pct: Total return in %
+            max_drawdown_pct: Largest drop of the equity from its previous peak in %
+            win_rate: Profitable trades out of all trades in %
+            sharpe_ratio: Mean / standard deviation of the per-trade returns (risk-free rate 0, not annualized)
+            trade_count: Number of trades, including the not closed ones
+    """
+    initial_capital = float(initial_capital)
+    results = np.array([float(r) for r in trade_results if r is not None], dtype=np.float64)
+    equity = initial_capital + np.concatenate([[0.0], np.cumsum(results)])
+
+    if final_balance is None:
+        final_balance = equity[-1]
+
+    summary = {
+        "return_pct": None,
+        "max_drawdown_pct": None,
+        "win_rate": float(np.count_nonzero(results > 0) / len(trade_results) * 100) if trade_results else None,
+        "sharpe_ratio": None,
+        "trade_count": len(trade_results),
+    }
+
+    if initial_capital <= 0:
+        return summary
+
+    summary["return_pct"] = (float(final_balance) - initial_capital) / initial_capital * 100
+
+    peaks = np.maximum.accumulate(equity)
+    summary["max_drawdown_pct"] = float(np.max((peaks - equity) / peaks) * 100)
+
+    # Return of each trade relative to the balance it was opened with
+    balances = equity[:-1]
+    if len(results) > 1 and np.all(balances > 0):
+        returns = results / balances
+        std = returns.std(ddof=1)
+        if std > 0:
+            summary["sharpe_ratio"] = float(returns.mean() / std)
+
+    return summary
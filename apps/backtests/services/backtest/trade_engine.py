@@ -13,6 +13,8 @@ class TradeEngine:
         take_profit_pct: float,
         quantity: float,
         trade_type: bool = True,
+        intrabar_resolver=None,
+        rng: random.Random = None,
     ):
         """
         Obj: Trade object to represent a trade with entry and exit details.
@@ -23,6 +25,9 @@ class TradeEngine:
             take_profit_pct (float): Take-profit in % > 0, e.g. 5 for 5%
             quantity (float): Quantity of the asset traded, in dollars
             trade_type (bool): True for buy trade, False for sell trade.
+            intrabar_resolver (IntrabarResolver): Optional resolver deciding which level was hit first when a candle hits both,
+                using lower-timeframe candles. Without it, or if it can not decide, the level is chosen randomly.
+            rng (random.Random): Random generator for that choice, defaults to the global one. A seeded one makes the trade reproducible.
         """
 
         self.open_candle = open_candle
@@ -35,6 +40,8 @@ class TradeEngine:
         self.status = True  # True if trade is open, False if closed
 
         self.exit_time = None  # Will be updated when trade is closed
+        self.intrabar_resolver = intrabar_resolver
+        self.rng = rng or random
 
         self.stop_loss = (
             self.entry_price * (1 - stop_loss_pct / 100)
@@ -104,23 +111,18 @@ class TradeEngine:
             True if trade is closed, otherwise returns False. Sets exit_price if trade is closed, status to False.
         """
 
-        EPS = 1e-9 # Small epsilon to handle floating-point precision issues
-
-        low = candle["low"]
-        high = candle["high"]
+        sl_hit, tp_hit = self.get_hits(candle)
 
-        # Define conditions based on trade direction
-        if self.trade_type:  # Buy
-            sl_hit = low <= self.stop_loss + EPS
-            tp_hit = high >= self.take_profit - EPS
-        else:  # Sell
-            sl_hit = high >= self.stop_loss - EPS
-            tp_hit = low <= self.take_profit + EPS
-
-        # If both stop-loss and take-profit are hit in the same candle, we can randomly decide which one is hit first, or we can prioritize one over another. 
-        # Here we will randomly decide, so the results will not be biased towards stop-loss hits in high-volatility candles. 
+        # If both stop-loss and take-profit are hit in the same candle, the intrabar resolver decides from lower-timeframe candles.
+        # Without it we randomly decide, so the results will not be biased towards stop-loss hits in high-volatility candles. 
         if sl_hit and tp_hit:
-            if random.random() < 0.5:
+            stop_loss_first = None
+            if self.intrabar_resolver is not None:
+                stop_loss_first = self.intrabar_resolver.is_stop_loss_first(candle, self)
+            if stop_loss_first is None:
+                stop_loss_first = self.rng.random() < 0.5
+
+            if stop_loss_first:
                 self._close_trade(self.stop_loss, candle["open_time"])
             else:
                 self._close_trade(self.take_profit, candle["open_time"])
@@ -136,6 +138,24 @@ class TradeEngine:
 
         return False
     
+    def get_hits(self, candle: dict) -> tuple[bool, bool]:
+        """
+        Check which levels of the trade the candle reaches.
+
+        Returns:
+            tuple[bool, bool]: (stop-loss hit, take-profit hit)
+        """
+        EPS = 1e-9 # Small epsilon to handle floating-point precision issues
+
+        low = candle["low"]
+        high = candle["high"]
+
+        # Define conditions based on trade direction
+        if self.trade_type:  # Buy
+            return low <= self.stop_loss + EPS, high >= self.take_profit - EPS
+        else:  # Sell
+            return high >= self.stop_loss - EPS, low <= self.take_profit + EPS
+
     def _close_trade(self, price: float, time) -> None:
         """
         Close the trade by setting the exit price, exit time, and status. 
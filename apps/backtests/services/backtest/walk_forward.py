@@ -0,0 +1,240 @@
+"""
+Walk-forward analysis.
+
+The candle series is split into rolling windows: the strategy parameters are optimized on a training window
+and the best ones are tested on the window right after it, then both windows move forward by `step` candles.
+
+The series is loaded once. Indicators and signals of every parameter set are computed once over the whole series
+and every window uses a slice of them, so each window starts with indicators warmed up by the candles before it
+instead of recomputing them from an empty history. Windows are evaluated in parallel in a process pool,
+with the candles shared through shared memory as in the parameter sweep.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from apps.backtests.services.backtest.backtest_engine import BacktestEngine
+from apps.backtests.services.backtest.parameter_sweep import (
+    RANK_METRICS,
+    ParameterSweep,
+    apply_parameter_set,
+    attach_candles,
+    get_result_metrics,
+    share_candles,
+)
+from apps.market.candle_series import CandleSeries
+from apps.strategies.services.core.strategy_engine import StrategyEngine
+from apps.strategies.services.core.trade_risk_model import TradeRiskModel
+
+MAX_WINDOWS = 200
+MAX_TASKS = 50000  # Parameter sets * windows
+
+# Per-worker state, set by _init_worker
+_worker_shm = None  # Kept open for the lifetime of the worker, _worker_candles are views of it
+_worker_candles = None
+_worker_initial_balance = None
+_worker_signals = None  # (parameter set index, strategy, signals) of the last parameter set evaluated by the worker
+
+
+class WalkForward:
+    def __init__(
+        self,
+        strategy_json: list,
+        parameter_ranges: dict | list,
+        candles: list[dict] | CandleSeries,
+        train_size: int,
+        test_size: int,
+        step: int = None,
+        initial_balance: float = 1000,
+        max_workers: int = None,
+    ):
+        """
+        Args:
+            strategy_json (list): Strategy parameters (list of conditions), as stored in Strategy.parameters.
+            parameter_ranges (dict | list): Ranges of the optimized indicator parameters, see ParameterSweep.
+            candles (list[dict] | CandleSeries): OHLCV candles with open_time.
+            train_size (int): Number of candles of every training window.
+            test_size (int): Number of candles of every test window.
+            step (int): Number of candles the windows move forward by, defaults to test_size (test windows follow each other).
+            initial_balance (float): Initial balance of every window backtest.
+            max_workers (int): Number of worker processes, defaults to the number of CPUs.
+        """
+        if not candles:
+            raise ValueError("No candles data provided for walk-forward analysis.")
+
+        step = step or test_size
+        if train_size < 2 or test_size < 2 or step < 1:
+            raise ValueError("Train and test windows must have at least 2 candles and step must be positive.")
+
+        self.strategy_json = strategy_json
+        self.parameter_sets = ParameterSweep(strategy_json, parameter_ranges, candles).get_parameter_sets()
+        self.candles = CandleSeries.from_candles(candles)
+        self.train_size = train_size
+        self.test_size = test_size
+        self.step = step
+        self.initial_balance = initial_balance
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def get_windows(self) -> list[tuple[int, int, int]]:
+        """
+        Split the candles into windows.
+
+        Returns:
+            list[tuple[int, int, int]]: (train start, test start, test end) candle indexes of every window,
+                the training window is [train start, test start) and the test window [test start, test end)
+        """
+        windows = []
+        start = 0
+        while start + self.train_size + self.test_size <= len(self.candles):
+            windows.append((start, start + self.train_size, start + self.train_size + self.test_size))
+            start += self.step
+
+        if not windows:
+            raise ValueError(
+                f"Not enough candles ({len(self.candles)}) for a training window of {self.train_size} "
+                f"and a test window of {self.test_size} candles."
+            )
+        if len(windows) > MAX_WINDOWS:
+            raise ValueError(f"Too many windows ({len(windows)}). Maximum is {MAX_WINDOWS}, use a larger step.")
+
+        return windows
+
+    def run(self, rank_by: str = "profit_loss") -> dict:
+        """
+        Optimize the parameters on every training window and test the best ones on the following window.
+
+        Args:
+            rank_by (str): Metric the parameters are optimized for, descending. One of RANK_METRICS.
+
+        Returns:
+            dict: {
+                "windows": [
+                    {
+                        "train_start", "train_end", "test_start", "test_end": Datetimes of the first and the last candle,
+                        "parameters": Best parameters of the training window,
+                        "train": Metrics of the best parameters on the training window,
+                        "test": Metrics of the best parameters on the test window
+                    }, ...
+                ],
+                "test_profit_loss": Sum of the profit/loss of all test windows,
+                "profitable_windows": Number of test windows with a profit
+            }
+        """
+        if rank_by not in RANK_METRICS:
+            raise ValueError(f"Invalid rank_by '{rank_by}'. Use one of: {', '.join(RANK_METRICS)}.")
+
+        windows = self.get_windows()
+        if len(self.parameter_sets) * len(windows) > MAX_TASKS:
+            raise ValueError(
+                f"Too many parameter combinations and windows ({len(self.parameter_sets)} * {len(windows)}). "
+                f"Maximum is {MAX_TASKS}."
+            )
+
+        # Ordered by parameter set, so consecutive tasks of a worker reuse the signals of the same parameter set
+        tasks = [
+            (index, apply_parameter_set(self.strategy_json, parameter_set), window_index, window)
+            for index, parameter_set in enumerate(self.parameter_sets)
+            for window_index, window in enumerate(windows)
+        ]
+
+        shm = share_candles(self.candles)
+        try:
+            workers = min(self.max_workers, len(tasks))
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(shm.name, len(self.candles), self.candles.timeframe_ms, self.initial_balance),
+            ) as executor:
+                chunksize = max(1, len(tasks) // (workers * 4))
+                results = list(executor.map(_run_window, tasks, chunksize=chunksize))
+        finally:
+            shm.close()
+            shm.unlink()
+
+        # Best parameter set of every window, the first one on ties
+        best = {}
+        for result in results:
+            if result is None:
+                continue  # Invalid combination, e.g. short_window >= long_window
+            index, window_index, train, test = result
+            if window_index not in best or train[rank_by] > best[window_index][1][rank_by]:
+                best[window_index] = (index, train, test)
+
+        if not best:
+            raise ValueError("No valid parameter combination.")
+
+        open_time = self.candles.open_time
+        window_results = []
+        for window_index, (train_start, test_start, test_end) in enumerate(windows):
+            index, train, test = best[window_index]
+            window_results.append(
+                {
+                    "train_start": _to_datetime(open_time[train_start]),
+                    "train_end": _to_datetime(open_time[test_start - 1]),
+                    "test_start": _to_datetime(open_time[test_start]),
+                    "test_end": _to_datetime(open_time[test_end - 1]),
+                    "parameters": self.parameter_sets[index],
+                    "train": train,
+                    "test": test,
+                }
+            )
+
+        return {
+            "windows": window_results,
+            "test_profit_loss": sum(window["test"]["profit_loss"] for window in window_results),
+            "profitable_windows": len([window for window in window_results if window["test"]["profit_loss"] > 0]),
+        }
+
+
+def _init_worker(shm_name: str, length: int, timeframe_ms: int, initial_balance: float) -> None:
+    global _worker_shm, _worker_candles, _worker_initial_balance, _worker_signals
+
+    _worker_shm, _worker_candles = attach_candles(shm_name, length, timeframe_ms)
+
+    _worker_initial_balance = initial_balance
+    _worker_signals = None
+
+
+def _run_window(task: tuple) -> tuple | None:
+    global _worker_signals
+
+    index, strategy_json, window_index, (train_start, test_start, test_end) = task
+
+    if _worker_signals is None or _worker_signals[0] != index:
+        try:
+            strategy = StrategyEngine._from_json(strategy_json)
+        except ValueError:
+            return None  # Invalid combination, e.g. short_window >= long_window
+
+        # Over the whole series, so the windows get indicators warmed up by all the candles before them
+        _worker_signals = (index, strategy, strategy.get_signal_and_risk_model_list_from_candles(_worker_candles))
+
+    _, strategy, signals = _worker_signals
+
+    train = _run_slice(strategy, signals, train_start, test_start)
+    test = _run_slice(strategy, signals, test_start, test_end)
+    return index, window_index, train, test
+
+
+def _run_slice(strategy: StrategyEngine, signals: list, start: int, end: int) -> dict:
+    """
+    Backtest the candles [start, end) with the precomputed signals.
+    The candles before start needed by the risk models (ATR) are included, with their signals replaced by HOLD,
+    so the first trade can still be opened only at start + 1, as in a backtest of the window alone.
+    """
+    warm_up = min(start, TradeRiskModel.ATR_PERIOD)
+    window_signals = [("HOLD", None)] * warm_up + signals[start:end]
+
+    backtest = BacktestEngine(
+        strategy=strategy,
+        candles=_worker_candles[start - warm_up:end],
+        initial_balance=_worker_initial_balance,
+    )
+    final_balance, trades = backtest.run(vectorized=True, signals=window_signals)
+
+    return get_result_metrics(final_balance, trades, _worker_initial_balance)
+
+
+def _to_datetime(open_time: int) -> datetime:
+    return datetime.fromtimestamp(int(open_time) / 1000, tz=timezone.utc)
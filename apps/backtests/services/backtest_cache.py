@@ -0,0 +1,67 @@
+import hashlib
+import json
+import time
+from typing import Optional
+
+from django.core.cache import caches
+
+from apps.market.services import format_coin_symbol
+from apps.strategies.services.core.strategy_engine import StrategyEngine
+
+CACHE_ALIAS = "backtests"  # LRU/TTL eviction is configured in settings.CACHES
+WEEK_OFFSET_MS = 4 * 24 * 3600 * 1000  # Weekly candles open on Monday, the epoch was a Thursday
+
+
+def get_backtest_cache_key(
+    strategy_engine: StrategyEngine,
+    token: str,
+    timeframe: str,
+    candle_amount: int,
+    last_open_time: int,
+    initial_balance: float,
+    intrabar: bool = False,
+) -> str:
+    """
+    Key of a backtest of the latest {candle_amount} closed candles: canonical hash of the strategy JSON and the run parameters.
+    Closed candles never change, so the candles are identified by the open time of the last one and the key can be
+    computed before they are downloaded (see get_last_closed_open_time). A new closed candle gives a different key.
+    The token is normalized, so 'BTCUSDT', 'btcusdt' and 'BTC/USDT' share one entry.
+    """
+    key = f"backtest:{get_strategy_hash(strategy_engine)}:{format_coin_symbol(token)}:{timeframe}:{int(candle_amount)}:{int(last_open_time)}:{float(initial_balance)!r}"
+    # Intrabar resolution can close trades differently, so its results are cached separately
+    return f"{key}:intrabar" if intrabar else key
+
+
+def get_strategy_hash(strategy_engine: StrategyEngine) -> str:
+    """
+    SHA-256 of the canonical strategy JSON, equal for strategies with the same conditions and parameters.
+    """
+    return hashlib.sha256(
+        json.dumps(strategy_engine.get_json(), sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def get_last_closed_open_time(timeframe: str, now: int = None) -> int:
+    """
+    Open time of the last closed candle of the timeframe in epoch ms, without asking the exchange.
+
+    Args:
+        timeframe (str): Time interval, e.g. '1h'
+        now (int): Current time in epoch ms, defaults to the current time
+    """
+    from ccxt import Exchange
+
+    timeframe_ms = Exchange.parse_timeframe(timeframe) * 1000
+    offset = WEEK_OFFSET_MS if timeframe.endswith("w") else 0
+    now = int(time.time() * 1000) if now is None else now
+
+    open_candle = (now - offset) // timeframe_ms * timeframe_ms + offset
+    return open_candle - timeframe_ms
+
+
+def get_cached_backtest(key: str) -> Optional[dict]:
+    return caches[CACHE_ALIAS].get(key)
+
+
+def cache_backtest(key: str, result: dict) -> None:
+    caches[CACHE_ALIAS].set(key, result)
@@ -1,15 +1,52 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
 from typing import Optional
 
+import numpy as np
 from django.core.exceptions import PermissionDenied
 
 from apps.strategies.services.core.strategy_engine import StrategyEngine
 from apps.strategies.models import Strategy
 from apps.market.services import get_binance_ohlcv_and_timestamp
+from apps.market.services import get_binance_ohlcv_and_timestamp_range
 from apps.market.services import calculate_start_and_end_dates
-from apps.backtests.models import Backtest
-from apps.backtests.services.backtest.backtest_engine import BacktestEngine
-from ccxt.base.errors import RequestTimeout
-from django.db.models import Q
+from apps.market.services import check_interval
+from apps.market.services import format_coin_symbol
+from apps.market.market_metadata import DEFAULT_QUOTE
+from apps.market.candle_series import CandleSeries
+from apps.backtests.models import Asset, Backtest, BacktestJob, Trade
+from apps.backtests.services.backtest.backtest_engine import BacktestCancelled, BacktestEngine
+from apps.backtests.services.backtest.checkpoint import BacktestCheckpoint
+from apps.backtests.services.backtest.intrabar import IntrabarResolver
+from apps.backtests.services.backtest.monte_carlo import MonteCarloBacktest
+from apps.backtests.services.backtest.portfolio import MAX_ASSETS as PORTFOLIO_MAX_ASSETS, PortfolioBacktestEngine
+from apps.backtests.services.backtest.parameter_sweep import ParameterSweep
+from apps.backtests.services.backtest.summary import SUMMARY_FIELDS, get_backtest_summary
+from apps.backtests.services.backtest.walk_forward import WalkForward
+from apps.backtests.services.backtest_cache import (
+    cache_backtest,
+    get_backtest_cache_key,
+    get_cached_backtest,
+    get_last_closed_open_time,
+)
+from apps.backtests.trade_columns import TradeColumns
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+
+BACKTESTS_PAGE_SIZE = 20
+MAX_BACKTESTS_PAGE_SIZE = 100
+TRADE_STORAGES = ["rows", "columnar"]
+# Keys of the run_backtest result stored in Backtest.result
+BACKTEST_RESULT_FIELDS = ["final_balance", "profit_loss", "total_trades", "total_wins", "total_losses", "not_closed_trades"]
+BACKTEST_ORDERINGS = ["id", "created_at", "return_pct", "max_drawdown_pct", "win_rate", "sharpe_ratio", "trade_count"]
+# Running jobs without a heartbeat for this long are considered abandoned (worker killed) and are claimed again
+JOB_LEASE_TIMEOUT = timedelta(minutes=10)
+JOB_HEARTBEAT_INTERVAL = 2  # Minimum seconds between two progress updates (and heartbeats) of a running job
+# Seconds between heartbeats of a running job which reports no progress, e.g. while its candles are downloaded
+JOB_IDLE_HEARTBEAT_INTERVAL = 60
 
 
 def run_backtest(
@@ -19,20 +56,72 @@ def run_backtest(
     token: str = "BTCUSDT",
     timeframe: str = "1h",
     candle_amount: int = 500,
+    vectorized: bool = False,
+    progress_callback=None,
+    use_cache: bool = True,
+    save: bool = False,
+    intrabar: bool = False,
 ) -> dict:
     """
     Application service entry point.
+    Results of identical backtests (same strategy, closed candles and balance) are served from the backtest cache.
+    With save=True the result is stored as a Backtest right away and only its id and summary are returned, without the trades.
+    With intrabar=True candles hitting both stop-loss and take-profit of a trade are resolved with lower-timeframe candles
+    instead of randomly, so the result is deterministic.
+    Saved backtests cover only closed candles and store a checkpoint of the run, so refresh_backtest can extend them later.
     """
 
-    if not strategy.creator is None:
-        if (
-            user.id != strategy.creator_id
-            and not user.is_staff
-            and not user.is_superuser
-        ):
-            raise PermissionDenied(
-                "User does not have permission to run this strategy."
-            )
+    result, checkpoint = _get_backtest_result(
+        user, strategy, initial_balance, token, timeframe, candle_amount, vectorized, progress_callback, use_cache, intrabar,
+        checkpoint=save,
+    )
+    if not save:
+        return result
+
+    backtest = save_backtest(
+        user,
+        strategy,
+        token=token,
+        timeframe=timeframe,
+        start_date=result["start_date"],
+        end_date=result["end_date"],
+        initial_capital=result["initial_balance"],
+        candles_amount=result["candles_amount"],
+        result=result,
+        checkpoint=checkpoint,
+    )
+
+    summary = {name: value for name, value in result.items() if name != "trades"}
+    summary.update({name: getattr(backtest, name) for name in SUMMARY_FIELDS})
+    summary["backtest_id"] = backtest.id
+    return summary
+
+
+def _get_backtest_result(
+    user,
+    strategy: Strategy,
+    initial_balance: float,
+    token: str,
+    timeframe: str,
+    candle_amount: int,
+    vectorized: bool,
+    progress_callback,
+    use_cache: bool,
+    intrabar: bool,
+    checkpoint: bool = False,
+) -> tuple[dict, Optional[BacktestCheckpoint]]:
+    """
+    Run the backtest of the latest {candle_amount} closed candles, or serve it from the cache.
+    The candle which is not closed yet is always left out, its values would still change. So the cache key is known
+    before any candle is downloaded, and a cached result is returned without downloading anything.
+    With checkpoint=True the run is never served from the cache,
+    so the checkpoint of the engine after the last closed candle is returned too. Runs which can not be resumed
+    (strategies which can not be streamed, depleted balance) have no checkpoint.
+
+    Returns:
+        tuple[dict, Optional[BacktestCheckpoint]]: Result and checkpoint of the run
+    """
+    _check_run_permission(user, strategy)
 
     try:
         initial_balance = float(initial_balance)
@@ -41,22 +130,59 @@ def run_backtest(
         raise ValueError(
             "Initial balance must be a float and candle amount must be an integer."
         )
+    if candle_amount < 1:
+        raise ValueError("Candle amount must be positive.")
 
     srategy_engine = StrategyEngine._from_json(strategy.parameters)
+
+    if use_cache and not checkpoint and check_interval(timeframe):
+        cached_result = get_cached_backtest(
+            get_backtest_cache_key(
+                srategy_engine, token, timeframe, candle_amount, get_last_closed_open_time(timeframe),
+                initial_balance, intrabar,
+            )
+        )
+        if cached_result is not None:
+            return cached_result, None
+
+    from ccxt.base.errors import RequestTimeout
+
     try:
-        candles = get_binance_ohlcv_and_timestamp(token, timeframe, candle_amount)
+        # One more candle, the open one is dropped
+        candles = get_binance_ohlcv_and_timestamp(token, timeframe, candle_amount + 1, as_series=True)
     except RequestTimeout as e:
         raise RuntimeError("Market data timeout") from e
 
+    candles = _get_closed_candles(candles)[-candle_amount:]
+    if not len(candles):
+        raise ValueError("No closed candles to backtest.")
+
+    # From the candles actually downloaded, in case the exchange is late with the last candle
+    cache_key = get_backtest_cache_key(
+        srategy_engine, token, timeframe, candle_amount, int(candles.open_time[-1]), initial_balance, intrabar
+    )
+
     backtest = BacktestEngine(
-        strategy=srategy_engine, initial_balance=initial_balance, candles=candles
+        strategy=srategy_engine,
+        initial_balance=initial_balance,
+        candles=candles,
+        intrabar_resolver=IntrabarResolver(token, timeframe) if intrabar else None,
     )
 
-    current_balance, self_trades = backtest.run()
+    current_balance, self_trades = backtest.run(
+        vectorized=bool(vectorized), progress_callback=progress_callback
+    )
+
+    backtest_checkpoint = None
+    if checkpoint:
+        try:
+            backtest_checkpoint = backtest.get_checkpoint()
+        except ValueError:
+            pass  # Saved without a checkpoint, it can not be refreshed
 
     start_date, end_date = calculate_start_and_end_dates(candles)
 
-    return {
+    result = {
         "initial_balance": initial_balance,
         "final_balance": current_balance,
         "profit_loss": current_balance - initial_balance,
@@ -82,9 +208,719 @@ def run_backtest(
         "not_closed_trades": len(
             [trade for trade in self_trades if trade.get_result() is None]
         ),
+        "candles_amount": len(candles),
         "trades": [trade.get_json() for trade in self_trades],
     }
 
+    cache_backtest(cache_key, result)
+
+    return result, backtest_checkpoint
+
+def save_backtest(
+    user,
+    strategy: Strategy,
+    token: str,
+    timeframe: str,
+    start_date,
+    end_date,
+    initial_capital: float,
+    candles_amount: int,
+    result: dict,
+    trade_storage: str = None,
+    checkpoint: BacktestCheckpoint = None,
+) -> Backtest:
+    """
+    Store a backtest result with its summary metrics and trades in one transaction.
+
+    Args:
+        token (str): Traded symbol, e.g. 'BTCUSDT' or 'BTC'
+        result (dict): Result of run_backtest, including the trades
+        trade_storage (str): 'rows' for a Trade row per trade, 'columnar' for one compressed blob (see trade_columns.py).
+            Defaults to 'columnar' for backtests with at least BACKTEST_TRADE_BLOB_MIN_TRADES trades.
+        checkpoint (BacktestCheckpoint): State of the engine after the last candle, stored for refresh_backtest
+
+    Returns:
+        Backtest: The saved backtest
+    """
+    trades = result.get("trades") or []
+
+    if trade_storage is None:
+        trade_storage = "columnar" if len(trades) >= settings.BACKTEST_TRADE_BLOB_MIN_TRADES else "rows"
+    if trade_storage not in TRADE_STORAGES:
+        raise ValueError(f"Invalid trade storage '{trade_storage}'. Expected one of {TRADE_STORAGES}.")
+
+    token = _get_asset_symbol(token)
+
+    backtest_result = {name: result.get(name) for name in BACKTEST_RESULT_FIELDS}
+    summary = get_backtest_summary(
+        initial_capital, [trade.get("result") for trade in trades], backtest_result["final_balance"]
+    )
+
+    with transaction.atomic():
+        asset, _ = Asset.objects.get_or_create(symbol=token, defaults={"name": token})
+
+        backtest = Backtest.objects.create(
+            user=user,
+            strategy=strategy,
+            asset=asset,
+            timeframe=timeframe,
+            start_date=start_date,
+            end_date=end_date,
+            initial_capital=initial_capital,
+            candles_amount=candles_amount,
+            result=backtest_result,
+            trades_blob=TradeColumns.from_trades(trades).to_bytes() if trade_storage == "columnar" else None,
+            checkpoint=checkpoint.to_bytes() if checkpoint is not None else None,
+            **summary,
+        )
+
+        if trade_storage == "rows":
+            _create_trade_rows(backtest, trades)
+
+    return backtest
+
+
+def _create_trade_rows(backtest: Backtest, trades: list[dict]) -> None:
+    Trade.objects.bulk_create(
+        [
+            Trade(
+                backtest=backtest,
+                entry_price=t.get("entry_price"),
+                exit_price=t.get("exit_price"),
+                entry_time=t.get("entry_time"),
+                exit_time=t.get("exit_time"),
+                quantity=t.get("quantity"),
+                trade_type=t.get("trade_type"),
+                stop_loss=t.get("stop_loss"),
+                take_profit=t.get("take_profit"),
+                status=t.get("status"),
+                result=t.get("result"),
+            )
+            for t in trades
+        ],
+        batch_size=1000,
+    )
+
+
+def _get_asset_symbol(token: str) -> str:
+    """
+    Asset.symbol of a traded pair: the base asset of pairs quoted in DEFAULT_QUOTE ('BTC' for 'BTC/USDT', 'BTCUSDT' or 'btc'),
+    other pairs without the slash ('ETHBTC'), so their candles can be downloaded again by refresh_backtest.
+    """
+    base, _, quote = format_coin_symbol(token).partition("/")
+    return base if quote == DEFAULT_QUOTE else base + quote
+
+
+def refresh_backtest(user, backtest_id: int) -> Backtest:
+    """
+    Extend a saved backtest with the candles closed since it was saved or last refreshed.
+    The run resumes from the stored checkpoint, so only the new candles are evaluated and only the new trades are stored.
+    A checkpoint which can not be loaded (written by another checkpoint version, or the strategy parameters changed since)
+    is not resumed, the whole backtest is recomputed from its start date instead, see _recompute_backtest.
+
+    Raises:
+        Backtest.DoesNotExist: No such backtest of the user
+        ValueError: The backtest has no checkpoint, e.g. it was saved by the client
+        RuntimeError: Market data timeout
+
+    Returns:
+        Backtest: The updated backtest
+    """
+    backtest = Backtest.objects.select_related("asset", "strategy").get(id=backtest_id, user=user)
+    _check_run_permission(user, backtest.strategy)
+
+    if backtest.checkpoint is None:
+        raise ValueError("Backtest has no checkpoint, it can not be refreshed. Run and save it again.")
+
+    strategy_engine = StrategyEngine._from_json(backtest.strategy.parameters)
+    try:
+        checkpoint = BacktestCheckpoint.from_bytes(backtest.checkpoint, strategy_engine)
+    except ValueError:
+        return _recompute_backtest(backtest, strategy_engine)
+
+    next_open_time = checkpoint.last_open_time + checkpoint.candles.timeframe_ms
+    candles = _get_closed_candles_since(backtest, datetime.fromtimestamp(next_open_time / 1000, tz=dt_timezone.utc))
+    candles = candles[np.searchsorted(candles.open_time, next_open_time):]
+    if not len(candles):
+        return backtest
+
+    engine = BacktestEngine(
+        strategy=strategy_engine,
+        candles=candles,
+        initial_balance=float(backtest.initial_capital),
+        resume_from=checkpoint,
+    )
+    final_balance, new_trades = engine.run()
+    new_trades = [trade.get_json() for trade in new_trades]
+
+    try:
+        new_checkpoint = engine.get_checkpoint().to_bytes()
+    except ValueError:
+        new_checkpoint = None  # Balance depleted, there is nothing to continue
+
+    with transaction.atomic():
+        if backtest.trades_blob is not None:
+            columns = backtest.trade_columns
+            new_columns = TradeColumns.from_trades(new_trades)
+            columns = TradeColumns(
+                {name: np.concatenate([columns[name], new_columns[name]]) for name in columns.columns}
+            )
+            backtest.trades_blob = columns.to_bytes()
+            trade_results = np.where(np.isnan(columns["result"]), None, columns["result"]).tolist()
+        else:
+            _create_trade_rows(backtest, new_trades)
+            trade_results = list(backtest.trades.order_by("entry_time", "id").values_list("result", flat=True))
+
+        results = [trade["result"] for trade in new_trades]
+        previous = backtest.result or {}
+        backtest.result = {
+            **previous,
+            "final_balance": final_balance,
+            "profit_loss": final_balance - float(backtest.initial_capital),
+            "total_trades": (previous.get("total_trades") or 0) + len(new_trades),
+            "total_wins": (previous.get("total_wins") or 0) + len([r for r in results if r and r > 0]),
+            "total_losses": (previous.get("total_losses") or 0) + len([r for r in results if r and r <= 0]),
+            "not_closed_trades": (previous.get("not_closed_trades") or 0) + len([r for r in results if r is None]),
+        }
+        backtest.end_date = calculate_start_and_end_dates(candles)[1]
+        backtest.candles_amount = (backtest.candles_amount or 0) + len(candles)
+        backtest.checkpoint = new_checkpoint
+        for name, value in get_backtest_summary(backtest.initial_capital, trade_results, final_balance).items():
+            setattr(backtest, name, value)
+
+        backtest.save(
+            update_fields=[
+                "result", "end_date", "candles_amount", "trades_blob", "checkpoint", *SUMMARY_FIELDS
+            ]
+        )
+
+    backtest.__dict__.pop("trade_columns", None)  # Decoded before the new trades were added
+    return backtest
+
+
+def _recompute_backtest(backtest: Backtest, strategy_engine: StrategyEngine) -> Backtest:
+    """
+    Run a saved backtest again over all the closed candles since its start date and replace its result, trades and checkpoint.
+    Used by refresh_backtest when the stored checkpoint can not be resumed.
+    """
+    candles = _get_closed_candles_since(backtest, backtest.start_date)
+    if not len(candles):
+        raise ValueError("No closed candles to backtest.")
+
+    initial_capital = float(backtest.initial_capital)
+    engine = BacktestEngine(strategy=strategy_engine, candles=candles, initial_balance=initial_capital)
+    final_balance, trades = engine.run(vectorized=True)
+    trades = [trade.get_json() for trade in trades]
+    results = [trade["result"] for trade in trades]
+
+    try:
+        checkpoint = engine.get_checkpoint().to_bytes()
+    except ValueError:
+        checkpoint = None  # Balance depleted, there is nothing to continue
+
+    with transaction.atomic():
+        if backtest.trades_blob is not None:
+            backtest.trades_blob = TradeColumns.from_trades(trades).to_bytes()
+        else:
+            backtest.trades.all().delete()
+            _create_trade_rows(backtest, trades)
+
+        backtest.result = {
+            **(backtest.result or {}),
+            "final_balance": final_balance,
+            "profit_loss": final_balance - initial_capital,
+            "total_trades": len(trades),
+            "total_wins": len([r for r in results if r and r > 0]),
+            "total_losses": len([r for r in results if r and r <= 0]),
+            "not_closed_trades": len([r for r in results if r is None]),
+        }
+        backtest.end_date = calculate_start_and_end_dates(candles)[1]
+        backtest.candles_amount = len(candles)
+        backtest.checkpoint = checkpoint
+        for name, value in get_backtest_summary(backtest.initial_capital, results, final_balance).items():
+            setattr(backtest, name, value)
+
+        backtest.save(
+            update_fields=[
+                "result", "end_date", "candles_amount", "trades_blob", "checkpoint", *SUMMARY_FIELDS
+            ]
+        )
+
+    backtest.__dict__.pop("trade_columns", None)
+    return backtest
+
+
+def _get_closed_candles_since(backtest: Backtest, start_date: datetime) -> CandleSeries:
+    """
+    Closed candles of the backtest's asset and timeframe from start_date until now.
+    """
+    from ccxt.base.errors import RequestTimeout
+
+    try:
+        candles = get_binance_ohlcv_and_timestamp_range(
+            backtest.asset.symbol,
+            backtest.timeframe,
+            start_date=start_date,
+            end_date=timezone.now(),
+            as_series=True,
+        )
+    except RequestTimeout as e:
+        raise RuntimeError("Market data timeout") from e
+
+    return _get_closed_candles(candles)
+
+
+def _get_closed_candles(candles: CandleSeries | None) -> CandleSeries:
+    """
+    Candles without the last one if it is not closed yet, its values would still change.
+    """
+    if candles is None:
+        return CandleSeries.empty()
+    if candles.close_time is None:
+        return candles
+
+    now = timezone.now().timestamp() * 1000
+    return candles[:np.searchsorted(candles.close_time, now, side="right")]
+
+
+def run_parameter_sweep(
+    user,
+    strategy: Strategy,
+    parameter_ranges: dict,
+    initial_balance: float = 1000,
+    token: str = "BTCUSDT",
+    timeframe: str = "1h",
+    candle_amount: int = 500,
+    rank_by: str = "profit_loss",
+    limit: int = 20,
+) -> dict:
+    """
+    Run the strategy with every combination of the given indicator parameter ranges and return the ranked results.
+    Candles are downloaded once and shared by all backtests.
+    """
+
+    _check_run_permission(user, strategy)
+
+    try:
+        initial_balance = float(initial_balance)
+        candle_amount = int(candle_amount)
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError(
+            "Initial balance must be a float, candle amount and limit must be integers."
+        )
+
+    from ccxt.base.errors import RequestTimeout
+
+    try:
+        candles = get_binance_ohlcv_and_timestamp(token, timeframe, candle_amount, as_series=True)
+    except RequestTimeout as e:
+        raise RuntimeError("Market data timeout") from e
+
+    sweep = ParameterSweep(
+        strategy_json=strategy.parameters,
+        parameter_ranges=parameter_ranges,
+        candles=candles,
+        initial_balance=initial_balance,
+    )
+    results = sweep.run(rank_by=rank_by)
+
+    start_date, end_date = calculate_start_and_end_dates(candles)
+
+    return {
+        "initial_balance": initial_balance,
+        "token": token,
+        "timeframe": timeframe,
+        "start_date": start_date,
+        "end_date": end_date,
+        "rank_by": rank_by,
+        "total_parameter_sets": len(results),
+        "results": results[:limit],
+    }
+
+
+def run_walk_forward(
+    user,
+    strategy: Strategy,
+    parameter_ranges: dict,
+    train_size: int,
+    test_size: int,
+    step: int = None,
+    initial_balance: float = 1000,
+    token: str = "BTCUSDT",
+    timeframe: str = "1h",
+    candle_amount: int = 500,
+    rank_by: str = "profit_loss",
+) -> dict:
+    """
+    Run a walk-forward analysis: optimize the parameters on every training window and test them on the following window.
+    Candles are downloaded once and the indicators computed once per parameter set for all windows.
+    """
+
+    _check_run_permission(user, strategy)
+
+    try:
+        initial_balance = float(initial_balance)
+        candle_amount = int(candle_amount)
+        train_size = int(train_size)
+        test_size = int(test_size)
+        step = int(step) if step is not None else None
+    except (TypeError, ValueError):
+        raise ValueError(
+            "Initial balance must be a float, candle amount, train size, test size and step must be integers."
+        )
+
+    from ccxt.base.errors import RequestTimeout
+
+    try:
+        candles = get_binance_ohlcv_and_timestamp(token, timeframe, candle_amount, as_series=True)
+    except RequestTimeout as e:
+        raise RuntimeError("Market data timeout") from e
+
+    walk_forward = WalkForward(
+        strategy_json=strategy.parameters,
+        parameter_ranges=parameter_ranges,
+        candles=candles,
+        train_size=train_size,
+        test_size=test_size,
+        step=step,
+        initial_balance=initial_balance,
+    )
+    result = walk_forward.run(rank_by=rank_by)
+
+    start_date, end_date = calculate_start_and_end_dates(candles)
+
+    return {
+        "initial_balance": initial_balance,
+        "token": token,
+        "timeframe": timeframe,
+        "start_date": start_date,
+        "end_date": end_date,
+        "rank_by": rank_by,
+        "train_size": train_size,
+        "test_size": test_size,
+        "step": walk_forward.step,
+        **result,
+    }
+
+
+def run_monte_carlo_backtest(
+    user,
+    strategy: Strategy,
+    trials: int = 100,
+    seed: int = None,
+    initial_balance: float = 1000,
+    token: str = "BTCUSDT",
+    timeframe: str = "1h",
+    candle_amount: int = 500,
+) -> dict:
+    """
+    Run the backtest {trials} times with independently seeded random choices and return the distribution of the results.
+    Candles are downloaded and signals computed once for all trials.
+    """
+
+    _check_run_permission(user, strategy)
+
+    try:
+        initial_balance = float(initial_balance)
+        candle_amount = int(candle_amount)
+        trials = int(trials)
+        seed = int(seed) if seed is not None else None
+    except ValueError:
+        raise ValueError(
+            "Initial balance must be a float, candle amount, trials and seed must be integers."
+        )
+
+    from ccxt.base.errors import RequestTimeout
+
+    try:
+        candles = get_binance_ohlcv_and_timestamp(token, timeframe, candle_amount, as_series=True)
+    except RequestTimeout as e:
+        raise RuntimeError("Market data timeout") from e
+
+    monte_carlo = MonteCarloBacktest(
+        strategy_json=strategy.parameters,
+        candles=candles,
+        initial_balance=initial_balance,
+        trials=trials,
+        seed=seed,
+    )
+    result = monte_carlo.run()
+
+    start_date, end_date = calculate_start_and_end_dates(candles)
+
+    return {
+        "initial_balance": initial_balance,
+        "token": token,
+        "timeframe": timeframe,
+        "start_date": start_date,
+        "end_date": end_date,
+        **result,
+    }
+
+
+def run_portfolio_backtest(
+    user,
+    strategy: Strategy,
+    tokens: list[str],
+    initial_balance: float = 1000,
+    timeframe: str = "1h",
+    candle_amount: int = 500,
+) -> dict:
+    """
+    Run the strategy on several assets at once with one shared balance.
+    Candles of the assets are downloaded one after another: the candle store is read and written on this thread only,
+    and the shared exchange client throttles its requests, which is not thread-safe (see range_downloader.py).
+    """
+
+    _check_run_permission(user, strategy)
+
+    if not isinstance(tokens, list) or not tokens:
+        raise ValueError("Tokens must be a non-empty list.")
+    if len(tokens) > PORTFOLIO_MAX_ASSETS:
+        raise ValueError(f"Too many tokens ({len(tokens)}). Maximum is {PORTFOLIO_MAX_ASSETS}.")
+
+    try:
+        initial_balance = float(initial_balance)
+        candle_amount = int(candle_amount)
+    except ValueError:
+        raise ValueError(
+            "Initial balance must be a float and candle amount must be an integer."
+        )
+
+    tokens = list(dict.fromkeys(tokens))
+    from ccxt.base.errors import RequestTimeout
+
+    try:
+        candles_by_token = {
+            token: get_binance_ohlcv_and_timestamp(token, timeframe, candle_amount, as_series=True) for token in tokens
+        }
+    except RequestTimeout as e:
+        raise RuntimeError("Market data timeout") from e
+
+    missing = [token for token, candles in candles_by_token.items() if not candles]
+    if missing:
+        raise ValueError(f"No market data for: {', '.join(missing)}")
+
+    portfolio = PortfolioBacktestEngine(
+        strategy=StrategyEngine._from_json(strategy.parameters),
+        candles_by_symbol=candles_by_token,
+        initial_balance=initial_balance,
+    )
+    final_balance, trades = portfolio.run()
+
+    results = [trade["result"] for trade in trades]
+    assets = {token: {"total_trades": 0, "profit_loss": 0.0} for token in tokens}
+    for trade in trades:
+        assets[trade["symbol"]]["total_trades"] += 1
+        assets[trade["symbol"]]["profit_loss"] += trade["result"] or 0.0
+
+    dates = [calculate_start_and_end_dates(candles) for candles in candles_by_token.values()]
+    start_date = min(start for start, _ in dates)
+    end_date = max(end for _, end in dates)
+
+    return {
+        "initial_balance": initial_balance,
+        "final_balance": final_balance,
+        "profit_loss": final_balance - initial_balance,
+        "tokens": tokens,
+        "timeframe": timeframe,
+        "start_date": start_date,
+        "end_date": end_date,
+        "total_trades": len(trades),
+        "total_wins": len([r for r in results if r and r > 0]),
+        "total_losses": len([r for r in results if r and r <= 0]),
+        "not_closed_trades": len([r for r in results if r is None]),
+        **get_backtest_summary(initial_balance, results, final_balance),
+        "assets": assets,
+        "trades": trades,
+    }
+
+
+def submit_backtest_job(
+    user,
+    strategy: Strategy,
+    initial_balance: float = 1000,
+    token: str = "BTCUSDT",
+    timeframe: str = "1h",
+    candle_amount: int = 500,
+    vectorized: bool = False,
+    intrabar: bool = False,
+) -> BacktestJob:
+    """
+    Queue a backtest to be run in the background by the run_backtest_worker command.
+    """
+
+    _check_run_permission(user, strategy)
+
+    try:
+        initial_balance = float(initial_balance)
+        candle_amount = int(candle_amount)
+    except ValueError:
+        raise ValueError(
+            "Initial balance must be a float and candle amount must be an integer."
+        )
+
+    return BacktestJob.objects.create(
+        user=user,
+        strategy=strategy,
+        parameters={
+            "initial_balance": initial_balance,
+            "token": token,
+            "timeframe": timeframe,
+            "candle_amount": candle_amount,
+            "vectorized": bool(vectorized),
+            "intrabar": bool(intrabar),
+        },
+    )
+
+
+def get_backtest_job(user, job_id: int) -> Optional[BacktestJob]:
+    if not user.is_authenticated:
+        return None
+
+    return BacktestJob.objects.filter(user=user, id=job_id).first()
+
+
+def cancel_backtest_job(user, job_id: int) -> Optional[BacktestJob]:
+    """
+    Cancel a queued job immediately, or ask the worker to stop a running one.
+    Finished jobs are left as they are.
+    """
+    if not user.is_authenticated:
+        return None
+
+    jobs = BacktestJob.objects.filter(user=user, id=job_id)
+
+    cancelled = jobs.filter(status=BacktestJob.Status.PENDING).update(
+        status=BacktestJob.Status.CANCELLED, finished_at=timezone.now()
+    )
+    if not cancelled:
+        jobs.filter(status=BacktestJob.Status.RUNNING).update(cancel_requested=True)
+
+    return jobs.first()
+
+
+def claim_next_backtest_job() -> Optional[BacktestJob]:
+    """
+    Take the oldest pending job, or a running job whose worker stopped sending heartbeats, and mark it as running.
+    Locked rows are skipped, so several workers can poll the queue at the same time.
+    """
+    now = timezone.now()
+    stale = Q(status=BacktestJob.Status.RUNNING) & (
+        Q(heartbeat_at__lt=now - JOB_LEASE_TIMEOUT)
+        | Q(heartbeat_at__isnull=True, started_at__lt=now - JOB_LEASE_TIMEOUT)
+    )
+
+    with transaction.atomic():
+        # Abandoned jobs the user asked to cancel are not run again
+        BacktestJob.objects.filter(stale, cancel_requested=True).update(
+            status=BacktestJob.Status.CANCELLED, finished_at=now
+        )
+
+        job = (
+            BacktestJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status=BacktestJob.Status.PENDING) | stale)
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = BacktestJob.Status.RUNNING
+        job.progress = 0
+        job.started_at = now
+        job.heartbeat_at = now
+        job.save(update_fields=["status", "progress", "started_at", "heartbeat_at"])
+
+    return job
+
+
+def execute_backtest_job(job: BacktestJob) -> None:
+    """
+    Run a claimed job, storing its progress while running and its result or error at the end.
+    Progress updates double as the heartbeat of the job. They are written at most every JOB_HEARTBEAT_INTERVAL seconds.
+    Before the first progress update (candle download, signal precompute) a timer thread keeps the heartbeat,
+    so a long run is not claimed again by another worker.
+    """
+    # started_at identifies this claim of the job. If the job was claimed again by another worker
+    # (after the lease expired), none of the updates below match and this run stops at the next progress update.
+    jobs = BacktestJob.objects.filter(id=job.id, started_at=job.started_at)
+    last_update = time.monotonic()
+
+    def on_progress(processed: int, total: int) -> None:
+        nonlocal last_update
+
+        if time.monotonic() - last_update < JOB_HEARTBEAT_INTERVAL:
+            return
+        last_update = time.monotonic()
+
+        # One query: no row is updated once a cancel is requested (or the job was claimed again)
+        updated = jobs.filter(cancel_requested=False).update(
+            progress=processed / total * 100 if total else 100, heartbeat_at=timezone.now()
+        )
+        if not updated:
+            raise BacktestCancelled()
+
+    stop_heartbeat = threading.Event()
+    heartbeat = threading.Thread(
+        target=_keep_job_heartbeat, args=(jobs, stop_heartbeat), name=f"backtest-job-{job.id}-heartbeat", daemon=True
+    )
+    heartbeat.start()
+
+    try:
+        result = run_backtest(
+            user=job.user,
+            strategy=job.strategy,
+            progress_callback=on_progress,
+            **job.parameters,
+        )
+    except BacktestCancelled:
+        jobs.update(status=BacktestJob.Status.CANCELLED, finished_at=timezone.now())
+    except Exception as err:
+        jobs.update(
+            status=BacktestJob.Status.FAILED,
+            error=str(err),
+            finished_at=timezone.now(),
+        )
+    else:
+        jobs.update(
+            status=BacktestJob.Status.COMPLETED,
+            progress=100,
+            result=result,
+            finished_at=timezone.now(),
+        )
+    finally:
+        stop_heartbeat.set()
+        heartbeat.join()
+
+
+def _keep_job_heartbeat(jobs, stop: threading.Event) -> None:
+    """
+    Update the heartbeat of a running job every JOB_IDLE_HEARTBEAT_INTERVAL seconds until stop is set,
+    or until the job is no longer running under this claim.
+    """
+    try:
+        while not stop.wait(JOB_IDLE_HEARTBEAT_INTERVAL):
+            if not jobs.filter(status=BacktestJob.Status.RUNNING).update(heartbeat_at=timezone.now()):
+                return
+    finally:
+        connection.close()  # Connection of this thread
+
+
+def _check_run_permission(user, strategy: Strategy) -> None:
+    if not strategy.creator is None:
+        if (
+            user.id != strategy.creator_id
+            and not user.is_staff
+            and not user.is_superuser
+        ):
+            raise PermissionDenied(
+                "User does not have permission to run this strategy."
+            )
+
+
 def get_backtest(user, id: int) -> Optional[Backtest]:
     if not user.is_authenticated:
         return None
@@ -97,14 +933,79 @@ def get_backtest(user, id: int) -> Optional[Backtest]:
         .first()
     )
 
-def get_available_backtests(user) -> dict:
+def get_available_backtests(user, order_by: str = "id", min_trades: int = None) -> dict:
+    """
+    Return the user's backtests without their trades, sorted and filtered by the summary columns in SQL.
+
+    Args:
+        user: User whose backtests are returned
+        order_by (str): One of BACKTEST_ORDERINGS, prefixed with '-' for descending order
+        min_trades (int): Only return backtests with at least this many trades
+    """
     if not user.is_authenticated:
         return None
 
-    return (
-        Backtest.objects
-        .select_related("asset", "strategy")
-        .prefetch_related("trades")
-        .filter(user=user)
-        .order_by("id")
-    )
\ No newline at end of file
+    if order_by.lstrip("-") not in BACKTEST_ORDERINGS:
+        raise ValueError(f"Invalid ordering '{order_by}'. Expected one of {BACKTEST_ORDERINGS}.")
+
+    backtests = Backtest.objects.select_related("asset", "strategy").defer("trades_blob", "checkpoint").filter(user=user)
+    if min_trades is not None:
+        backtests = backtests.filter(trade_count__gte=min_trades)
+
+    return backtests.order_by(order_by, "id")
+
+def get_user_backtests_page(
+    user, limit: int = BACKTESTS_PAGE_SIZE, cursor: int = None, include_trades: bool = True
+) -> tuple[list[Backtest], Optional[int]]:
+    """
+    Return one page of the user's backtests, newest first, using keyset pagination on the id.
+    The page takes one query for the backtests (with strategy and asset joined) and one for their trades,
+    no matter how many backtests or trades it contains.
+
+    Args:
+        user: User whose backtests are returned
+        limit (int): Page size, capped at MAX_BACKTESTS_PAGE_SIZE
+        cursor (int): next_cursor of the previous page, None for the first page
+        include_trades (bool): Whether to load the trades, skipping them saves the second query
+
+    Returns:
+        tuple[list[Backtest], Optional[int]]: Backtests of the page and the cursor of the next page (None on the last page)
+    """
+    limit = max(1, min(limit, MAX_BACKTESTS_PAGE_SIZE))
+
+    backtests = Backtest.objects.select_related("asset", "strategy").filter(user=user)
+    if cursor is not None:
+        backtests = backtests.filter(id__lt=cursor)
+    if include_trades:
+        backtests = backtests.prefetch_related(Prefetch("trades", queryset=Trade.objects.order_by("entry_time", "id")))
+    else:
+        backtests = backtests.defer("trades_blob", "checkpoint")
+
+    # One extra row tells whether there is a next page, without a COUNT query
+    page = list(backtests.order_by("-id")[: limit + 1])
+    next_cursor = page[limit - 1].id if len(page) > limit else None
+
+    return page[:limit], next_cursor
+
+
+def materialize_backtest_trades(backtest: Backtest) -> int:
+    """
+    Create Trade rows from the columnar trades of the backtest, e.g. to query or edit them in the admin.
+    The blob is kept, so the backtest is still loaded from it.
+
+    Returns:
+        int: Number of created rows, 0 if the backtest has no columnar trades or its rows already exist
+    """
+    columns = backtest.trade_columns
+    if columns is None or backtest.trades.exists():
+        return 0
+
+    trades = [
+        Trade(backtest=backtest, **{name: value for name, value in trade.items() if name != "id"})
+        for trade in columns.to_dicts()
+    ]
+
+    with transaction.atomic():
+        Trade.objects.bulk_create(trades, batch_size=1000)
+
+    return len(trades)
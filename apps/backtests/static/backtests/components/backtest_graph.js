@@ -99,12 +99,14 @@ export default class BacktestGraph {
         });
     }
 
-    // Fetch candles from the API based on the provided parameters
+    // Fetch candles from the API based on the provided parameters.
+    // Candles are requested as packed float64 columns, errors still come back as JSON.
     getCandles() {
         return fetch("/api/market/get-candles-in-range/" + this.token_id, {
             method: "POST",
             headers: {
                 "Content-Type": "application/json",
+                "Accept": "application/octet-stream",
                 "X-CSRFToken": this._getCsrfToken()
             },
             body: JSON.stringify({
@@ -113,15 +115,39 @@ export default class BacktestGraph {
                 end_date: this.end_date,
             })
         })
-        .then(response => response.json())
-        .then(data => {
-            if (data.status !== "success") {
-                throw new Error(data.message);
+        .then(response => {
+            if (response.headers.get("Content-Type") !== "application/octet-stream") {
+                return response.json().then(data => {
+                    throw new Error(data.message);
+                });
             }
-            this.candles = data.candles;
+            return response.arrayBuffer();
+        })
+        .then(buffer => {
+            this.candles = this._decodeCandles(buffer);
         });
     }
 
+    // Decode column-major little-endian float64 candles (open_time, open, high, low, close, volume)
+    _decodeCandles(buffer) {
+        const count = buffer.byteLength / 8 / 6;
+        const column = i => new Float64Array(buffer, i * count * 8, count);  // browsers are little-endian
+        const [openTime, open, high, low, close, volume] = [0, 1, 2, 3, 4, 5].map(column);
+
+        const candles = new Array(count);
+        for (let i = 0; i < count; i++) {
+            candles[i] = {
+                open_time: openTime[i],
+                open: open[i],
+                high: high[i],
+                low: low[i],
+                close: close[i],
+                volume: volume[i],
+            };
+        }
+        return candles;
+    }
+
     // Handle chart resizing. 
     // LightweightCharts doesn't automatically resize, so we need to listen 
     // for changes in the container size and update the chart accordingly.
@@ -1,3 +1,1056 @@
-from django.test import TestCase
+import copy
+import json
+import math
+import random
+import threading
+import time
+import zlib
 
-# Create your tests here.
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.urls import reverse
+from django.utils import timezone as django_timezone
+
+from apps.backtests.models import Asset, Backtest, BacktestJob, Trade
+from apps.backtests.services import services
+from apps.backtests.services.backtest_cache import CACHE_ALIAS, get_last_closed_open_time
+from apps.backtests.serializers import serialize_backtest
+from apps.backtests.services.backtest.backtest_engine import BacktestEngine
+from apps.backtests.services.backtest import parameter_sweep
+from apps.backtests.services.backtest import checkpoint as checkpoint_module
+from apps.backtests.services.backtest.checkpoint import BacktestCheckpoint
+from apps.backtests.services.backtest.intrabar import IntrabarResolver
+from apps.backtests.services.backtest.monte_carlo import MonteCarloBacktest
+from apps.backtests.services.backtest.portfolio import PortfolioBacktestEngine, PriceMatrix
+from apps.backtests.services.backtest.parameter_sweep import (
+    ParameterSweep,
+    attach_candles,
+    get_result_metrics,
+    share_candles,
+)
+from apps.backtests.services.backtest.summary import SUMMARY_FIELDS, get_backtest_summary
+from apps.backtests.services.backtest.trade_engine import TradeEngine
+from apps.backtests.services.backtest.walk_forward import WalkForward
+from apps.backtests.services.services import get_user_backtests_page
+from apps.backtests.trade_columns import TradeColumns
+from apps.market import services as market_services
+from apps.market.candle_series import CandleSeries
+from apps.market.market_metadata import SymbolIndex
+from apps.strategies.models import Strategy
+from apps.strategies.services.core.strategy_engine import StrategyEngine
+from apps.strategies.services.core.trade_risk_model import TradeRiskModel
+
+FIXED_RISK_MODEL = {
+    "stop_loss": {"type": "fixed", "percentage": 1},
+    "take_profit": {"type": "fixed", "percentage": 1.5},
+    "position_size": {"type": "relative", "percentage": 10},
+}
+ATR_RISK_MODEL = {
+    "stop_loss": {"type": "relative", "percentage": 1.5},
+    "take_profit": {"type": "relative", "percentage": 2},
+    "position_size": {"type": "fixed", "percentage": 5},
+}
+
+
+def get_candles(amount: int, seed: int = 0) -> list[dict]:
+    """
+    Random walk of hourly candles, as returned by get_binance_ohlcv_and_timestamp.
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    candles = []
+    price = 100.0
+    for i in range(amount):
+        close = price * math.exp(rng.gauss(0, 0.01))
+        candles.append(
+            {
+                "open_time": start + timedelta(hours=i),
+                "close_time": start + timedelta(hours=i + 1),
+                "open": price,
+                "high": max(price, close) * (1 + abs(rng.gauss(0, 0.004))),
+                "low": min(price, close) * (1 - abs(rng.gauss(0, 0.004))),
+                "close": close,
+                "volume": rng.random() * 100,
+            }
+        )
+        price = close
+    return candles
+
+
+def get_strategy_json(indicators: list[dict], risk_model: dict = FIXED_RISK_MODEL) -> list:
+    return [
+        {
+            "signal_models": {"indicators": indicators, "prediction_models": []},
+            "action": {"buy_signal": risk_model, "sell_signal": risk_model},
+        }
+    ]
+
+
+def patch_symbol_index(test_case: TestCase, markets: dict = None) -> None:
+    """
+    Serve the symbol index of format_coin_symbol from the given markets, instead of the exchange market metadata.
+    """
+    symbol_index = SymbolIndex(markets or {"BTC/USDT": {"id": "BTCUSDT", "spot": True}})
+    metadata = mock.Mock(get_symbol_index=mock.Mock(return_value=symbol_index))
+    patcher = mock.patch.object(market_services, "get_market_metadata", return_value=metadata)
+    patcher.start()
+    test_case.addCleanup(patcher.stop)
+
+
+class UserBacktestsPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="trader", email="trader@example.com", password="password")
+        other_user = get_user_model().objects.create_user(username="other", email="other@example.com", password="password")
+        asset = Asset.objects.create(symbol="BTCUSDT", name="Bitcoin")
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+        for i in range(7):
+            strategy = Strategy.objects.create(name=f"Strategy {i}", creator=cls.user)
+            for user in (cls.user, other_user):
+                backtest = Backtest.objects.create(
+                    user=user,
+                    strategy=strategy,
+                    asset=asset,
+                    timeframe="1h",
+                    start_date=start,
+                    initial_capital=1000,
+                    result={"profit_loss": i},
+                )
+                Trade.objects.bulk_create(
+                    Trade(
+                        backtest=backtest,
+                        trade_type="buy",
+                        entry_time=start + timedelta(hours=j),
+                        entry_price=100,
+                        quantity=1,
+                    )
+                    for j in range(i + 1)
+                )
+
+    def _serialize_page(self, **kwargs):
+        backtests, next_cursor = get_user_backtests_page(self.user, **kwargs)
+        include_trades = kwargs.get("include_trades", True)
+        return [serialize_backtest(b, include_trades=include_trades) for b in backtests], next_cursor
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        for limit in (1, 3, 10):
+            with self.assertNumQueries(2):
+                self._serialize_page(limit=limit)
+
+    def test_without_trades_takes_one_query(self):
+        with self.assertNumQueries(1):
+            data, _ = self._serialize_page(limit=10, include_trades=False)
+
+        self.assertNotIn("trades", data[0])
+
+    def test_cursor_walks_all_backtests_newest_first(self):
+        ids = []
+        cursor = None
+        while True:
+            data, cursor = self._serialize_page(limit=3, cursor=cursor)
+            ids.extend(b["id"] for b in data)
+            if cursor is None:
+                break
+
+        expected = list(Backtest.objects.filter(user=self.user).order_by("-id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_trades_are_serialized(self):
+        data, _ = self._serialize_page(limit=1)
+
+        self.assertEqual(len(data[0]["trades"]), 7)
+        self.assertEqual(data[0]["trades"][0]["entry_price"], 100.0)
+
+
+class BacktestSummaryTests(TestCase):
+    def test_summary_of_trades(self):
+        summary = get_backtest_summary(1000, [100, -220, 20, None])
+
+        self.assertAlmostEqual(summary["return_pct"], -10)
+        self.assertAlmostEqual(summary["max_drawdown_pct"], 20)
+        self.assertAlmostEqual(summary["win_rate"], 50)
+        self.assertEqual(summary["trade_count"], 4)
+        self.assertIsNotNone(summary["sharpe_ratio"])
+
+    def test_summary_without_trades(self):
+        summary = get_backtest_summary(1000, [], final_balance=1000)
+
+        self.assertEqual(summary["return_pct"], 0)
+        self.assertEqual(summary["max_drawdown_pct"], 0)
+        self.assertIsNone(summary["win_rate"])
+        self.assertIsNone(summary["sharpe_ratio"])
+        self.assertEqual(summary["trade_count"], 0)
+
+
+class TradeColumnsTests(TestCase):
+    def test_blob_round_trip(self):
+        trades = [
+            {
+                "entry_time": "2024-01-01T00:00:00+00:00",
+                "exit_time": "2024-01-01T05:00:00+00:00",
+                "entry_price": 100.0,
+                "exit_price": 110.0,
+                "quantity": 2.0,
+                "trade_type": 1,
+                "stop_loss": 95.0,
+                "take_profit": 110.0,
+                "status": 0,
+                "result": 0.2,
+            },
+            {
+                "entry_time": "2024-01-01T06:00:00+00:00",
+                "exit_time": None,
+                "entry_price": 108.0,
+                "exit_price": None,
+                "quantity": 1.5,
+                "trade_type": 0,
+                "stop_loss": 112.0,
+                "take_profit": 100.0,
+                "status": 1,
+                "result": None,
+            },
+        ]
+
+        decoded = TradeColumns.from_bytes(TradeColumns.from_trades(trades).to_bytes()).to_dicts()
+
+        self.assertEqual(len(decoded), 2)
+        for original, trade in zip(trades, decoded):
+            self.assertEqual(trade["trade_type"], str(original["trade_type"]))
+            self.assertEqual(trade["status"], str(original["status"]))
+            for name in ("entry_time", "exit_time", "entry_price", "exit_price", "quantity", "result"):
+                self.assertEqual(trade[name], original[name])
+
+
+class BacktestCheckpointTests(TestCase):
+    STRATEGY = [
+        {
+            "signal_models": {
+                "indicators": [{"name": "SMA", "parameters": {"short_window": 5, "long_window": 20}}],
+                "prediction_models": [],
+            },
+            "action": {
+                "buy_signal": {
+                    "stop_loss": {"type": "fixed", "percentage": 1},
+                    "take_profit": {"type": "fixed", "percentage": 1.5},
+                    "position_size": {"type": "relative", "percentage": 10},
+                },
+            },
+        }
+    ]
+
+    def _get_candles(self, amount):
+        start = int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+        close = [100 + 5 * math.sin(i / 15) + math.sin(i * 1.7) for i in range(amount)]
+        return CandleSeries(
+            [start + i * 3_600_000 for i in range(amount)],
+            [close[i - 1] if i else close[0] for i in range(amount)],
+            [c * 1.006 for c in close],
+            [c * 0.994 for c in close],
+            close,
+            [1.0] * amount,
+            timeframe_ms=3_600_000,
+        )
+
+    def test_resumed_run_equals_full_run(self):
+        candles = self._get_candles(600)
+
+        final_balance, trades = BacktestEngine(
+            StrategyEngine._from_json(self.STRATEGY), candles=candles, rng=random.Random(1)
+        ).run(vectorized=True)
+
+        rng = random.Random(1)
+        first = BacktestEngine(StrategyEngine._from_json(self.STRATEGY), candles=candles[:400], rng=rng)
+        _, first_trades = first.run(vectorized=True)
+        strategy = StrategyEngine._from_json(self.STRATEGY)
+        checkpoint = BacktestCheckpoint.from_bytes(first.get_checkpoint().to_bytes(), strategy)
+
+        resumed_balance, new_trades = BacktestEngine(
+            strategy, candles=candles[400:], rng=rng, resume_from=checkpoint
+        ).run()
+
+        self.assertGreater(len(new_trades), 0)
+        self.assertAlmostEqual(resumed_balance, final_balance)
+        self.assertEqual(
+            [trade.get_json() for trade in first_trades + new_trades], [trade.get_json() for trade in trades]
+        )
+
+    def test_checkpoint_is_plain_versioned_state(self):
+        engine = BacktestEngine(StrategyEngine._from_json(self.STRATEGY), candles=self._get_candles(300))
+        engine.run(vectorized=True)
+        blob = engine.get_checkpoint().to_bytes()
+
+        data = zlib.decompress(blob)
+        self.assertEqual(checkpoint_module.HEADER.unpack_from(data), (checkpoint_module.MAGIC, checkpoint_module.VERSION))
+        state = json.loads(data[checkpoint_module.HEADER.size:])
+        self.assertEqual(len(state["candles"]["close"]), checkpoint_module.CANDLES)
+        self.assertEqual(state["stream"]["candles_amount"], 300)
+
+        old_version = zlib.compress(
+            checkpoint_module.HEADER.pack(checkpoint_module.MAGIC, 1) + data[checkpoint_module.HEADER.size:]
+        )
+        with self.assertRaises(ValueError):
+            BacktestCheckpoint.from_bytes(old_version, StrategyEngine._from_json(self.STRATEGY))
+
+        other_strategy = copy.deepcopy(self.STRATEGY)
+        other_strategy[0]["action"]["buy_signal"]["take_profit"]["percentage"] = 2
+        with self.assertRaises(ValueError):
+            BacktestCheckpoint.from_bytes(blob, StrategyEngine._from_json(other_strategy))
+
+    def test_refreshed_backtest_equals_a_full_run(self):
+        patch_symbol_index(self)
+        user = get_user_model().objects.create_user(username="trader", email="trader@example.com", password="password")
+        strategy = Strategy.objects.create(name="SMA", parameters=self.STRATEGY, creator=user)
+        candles = self._get_candles(600)
+
+        def get_range(token, timeframe, start_date, end_date, as_series):
+            # Exchange answers with a few candles before the start date too, they are skipped
+            start = int(np.searchsorted(candles.open_time, start_date.timestamp() * 1000))
+            return candles[start - 3:]
+
+        def get_trades(backtest):
+            return [
+                (trade["entry_time"], trade["exit_time"], round(trade["result"], 6) if trade["result"] is not None else None)
+                for trade in serialize_backtest(backtest)["trades"]
+            ]
+
+        for trade_blob_min_trades in (100000, 1):
+            with (
+                self.subTest(trades_blob=trade_blob_min_trades == 1),
+                override_settings(BACKTEST_TRADE_BLOB_MIN_TRADES=trade_blob_min_trades),
+                mock.patch.object(services, "format_coin_symbol", return_value="BTC/USDT"),
+                mock.patch.object(services, "get_binance_ohlcv_and_timestamp_range", get_range),
+            ):
+                random.seed(3)
+                with mock.patch.object(services, "get_binance_ohlcv_and_timestamp", return_value=candles):
+                    full = Backtest.objects.get(
+                        id=services.run_backtest(user, strategy, candle_amount=600, vectorized=True, save=True)["backtest_id"]
+                    )
+
+                random.seed(3)
+                with mock.patch.object(services, "get_binance_ohlcv_and_timestamp", return_value=candles[:350]):
+                    saved = services.run_backtest(user, strategy, candle_amount=350, vectorized=True, save=True)
+                refreshed = services.refresh_backtest(user, saved["backtest_id"])
+                refreshed = Backtest.objects.get(id=refreshed.id)
+
+                self.assertEqual(refreshed.trades_blob is not None, trade_blob_min_trades == 1)
+                self.assertGreater(len(get_trades(refreshed)), saved["total_trades"])
+                self.assertEqual(get_trades(refreshed), get_trades(full))
+                self.assertEqual(refreshed.candles_amount, 600)
+                self.assertEqual(refreshed.end_date, full.end_date)
+                self.assertEqual(refreshed.result.keys(), full.result.keys())
+                for name, value in full.result.items():
+                    self.assertAlmostEqual(refreshed.result[name], value, places=6)
+                for name in SUMMARY_FIELDS:
+                    self.assertAlmostEqual(getattr(refreshed, name), getattr(full, name), places=6)
+
+    def test_refresh_recomputes_an_unsupported_checkpoint(self):
+        user = get_user_model().objects.create_user(username="trader", email="trader@example.com", password="password")
+        strategy = Strategy.objects.create(name="SMA", parameters=self.STRATEGY, creator=user)
+        candles = self._get_candles(600)
+        backtest = Backtest.objects.create(
+            user=user,
+            strategy=strategy,
+            asset=Asset.objects.create(symbol="BTC", name="BTC"),
+            timeframe="1h",
+            start_date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            end_date=datetime(2024, 1, 10, tzinfo=timezone.utc),
+            initial_capital=1000,
+            candles_amount=200,
+            result={"final_balance": 1000, "total_trades": 0},
+            checkpoint=zlib.compress(checkpoint_module.HEADER.pack(checkpoint_module.MAGIC, 1) + b"old"),
+        )
+
+        random.seed(2)
+        final_balance, trades = BacktestEngine(StrategyEngine._from_json(self.STRATEGY), candles=candles).run(vectorized=True)
+
+        random.seed(2)
+        with mock.patch.object(services, "get_binance_ohlcv_and_timestamp_range", return_value=candles):
+            services.refresh_backtest(user, backtest.id)
+
+        backtest.refresh_from_db()
+        self.assertEqual(backtest.candles_amount, 600)
+        self.assertAlmostEqual(backtest.result["final_balance"], final_balance)
+        self.assertEqual(backtest.result["total_trades"], len(trades))
+        self.assertEqual(backtest.trades.count(), len(trades))
+        # Stored again in the current version, so the next refresh resumes it
+        BacktestCheckpoint.from_bytes(backtest.checkpoint, StrategyEngine._from_json(self.STRATEGY))
+
+
+class BacktestEngineModesTests(TestCase):
+    STRATEGIES = [
+        get_strategy_json([{"name": "SMA", "parameters": {"short_window": 5, "long_window": 20}}]),
+        get_strategy_json([{"name": "RSI", "parameters": {"period": 14, "oversold": 40, "overbought": 60}}], ATR_RISK_MODEL),
+        get_strategy_json(
+            [
+                {"name": "SMA", "parameters": {"short_window": 5, "long_window": 20}},
+                {"name": "RSI", "parameters": {"period": 7, "oversold": 45, "overbought": 55}},
+            ],
+            ATR_RISK_MODEL,
+        ),
+    ]
+
+    def _run(self, strategy_json, candles, vectorized, seed):
+        backtest = BacktestEngine(
+            StrategyEngine._from_json(strategy_json), candles=candles, rng=random.Random(seed)
+        )
+        final_balance, trades = backtest.run(vectorized=vectorized)
+        return final_balance, [trade.get_json() for trade in trades]
+
+    def test_vectorized_run_equals_loop_run(self):
+        for seed in range(3):
+            candles = get_candles(250, seed=seed)
+            for strategy_json in self.STRATEGIES:
+                with self.subTest(seed=seed, strategy=strategy_json[0]["signal_models"]["indicators"]):
+                    expected = self._run(strategy_json, candles, False, seed)
+                    self.assertGreater(len(expected[1]), 0)
+                    self.assertEqual(self._run(strategy_json, candles, True, seed), expected)
+                    self.assertEqual(
+                        self._run(strategy_json, CandleSeries.from_candles(candles), True, seed), expected
+                    )
+
+
+class SharedCandlesTests(TestCase):
+    def test_attached_candles_view_the_segment(self):
+        candles = CandleSeries.from_candles(get_candles(100))
+        shm = share_candles(candles)
+        try:
+            worker_shm, shared = attach_candles(shm.name, len(candles), candles.timeframe_ms)
+
+            for name in parameter_sweep.CANDLE_COLUMNS:
+                column = getattr(shared, name)
+                self.assertEqual(column.tolist(), getattr(candles, name).tolist())
+                self.assertFalse(column.flags.owndata)
+                self.assertFalse(column.flags.writeable)
+            self.assertEqual(shared.timeframe_ms, candles.timeframe_ms)
+
+            # Not a copy, a change of the segment is seen by the attached candles
+            parameter_sweep._get_column_views(shm, len(candles))[4][0] = 123.0
+            self.assertEqual(shared.close[0], 123.0)
+
+            del shared, column
+            worker_shm.close()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_worker_keeps_the_segment_open(self):
+        candles = CandleSeries.from_candles(get_candles(100))
+        shm = share_candles(candles)
+        try:
+            parameter_sweep._init_worker(shm.name, len(candles), candles.timeframe_ms, 1000)
+            self.addCleanup(setattr, parameter_sweep, "_worker_candles", None)
+            self.addCleanup(setattr, parameter_sweep, "_worker_shm", None)
+
+            self.assertEqual(parameter_sweep._worker_shm.name, shm.name)
+            self.assertEqual(parameter_sweep._worker_candles.close.tolist(), candles.close.tolist())
+            self.assertIsNotNone(
+                parameter_sweep._run_parameter_set(
+                    ({"SMA": {"short_window": 5, "long_window": 20}}, BacktestEngineModesTests.STRATEGIES[0])
+                )
+            )
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_sweep_in_worker_processes(self):
+        sweep = ParameterSweep(
+            BacktestEngineModesTests.STRATEGIES[0],
+            {
+                "indicators": [
+                    {
+                        "name": "SMA",
+                        "parameters": [
+                            {"name": "short_window", "values": [5, 10]},
+                            {"name": "long_window", "values": [20, 30]},
+                        ],
+                    }
+                ]
+            },
+            get_candles(250),
+            max_workers=2,
+        )
+
+        results = sweep.run()
+
+        self.assertEqual(
+            sorted((r["parameters"]["SMA"]["short_window"], r["parameters"]["SMA"]["long_window"]) for r in results),
+            [(5, 20), (5, 30), (10, 20), (10, 30)],
+        )
+
+
+class ParameterSweepViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="trader", email="trader@example.com", password="password")
+        cls.strategy = Strategy.objects.create(
+            name="SMA", parameters=BacktestEngineModesTests.STRATEGIES[0], creator=cls.user
+        )
+
+    def _post(self, parameter: dict):
+        self.client.force_login(self.user)
+        payload = {
+            "strategy_id": self.strategy.id,
+            "parameter_ranges": {"indicators": [{"name": "SMA", "parameters": [parameter]}]},
+        }
+        with mock.patch.object(
+            services, "get_binance_ohlcv_and_timestamp", return_value=CandleSeries.from_candles(get_candles(100))
+        ):
+            return self.client.post(reverse("optimize_backtest"), json.dumps(payload), content_type="application/json")
+
+    def test_non_numeric_range_is_rejected(self):
+        for parameter in (
+            {"name": "short_window", "min": 5, "max": 20, "step": "5"},
+            {"name": "short_window", "min": "a", "max": 20},
+            {"name": "short_window", "min": 5, "max": None},
+            {"name": "short_window", "min": 5, "max": 20, "step": True},
+            {"name": "short_window", "values": 5},
+        ):
+            with self.subTest(parameter=parameter):
+                response = self._post(parameter)
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["status"], "error")
+
+
+class BacktestJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="trader", email="trader@example.com", password="password")
+        cls.strategy = Strategy.objects.create(
+            name="SMA", parameters=BacktestEngineModesTests.STRATEGIES[0], creator=cls.user
+        )
+
+    def setUp(self):
+        candles = CandleSeries.from_candles(get_candles(800))
+        patcher = mock.patch.object(services, "get_binance_ohlcv_and_timestamp", return_value=candles)
+        self.get_candles = patcher.start()
+        self.addCleanup(patcher.stop)
+        patch_symbol_index(self)
+
+    def _submit(self, **parameters) -> BacktestJob:
+        return services.submit_backtest_job(self.user, self.strategy, candle_amount=800, **parameters)
+
+    def test_claim_takes_the_oldest_pending_job(self):
+        first, second = self._submit(), self._submit()
+
+        claimed = services.claim_next_backtest_job()
+
+        self.assertEqual(claimed.id, first.id)
+        self.assertEqual(claimed.status, BacktestJob.Status.RUNNING)
+        self.assertIsNotNone(claimed.heartbeat_at)
+        self.assertEqual(services.claim_next_backtest_job().id, second.id)
+        self.assertIsNone(services.claim_next_backtest_job())
+
+    def test_stale_running_job_is_claimed_again(self):
+        job = self._submit()
+        services.claim_next_backtest_job()
+        self.assertIsNone(services.claim_next_backtest_job())
+
+        BacktestJob.objects.filter(id=job.id).update(
+            heartbeat_at=django_timezone.now() - services.JOB_LEASE_TIMEOUT - timedelta(seconds=1)
+        )
+
+        self.assertEqual(services.claim_next_backtest_job().id, job.id)
+
+    def test_stale_job_with_cancel_request_is_cancelled(self):
+        job = self._submit()
+        services.claim_next_backtest_job()
+        BacktestJob.objects.filter(id=job.id).update(
+            cancel_requested=True,
+            heartbeat_at=django_timezone.now() - services.JOB_LEASE_TIMEOUT - timedelta(seconds=1),
+        )
+
+        self.assertIsNone(services.claim_next_backtest_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, BacktestJob.Status.CANCELLED)
+
+    def test_completed_job_stores_its_result(self):
+        job = self._submit()
+        services.execute_backtest_job(services.claim_next_backtest_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BacktestJob.Status.COMPLETED)
+        self.assertEqual(job.progress, 100)
+        self.assertGreater(job.result["total_trades"], 0)
+
+    def test_cancel_request_stops_the_running_job(self):
+        job = self._submit()
+        claimed = services.claim_next_backtest_job()
+        services.cancel_backtest_job(self.user, job.id)
+
+        with mock.patch.object(services, "JOB_HEARTBEAT_INTERVAL", 0):
+            services.execute_backtest_job(claimed)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BacktestJob.Status.CANCELLED)
+        self.assertIsNone(job.result)
+
+    def test_progress_is_throttled(self):
+        self._submit()
+        claimed = services.claim_next_backtest_job()
+
+        with self.assertNumQueries(4):  # Loading the job user and strategy, and the final update, no progress updates
+            services.execute_backtest_job(claimed)
+
+    def test_failed_job_stores_the_error(self):
+        job = self._submit()
+        self.get_candles.side_effect = ValueError("No market data")
+
+        services.execute_backtest_job(services.claim_next_backtest_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BacktestJob.Status.FAILED)
+        self.assertEqual(job.error, "No market data")
+
+    def test_job_claimed_again_is_not_overwritten_by_the_old_worker(self):
+        job = self._submit()
+        claimed = services.claim_next_backtest_job()
+        BacktestJob.objects.filter(id=job.id).update(started_at=claimed.started_at + timedelta(minutes=11))
+
+        services.execute_backtest_job(claimed)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BacktestJob.Status.RUNNING)
+        self.assertIsNone(job.result)
+
+
+class BacktestJobQueueTests(TransactionTestCase):
+    @skipUnlessDBFeature("has_select_for_update_skip_locked")
+    def test_claim_skips_locked_jobs(self):
+        user = get_user_model().objects.create_user(username="trader", email="trader@example.com", password="password")
+        strategy = Strategy.objects.create(name="SMA", parameters=BacktestEngineModesTests.STRATEGIES[0], creator=user)
+        first = services.submit_backtest_job(user, strategy)
+        second = services.submit_backtest_job(user, strategy)
+
+        locked, release = threading.Event(), threading.Event()
+
+        def lock_first_job():
+            # Another worker in the middle of claiming the first job
+            try:
+                with transaction.atomic():
+                    BacktestJob.objects.select_for_update().get(id=first.id)
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=lock_first_job)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            self.assertEqual(services.claim_next_backtest_job().id, second.id)
+        finally:
+            release.set()
+            thread.join()
+
+    def test_heartbeat_is_kept_before_the_first_progress_update(self):
+        user = get_user_model().objects.create_user(username="trader", email="trader@example.com", password="password")
+        strategy = Strategy.objects.create(name="SMA", parameters=BacktestEngineModesTests.STRATEGIES[0], creator=user)
+        services.submit_backtest_job(user, strategy)
+        job = services.claim_next_backtest_job()
+        claimed_heartbeat = job.heartbeat_at
+
+        def download_candles(**kwargs):
+            # Long download without progress updates, until the heartbeat is renewed
+            for _ in range(200):
+                if BacktestJob.objects.get(id=job.id).heartbeat_at > claimed_heartbeat:
+                    return {"final_balance": 1000}
+                time.sleep(0.01)
+            raise AssertionError("No heartbeat while downloading")
+
+        with (
+            mock.patch.object(services, "JOB_IDLE_HEARTBEAT_INTERVAL", 0.05),
+            mock.patch.object(services, "run_backtest", download_candles),
+        ):
+            services.execute_backtest_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BacktestJob.Status.COMPLETED)
+        self.assertGreater(job.heartbeat_at, claimed_heartbeat)
+
+
+class BacktestCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="trader", email="trader@example.com", password="password")
+        cls.strategy = Strategy.objects.create(
+            name="SMA", parameters=BacktestEngineModesTests.STRATEGIES[0], creator=cls.user
+        )
+
+    def setUp(self):
+        # 300 hourly candles up to the one still open now
+        last_open_time = get_last_closed_open_time("1h") + 3600 * 1000
+        candles = CandleSeries.from_candles(get_candles(300))
+        candles.open_time = candles.open_time - candles.open_time[-1] + last_open_time
+        patcher = mock.patch.object(services, "get_binance_ohlcv_and_timestamp", return_value=candles)
+        self.get_candles = patcher.start()
+        self.addCleanup(patcher.stop)
+        patch_symbol_index(self)
+        self.addCleanup(caches[CACHE_ALIAS].clear)
+
+    def test_cached_result_is_served_without_downloading(self):
+        result = services.run_backtest(self.user, self.strategy, candle_amount=200)
+        self.assertEqual(self.get_candles.call_count, 1)
+
+        self.assertEqual(services.run_backtest(self.user, self.strategy, candle_amount=200), result)
+        self.assertEqual(self.get_candles.call_count, 1)
+
+    def test_open_candle_is_left_out(self):
+        result = services.run_backtest(self.user, self.strategy, candle_amount=200)
+
+        self.get_candles.assert_called_once_with("BTCUSDT", "1h", 201, as_series=True)
+        self.assertEqual(result["candles_amount"], 200)
+        self.assertEqual(
+            result["end_date"],
+            datetime.fromtimestamp(get_last_closed_open_time("1h") / 1000 + 3600, tz=timezone.utc),
+        )
+
+    def test_other_parameters_are_not_served_from_the_cache(self):
+        services.run_backtest(self.user, self.strategy, candle_amount=200)
+        services.run_backtest(self.user, self.strategy, candle_amount=100)
+        services.run_backtest(self.user, self.strategy, candle_amount=200, initial_balance=500)
+
+        self.assertEqual(self.get_candles.call_count, 3)
+
+    def test_token_spellings_share_one_entry(self):
+        result = services.run_backtest(self.user, self.strategy, token="BTCUSDT", candle_amount=200)
+
+        for token in ("btcusdt", "BTC/USDT", "BTC"):
+            with self.subTest(token=token):
+                self.assertEqual(services.run_backtest(self.user, self.strategy, token=token, candle_amount=200), result)
+        self.assertEqual(self.get_candles.call_count, 1)
+
+
+class IntrabarResolverTests(TestCase):
+    HOUR = 3600 * 1000
+    MINUTE = 60 * 1000
+
+    def _get_trade(self, resolver) -> TradeEngine:
+        # Buy at 100 with stop-loss at 99 and take-profit at 101
+        return TradeEngine({"open": 100.0, "open_time": 0}, 1, 1, 100, intrabar_resolver=resolver)
+
+    def _get_minute_candles(self, since: int, lows_and_highs: list) -> CandleSeries:
+        return CandleSeries(
+            [since + i * self.MINUTE for i in range(len(lows_and_highs))],
+            [100.0] * len(lows_and_highs),
+            [high for _, high in lows_and_highs],
+            [low for low, _ in lows_and_highs],
+            [100.0] * len(lows_and_highs),
+            [1.0] * len(lows_and_highs),
+            timeframe_ms=self.MINUTE,
+        )
+
+    def test_first_hit_level_is_returned(self):
+        for lows_and_highs, stop_loss_first in (([(99.5, 100.5), (98.5, 100)], True), ([(99.5, 101.5), (98.5, 100)], False)):
+            with self.subTest(stop_loss_first=stop_loss_first):
+                resolver = IntrabarResolver(
+                    "BTCUSDT", "1h", fetch_candles=lambda since, limit: self._get_minute_candles(since, lows_and_highs)
+                )
+                candle = {"open_time": self.HOUR, "low": 98.5, "high": 101.5}
+
+                self.assertEqual(resolver.is_stop_loss_first(candle, self._get_trade(resolver)), stop_loss_first)
+
+    def test_fetch_error_falls_back_to_the_random_choice(self):
+        from ccxt.base.errors import NetworkError
+
+        requests = []
+
+        def fetch_candles(since, limit):
+            requests.append(since)
+            raise NetworkError("Connection reset")
+
+        resolver = IntrabarResolver("BTCUSDT", "1h", fetch_candles=fetch_candles)
+        trade = self._get_trade(resolver)
+
+        with self.assertLogs("apps.backtests.services.backtest.intrabar", "WARNING"):
+            self.assertIsNone(resolver.is_stop_loss_first({"open_time": self.HOUR, "low": 98, "high": 102}, trade))
+        # Following candle of the same batch does not ask the exchange again
+        self.assertIsNone(resolver.is_stop_loss_first({"open_time": 2 * self.HOUR, "low": 98, "high": 102}, trade))
+        self.assertEqual(requests, [self.HOUR])
+
+        trade.update({"open_time": 3 * self.HOUR, "low": 98, "high": 102})
+        self.assertFalse(trade.status)
+        self.assertIn(trade.exit_price, (trade.stop_loss, trade.take_profit))
+
+
+class MonteCarloBacktestTests(TestCase):
+    @staticmethod
+    def _get_candles() -> list[dict]:
+        # Wide candles, many of them hit both the stop-loss and the take-profit of a trade
+        candles = get_candles(300)
+        for candle in candles:
+            candle["high"] *= 1.02
+            candle["low"] *= 0.98
+        return candles
+
+    def _run(self, seed: int, max_workers: int) -> dict:
+        return MonteCarloBacktest(
+            BacktestEngineModesTests.STRATEGIES[0], self._get_candles(), trials=20, seed=seed, max_workers=max_workers
+        ).run()
+
+    def test_same_seed_gives_the_same_distribution(self):
+        result = self._run(7, max_workers=2)
+
+        self.assertEqual(self._run(7, max_workers=1), result)
+        self.assertNotEqual(self._run(8, max_workers=2)["final_balance"], result["final_balance"])
+        self.assertGreater(result["final_balance"]["std"], 0)  # Trials really differ
+
+    def test_trials_equal_seeded_backtests(self):
+        monte_carlo = MonteCarloBacktest(BacktestEngineModesTests.STRATEGIES[0], self._get_candles(), trials=5, seed=7)
+        final_balances = [
+            BacktestEngine(
+                StrategyEngine._from_json(BacktestEngineModesTests.STRATEGIES[0]),
+                candles=self._get_candles(),
+                rng=random.Random(seed),
+            ).run(vectorized=True)[0]
+            for seed in monte_carlo.get_trial_seeds()
+        ]
+
+        result = monte_carlo.run()
+
+        self.assertAlmostEqual(result["final_balance"]["mean"], sum(final_balances) / len(final_balances))
+        self.assertEqual(result["final_balance"]["min"], min(final_balances))
+        self.assertEqual(result["final_balance"]["max"], max(final_balances))
+
+
+class PortfolioBacktestTests(TestCase):
+    HOUR = 3600 * 1000
+
+    def _get_candles(self, rows: list[int], high: dict = None) -> CandleSeries:
+        # Flat candles at 100, touching neither the stop-loss (99) nor the take-profit (101.5) unless {row: high} says so
+        high = high or {}
+        return CandleSeries(
+            [row * self.HOUR for row in rows],
+            [100.0] * len(rows),
+            [high.get(row, 100.5) for row in rows],
+            [99.5] * len(rows),
+            [100.0] * len(rows),
+            [1.0] * len(rows),
+            timeframe_ms=self.HOUR,
+        )
+
+    def test_price_matrix_aligns_missing_candles(self):
+        prices = PriceMatrix({"A": self._get_candles([0, 1, 2]), "B": self._get_candles([1, 3])})
+
+        self.assertEqual(prices.open_time.tolist(), [0, self.HOUR, 2 * self.HOUR, 3 * self.HOUR])
+        self.assertEqual(prices.index.tolist(), [[0, -1], [1, 0], [2, -1], [-1, 1]])
+        self.assertTrue(np.isnan(prices.open[0, 1]))
+
+    def test_assets_share_one_balance(self):
+        candles = {
+            "A": self._get_candles(range(6), high={4: 102.0}),  # Take-profit hit at row 4
+            "B": self._get_candles([0, 1, 2, 4, 5]),  # Row 3 missing
+            "C": self._get_candles([0, 2, 3, 4, 5]),  # Row 1 missing
+        }
+        risk_model = TradeRiskModel._from_json(
+            {
+                "stop_loss": {"type": "fixed", "percentage": 1},
+                "take_profit": {"type": "fixed", "percentage": 1.5},
+                "position_size": {"type": "fixed", "percentage": 60},
+            }
+        )
+        signals = np.zeros((6, 3), dtype=np.int8)
+        signals[0] = 1  # All assets buy at row 0, C can not as it has no candle at row 1
+        signals[4, 2] = 1  # C buys again at row 4, after A is closed
+
+        engine = PortfolioBacktestEngine(
+            StrategyEngine._from_json(BacktestEngineModesTests.STRATEGIES[0]), candles, initial_balance=1000
+        )
+        risk_models = {tuple(position): risk_model for position in np.argwhere(signals != 0).tolist()}
+        with mock.patch.object(engine, "get_signals", return_value=(signals, risk_models)):
+            final_balance, trades = engine.run()
+
+        self.assertEqual([(trade["symbol"], trade["status"]) for trade in trades], [("A", 0), ("B", 1), ("C", 1)])
+        a, b, c = trades
+        self.assertEqual(a["quantity"], 600)
+        self.assertEqual(b["quantity"], 400)  # Only what A left of the balance
+        self.assertAlmostEqual(a["result"], 9)
+        self.assertAlmostEqual(final_balance, 1009)
+        self.assertAlmostEqual(c["quantity"], 605.4)  # 60 % of the new balance, B still holds 400
+        self.assertEqual(c["entry_time"], datetime.fromtimestamp(5 * 3600, tz=timezone.utc))
+
+    def test_signals_of_assets_with_missing_candles(self):
+        candles = {"A": get_candles(100), "B": get_candles(100, seed=1)[::2]}
+        engine = PortfolioBacktestEngine(StrategyEngine._from_json(BacktestEngineModesTests.STRATEGIES[0]), candles)
+
+        signals, risk_models = engine.get_signals()
+
+        self.assertEqual(signals.shape, (100, 2))
+        self.assertFalse(signals[1::2, 1].any())  # No candles of B there
+        self.assertEqual(set(risk_models), {tuple(position) for position in np.argwhere(signals != 0).tolist()})
+
+
+class WalkForwardTests(TestCase):
+    PARAMETER_RANGES = {
+        "indicators": [
+            {
+                "name": "SMA",
+                "parameters": [
+                    {"name": "short_window", "values": [5]},
+                    {"name": "long_window", "values": [20]},
+                ],
+            }
+        ]
+    }
+
+    def _get_walk_forward(self, candles, train_size: int, test_size: int, step: int = None) -> WalkForward:
+        return WalkForward(
+            BacktestEngineModesTests.STRATEGIES[0], self.PARAMETER_RANGES, candles, train_size, test_size, step, max_workers=1
+        )
+
+    def test_windows(self):
+        walk_forward = self._get_walk_forward(get_candles(100), 30, 20, step=10)
+
+        self.assertEqual(
+            walk_forward.get_windows(),
+            [(0, 30, 50), (10, 40, 60), (20, 50, 70), (30, 60, 80), (40, 70, 90), (50, 80, 100)],
+        )
+        self.assertEqual(self._get_walk_forward(get_candles(100), 30, 20).get_windows()[-1], (40, 70, 90))
+        with self.assertRaises(ValueError):
+            self._get_walk_forward(get_candles(100), 80, 21).get_windows()
+
+    def test_windows_use_warmed_up_indicators(self):
+        candles = CandleSeries.from_candles(get_candles(300))
+        strategy = StrategyEngine._from_json(BacktestEngineModesTests.STRATEGIES[0])
+        signals = strategy.get_signal_and_risk_model_list_from_candles(candles)
+
+        def run_slice(start: int, end: int) -> dict:
+            # Candles before start only warm up the risk models, no trade is opened from their signals
+            warm_up = min(start, TradeRiskModel.ATR_PERIOD)
+            backtest = BacktestEngine(strategy, candles=candles[start - warm_up:end])
+            final_balance, trades = backtest.run(vectorized=True, signals=[("HOLD", None)] * warm_up + signals[start:end])
+            return get_result_metrics(final_balance, trades, 1000)
+
+        # Test windows are shorter than the long SMA, so only indicators warmed up by the earlier candles give signals
+        walk_forward = self._get_walk_forward(candles, 60, 15)
+        result = walk_forward.run()
+
+        windows = walk_forward.get_windows()
+        self.assertEqual(len(result["windows"]), len(windows))
+        for window, (train_start, test_start, test_end) in zip(result["windows"], windows):
+            self.assertEqual(window["train_start"], candles[train_start]["open_time"])
+            self.assertEqual(window["train_end"], candles[test_start - 1]["open_time"])
+            self.assertEqual(window["test_start"], candles[test_start]["open_time"])
+            self.assertEqual(window["test_end"], candles[test_end - 1]["open_time"])
+            self.assertEqual(window["train"], run_slice(train_start, test_start))
+            self.assertEqual(window["test"], run_slice(test_start, test_end))
+
+        self.assertGreater(sum(window["test"]["total_trades"] for window in result["windows"]), 0)
+        self.assertEqual(BacktestEngine(strategy, candles=candles[60:75]).run(vectorized=True)[1], [])
+
+
+class SaveBacktestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="trader", email="trader@example.com", password="password")
+        cls.strategy = Strategy.objects.create(
+            name="SMA", parameters=BacktestEngineModesTests.STRATEGIES[0], creator=cls.user
+        )
+
+    def setUp(self):
+        patch_symbol_index(
+            self,
+            {
+                "BTC/USDT": {"id": "BTCUSDT", "spot": True},
+                "ETH/BTC": {"id": "ETHBTC", "spot": True},
+            },
+        )
+
+    def _save(self, token: str) -> Backtest:
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        return services.save_backtest(
+            self.user,
+            self.strategy,
+            token=token,
+            timeframe="1h",
+            start_date=start,
+            end_date=start + timedelta(hours=10),
+            initial_capital=1000,
+            candles_amount=10,
+            result={"final_balance": 1000, "trades": []},
+        )
+
+    def test_asset_symbol_is_normalized(self):
+        for token, symbol in (("BTC/USDT", "BTC"), ("btcusdt", "BTC"), ("BTC", "BTC"), ("ETH/BTC", "ETHBTC")):
+            with self.subTest(token=token):
+                self.assertEqual(self._save(token).asset.symbol, symbol)
+
+        self.assertEqual(Asset.objects.count(), 2)
+
+    def test_run_backtest_saves_the_result_in_one_step(self):
+        candles = BacktestCheckpointTests._get_candles(self, 400)
+
+        with mock.patch.object(services, "get_binance_ohlcv_and_timestamp", return_value=candles):
+            random.seed(1)
+            result = services.run_backtest(self.user, self.strategy, token="BTC/USDT", candle_amount=400, use_cache=False)
+            random.seed(1)
+            summary = services.run_backtest(self.user, self.strategy, token="BTC/USDT", candle_amount=400, save=True)
+
+        self.assertNotIn("trades", summary)
+        self.assertGreater(result["total_trades"], 0)
+        for name in services.BACKTEST_RESULT_FIELDS:
+            self.assertEqual(summary[name], result[name])
+
+        backtest = Backtest.objects.get(id=summary["backtest_id"])
+        self.assertEqual(backtest.user, self.user)
+        self.assertEqual(backtest.asset.symbol, "BTC")
+        self.assertEqual(backtest.candles_amount, 400)
+        self.assertEqual(backtest.result, {name: result[name] for name in services.BACKTEST_RESULT_FIELDS})
+        self.assertIsNone(backtest.trades_blob)
+        self.assertEqual(
+            [
+                (entry_time, float(trade_result))
+                for entry_time, trade_result in backtest.trades.order_by("entry_time", "id").values_list("entry_time", "result")
+            ],
+            [(trade["entry_time"], round(trade["result"], 8)) for trade in result["trades"]],
+        )
+        trade_results = [trade["result"] for trade in result["trades"]]
+        for name, value in get_backtest_summary(1000, trade_results, result["final_balance"]).items():
+            self.assertEqual(summary[name], value)
+            self.assertEqual(getattr(backtest, name), value)
+
+    def test_trade_storages_return_the_same_trades(self):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        trades = [
+            {
+                "entry_price": 100.0,
+                "exit_price": 101.5 if i % 3 else None,
+                "entry_time": start + timedelta(hours=2 * i),
+                "exit_time": start + timedelta(hours=2 * i + 1) if i % 3 else None,
+                "quantity": 50.0,
+                "trade_type": i % 2,
+                "stop_loss": 99.0,
+                "take_profit": 101.5,
+                "status": 0 if i % 3 else 1,
+                "result": 0.75 if i % 3 else None,
+            }
+            for i in range(6)
+        ]
+        result = {"final_balance": 1003.0, "profit_loss": 3.0, "trades": trades}
+
+        saved = {}
+        for trade_storage in services.TRADE_STORAGES:
+            backtest = services.save_backtest(
+                self.user, self.strategy, "BTC/USDT", "1h", start, start + timedelta(hours=12), 1000, 12, result,
+                trade_storage=trade_storage,
+            )
+            saved[trade_storage] = [
+                {name: trade[name] for name in ("entry_time", "exit_time", "entry_price", "exit_price", "result")}
+                for trade in serialize_backtest(Backtest.objects.get(id=backtest.id))["trades"]
+            ]
+
+        self.assertEqual(Trade.objects.count(), len(trades))  # Only the "rows" backtest has Trade rows
+        self.assertEqual(len(saved["rows"]), len(trades))
+        self.assertEqual(saved["columnar"], saved["rows"])
+
+        with self.assertRaises(ValueError):
+            services.save_backtest(
+                self.user, self.strategy, "BTC/USDT", "1h", start, start, 1000, 12, result, trade_storage="json"
+            )
@@ -0,0 +1,142 @@
+"""
+Columnar storage of backtest trades.
+
+A long backtest can have tens of thousands of trades, which as `Trade` rows bloat the table and are slow to insert and load.
+`TradeColumns` keeps the trades of one backtest in numpy columns (times as int64 epoch ms, prices as float64)
+and packs them into a single zlib compressed blob, stored in `Backtest.trades_blob`.
+The blob is decoded only when the trades are accessed, and serialized straight from the columns.
+"""
+
+import struct
+import zlib
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Column name -> dtype, in blob order. Missing values are NaN for prices and MISSING_TIME for times.
+COLUMNS = {
+    "entry_time": np.dtype("<i8"),
+    "exit_time": np.dtype("<i8"),
+    "entry_price": np.dtype("<f8"),
+    "exit_price": np.dtype("<f8"),
+    "quantity": np.dtype("<f8"),
+    "stop_loss": np.dtype("<f8"),
+    "take_profit": np.dtype("<f8"),
+    "result": np.dtype("<f8"),
+    "trade_type": np.dtype("i1"),  # 1 for buy, 0 for sell
+    "status": np.dtype("i1"),  # 1 for open, 0 for closed
+}
+TIME_COLUMNS = ["entry_time", "exit_time"]
+FLAG_COLUMNS = ["trade_type", "status"]
+
+MISSING_TIME = np.iinfo(np.int64).min
+MAGIC = b"TRD"
+VERSION = 1
+HEADER = struct.Struct("<3sBQ")  # magic, version, number of trades
+
+
+class TradeColumns:
+    def __init__(self, columns: dict[str, np.ndarray]):
+        """
+        Args:
+            columns (dict[str, np.ndarray]): One array per name in COLUMNS, all of the same length
+        """
+        self.columns = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in COLUMNS.items()}
+
+        if len({len(column) for column in self.columns.values()}) > 1:
+            raise ValueError("All trade columns must have the same length.")
+
+    @classmethod
+    def from_trades(cls, trades: list[dict]) -> "TradeColumns":
+        """
+        Create TradeColumns from trade dicts as returned by TradeEngine.get_json() or sent by the client.
+        Times can be datetimes, ISO strings or epoch ms.
+        """
+        columns = {}
+        for name, dtype in COLUMNS.items():
+            values = [trade.get(name) for trade in trades]
+            if name in TIME_COLUMNS:
+                columns[name] = np.fromiter((_to_ms(v) for v in values), dtype=dtype, count=len(values))
+            elif name in FLAG_COLUMNS:
+                columns[name] = np.fromiter((_to_flag(v) for v in values), dtype=dtype, count=len(values))
+            else:
+                columns[name] = np.array([np.nan if v is None else float(v) for v in values], dtype=dtype)
+
+        return cls(columns)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "TradeColumns":
+        """
+        Decode a blob created by to_bytes.
+        """
+        data = zlib.decompress(blob)
+        magic, version, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unsupported trade blob (magic {magic!r}, version {version}).")
+
+        columns = {}
+        offset = HEADER.size
+        for name, dtype in COLUMNS.items():
+            columns[name] = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            offset += count * dtype.itemsize
+
+        return cls(columns)
+
+    def to_bytes(self, level: int = 6) -> bytes:
+        """
+        Pack the trades into one zlib compressed blob: a header followed by the columns one after another in COLUMNS order.
+        """
+        parts = [HEADER.pack(MAGIC, VERSION, len(self))]
+        parts.extend(self.columns[name].tobytes() for name in COLUMNS)
+        return zlib.compress(b"".join(parts), level)
+
+    def to_dicts(self) -> list[dict]:
+        """
+        Return the trades in the format of serialize_trade: ISO times, floats or None, trade_type and status as '1' / '0'.
+        Trades stored as columns have no database id, the id is their position in the backtest.
+        """
+        values = {}
+        for name in COLUMNS:
+            column = self.columns[name]
+            if name in TIME_COLUMNS:
+                values[name] = _to_isoformat(column)
+            elif name in FLAG_COLUMNS:
+                values[name] = column.astype(str).tolist()
+            else:
+                values[name] = np.where(np.isnan(column), None, column).tolist()
+
+        names = ["id"] + list(COLUMNS)
+        values["id"] = range(len(self))
+        return [dict(zip(names, row)) for row in zip(*(values[name] for name in names))]
+
+    def __len__(self) -> int:
+        return len(self.columns["entry_time"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+
+def _to_ms(value) -> int:
+    if value is None:
+        return MISSING_TIME
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(round(value.timestamp() * 1000))
+    return int(value)
+
+
+def _to_flag(value) -> int:
+    if isinstance(value, str):
+        return 1 if value.strip().lower() in ("1", "true", "buy", "open") else 0
+    return 1 if value else 0
+
+
+def _to_isoformat(column: np.ndarray) -> list:
+    missing = column == MISSING_TIME
+    times = np.datetime_as_string(np.where(missing, 0, column).astype("datetime64[ms]"), unit="s")
+    times = np.char.add(times, "+00:00").astype(object)
+    times[missing] = None
+    return times.tolist()
@@ -44,11 +44,19 @@ def backtest_detail(request, backtest_id: int):
 
 @login_required
 def my_backtests(request):
-    backtests = get_available_backtests(request.user)
+    try:
+        min_trades = request.GET.get("min_trades")
+        backtests = get_available_backtests(
+            request.user,
+            order_by=request.GET.get("sort", "id"),
+            min_trades=int(min_trades) if min_trades else None,
+        )
+    except ValueError:
+        backtests = get_available_backtests(request.user)
 
     serialized_backtests = None
     if backtests:
-        serialized_backtests = [serialize_backtest(b) for b in backtests]
+        serialized_backtests = [serialize_backtest(b, include_trades=False) for b in backtests]
 
     return render(
         request,
@@ -1,6 +1,7 @@
 import json
 from venv import logger
-from django.http import JsonResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 import logging
 
@@ -8,6 +9,9 @@ from apps.backtests.models import Asset
 
 logger = logging.getLogger(__name__)
 
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+BINARY_CONTENT_TYPE = "application/octet-stream"
+
 
 @require_http_methods(["POST"])
 def get_hot_tokens(request):
@@ -54,8 +58,10 @@ def get_candles(request, token_id: int):
     {
         "interval": str (optional, default="1h"),
         "candle_amount": int (optional, default=100),
-        "start_date": str (optional, ISO format date string)
+        "start_date": str (optional, ISO format date string),
+        "format": str (optional, "columnar" to return column arrays with open_time as epoch ms)
     }
+    With Accept: application/octet-stream the columns are returned as packed little-endian float64, see CandleSeries.to_bytes.
     """
 
     token = Asset.objects.filter(id=token_id).first()
@@ -94,6 +100,12 @@ def get_candles(request, token_id: int):
                     {"status": "error", "message": "Invalid start_date format"}, status=400
                 )
 
+        if _wants_columnar(request, payload):
+            candles = get_binance_ohlcv_and_timestamp(
+                token, interval, candle_amount, start_date=start_date, as_series=True
+            )
+            return _columnar_response(request, candles)
+
         candles = get_binance_ohlcv_and_timestamp(token, interval, candle_amount, start_date=start_date)
 
         return JsonResponse({"status": "success", "candles": candles}, status=200)
@@ -112,8 +124,11 @@ def get_candles_in_range(request, token_id: int):
     {
         "interval": str (optional, default="1h"),
         "start_date": str (required, ISO format date string),
-        "end_date": str (required, ISO format date string)
+        "end_date": str (required, ISO format date string),
+        "format": str (optional, "ndjson" to stream candles as newline-delimited JSON, also selected by Accept: application/x-ndjson,
+            or "columnar" to return column arrays with open_time as epoch ms)
     }
+    With Accept: application/octet-stream the columns are returned as packed little-endian float64, see CandleSeries.to_bytes.
     """
 
     token = Asset.objects.filter(id=token_id).first()
@@ -129,7 +144,10 @@ def get_candles_in_range(request, token_id: int):
         )
     
     try:
-        from apps.market.services import get_binance_ohlcv_and_timestamp_range
+        from apps.market.services import (
+            get_binance_ohlcv_and_timestamp_range,
+            iter_binance_ohlcv_and_timestamp_range,
+        )
 
         payload = json.loads(request.body) if request.body else {}
         token = token.symbol
@@ -153,6 +171,17 @@ def get_candles_in_range(request, token_id: int):
                     {"status": "error", "message": "Invalid date time formats. ISO style is required."}, status=400
                 )
         
+        if payload.get("format") == "ndjson" or NDJSON_CONTENT_TYPE in request.headers.get("Accept", ""):
+            # One candle per line, sent page by page as the candles are downloaded
+            pages = iter_binance_ohlcv_and_timestamp_range(token, interval, start_date=start_date, end_date=end_date)
+            return StreamingHttpResponse(_stream_ndjson(pages), content_type=NDJSON_CONTENT_TYPE)
+
+        if _wants_columnar(request, payload):
+            candles = get_binance_ohlcv_and_timestamp_range(
+                token, interval, start_date=start_date, end_date=end_date, as_series=True
+            )
+            return _columnar_response(request, candles)
+
         candles = get_binance_ohlcv_and_timestamp_range(token, interval, start_date=start_date, end_date=end_date)
         
         return JsonResponse({"status": "success", "candles": candles}, status=200)
@@ -160,4 +189,35 @@ def get_candles_in_range(request, token_id: int):
         logger.error(f"Error retrieving candle data: {err}", exc_info=True)
         return JsonResponse(
             {"status": "error", "message": f"Error: {str(err)}"}, status=500
-        )
\ No newline at end of file
+        )
+
+
+def _stream_ndjson(pages):
+    try:
+        for page in pages:
+            yield "".join(json.dumps(candle, cls=DjangoJSONEncoder) + "\n" for candle in page)
+    except Exception as err:
+        # Status code is already sent, so the error is reported as the last line
+        logger.error(f"Error streaming candle data: {err}", exc_info=True)
+        yield json.dumps({"status": "error", "message": f"Error: {str(err)}"}) + "\n"
+
+
+def _wants_columnar(request, payload: dict) -> bool:
+    return payload.get("format") == "columnar" or BINARY_CONTENT_TYPE in request.headers.get("Accept", "")
+
+
+def _columnar_response(request, candles):
+    from apps.market.candle_series import COLUMNS, CandleSeries
+
+    if candles is None:
+        candles = CandleSeries.empty()
+
+    if BINARY_CONTENT_TYPE in request.headers.get("Accept", ""):
+        response = HttpResponse(candles.to_bytes(), content_type=BINARY_CONTENT_TYPE)
+        response["X-Candle-Columns"] = ",".join(COLUMNS)
+        response["X-Candle-Count"] = str(len(candles))
+        return response
+
+    return JsonResponse(
+        {"status": "success", "format": "columnar", "candles": candles.to_columns()}, status=200
+    )
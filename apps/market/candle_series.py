@@ -0,0 +1,196 @@
+"""
+Columnar OHLCV candles.
+
+`CandleSeries` keeps candles in contiguous numpy arrays (open_time as int64 epoch ms, prices and volume as float64),
+which takes about 48 bytes per candle instead of several hundred for a dict with datetime objects.
+It behaves like the list of candle dicts used across the project: len(), iteration and integer indexing return candle dicts,
+and slicing returns a CandleSeries viewing the same arrays, so existing call sites accept it unchanged.
+Code that needs whole columns (indicators, risk model) reads them directly with get_column, without any conversion.
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+COLUMNS = ["open_time"] + PRICE_COLUMNS
+
+
+class CandleSeries:
+    def __init__(
+        self,
+        open_time: np.ndarray,
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray,
+        timeframe_ms: int = None,
+    ):
+        """
+        Args:
+            open_time (np.ndarray): Open times in epoch ms
+            open, high, low, close, volume (np.ndarray): Price and volume columns of the same length
+            timeframe_ms (int): Length of one candle in ms, used for close_time. If not provided, candles have no close_time.
+        """
+        self.open_time = np.asarray(open_time, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+        self.timeframe_ms = timeframe_ms
+
+        if any(len(column) != len(self.open_time) for column in self._price_columns()):
+            raise ValueError("All candle columns must have the same length.")
+
+    @classmethod
+    def from_ohlcv(cls, ohlcv: list[list], timeframe_ms: int = None) -> "CandleSeries":
+        """
+        Create a CandleSeries from candles in ccxt format [open_time, open, high, low, close, volume].
+        """
+        if not ohlcv:
+            return cls.empty(timeframe_ms)
+
+        array = np.array([candle[:6] for candle in ohlcv], dtype=np.float64)
+        return cls.from_array(array, timeframe_ms)
+
+    @classmethod
+    def from_array(cls, array: np.ndarray, timeframe_ms: int = None) -> "CandleSeries":
+        """
+        Create a CandleSeries from an (n, 6) float64 array with COLUMNS columns, inverse of to_array.
+        """
+        array = np.asarray(array, dtype=np.float64).reshape(-1, len(COLUMNS))
+        return cls(
+            array[:, 0].astype(np.int64),
+            *(np.ascontiguousarray(array[:, i]) for i in range(1, len(COLUMNS))),
+            timeframe_ms=timeframe_ms,
+        )
+
+    @classmethod
+    def from_candles(cls, candles: list[dict]) -> "CandleSeries":
+        """
+        Create a CandleSeries from a list of candle dicts. open_time can be a datetime or epoch ms.
+        The timeframe is taken from close_time of the first candle, if present.
+        """
+        if isinstance(candles, cls):
+            return candles
+        if not candles:
+            return cls.empty()
+
+        timeframe_ms = None
+        if "close_time" in candles[0]:
+            timeframe_ms = _to_ms(candles[0]["close_time"]) - _to_ms(candles[0]["open_time"])
+
+        return cls(
+            np.fromiter((_to_ms(c["open_time"]) for c in candles), dtype=np.int64, count=len(candles)),
+            *(get_column(candles, name) for name in PRICE_COLUMNS),
+            timeframe_ms=timeframe_ms,
+        )
+
+    @classmethod
+    def empty(cls, timeframe_ms: int = None) -> "CandleSeries":
+        return cls(*(np.empty(0) for _ in COLUMNS), timeframe_ms=timeframe_ms)
+
+    @property
+    def close_time(self) -> np.ndarray | None:
+        if self.timeframe_ms is None:
+            return None
+        return self.open_time + self.timeframe_ms
+
+    @property
+    def nbytes(self) -> int:
+        return self.open_time.nbytes + sum(column.nbytes for column in self._price_columns())
+
+    def to_array(self) -> np.ndarray:
+        """
+        Return an (n, 6) float64 array with COLUMNS columns, open_time as epoch ms.
+        """
+        return np.column_stack([self.open_time.astype(np.float64), *self._price_columns()])
+
+    def to_columns(self) -> dict[str, list]:
+        """
+        Return {column: list of values} with open_time as epoch ms, e.g. for a columnar JSON response.
+        """
+        return {name: getattr(self, name).tolist() for name in COLUMNS}
+
+    def to_bytes(self) -> bytes:
+        """
+        Pack the candles column by column as little-endian float64 in COLUMNS order, open_time as epoch ms:
+        n open_time values, then n open values, ... so every column can be read as one Float64Array.
+        """
+        return np.concatenate(
+            [self.open_time.astype("<f8"), *(column.astype("<f8", copy=False) for column in self._price_columns())]
+        ).tobytes()
+
+    def to_dicts(self) -> list[dict]:
+        return list(self)
+
+    def to_dataframe(self):
+        import pandas as pd
+
+        return pd.DataFrame({name: getattr(self, name) for name in COLUMNS})
+
+    def __len__(self) -> int:
+        return len(self.open_time)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # Basic slicing only creates views of the columns, no candle data is copied
+            return CandleSeries(
+                self.open_time[index],
+                *(column[index] for column in self._price_columns()),
+                timeframe_ms=self.timeframe_ms,
+            )
+
+        return self._get_candle(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._get_candle(i)
+
+    def __repr__(self) -> str:
+        return f"CandleSeries({len(self)} candles, timeframe_ms={self.timeframe_ms})"
+
+    def _price_columns(self) -> list[np.ndarray]:
+        return [self.open, self.high, self.low, self.close, self.volume]
+
+    def _get_candle(self, i: int) -> dict:
+        open_time = int(self.open_time[i])
+        candle = {"open_time": datetime.fromtimestamp(open_time / 1000, tz=timezone.utc)}
+        if self.timeframe_ms is not None:
+            candle["close_time"] = datetime.fromtimestamp(
+                (open_time + self.timeframe_ms) / 1000, tz=timezone.utc
+            )
+
+        for name, column in zip(PRICE_COLUMNS, self._price_columns()):
+            candle[name] = float(column[i])
+
+        return candle
+
+
+def get_column(candles, name: str) -> np.ndarray:
+    """
+    Return one price column of candles as a float64 array.
+    For a CandleSeries the column itself is returned, without copying.
+
+    Args:
+        candles (CandleSeries | list[dict] | pd.DataFrame): OHLCV candles
+        name (str): Column name, one of PRICE_COLUMNS
+
+    Returns:
+        np.ndarray: Column values in candle order
+    """
+    if isinstance(candles, CandleSeries):
+        return getattr(candles, name)
+
+    if not isinstance(candles, list) and hasattr(candles, "columns"):  # pd.DataFrame, without importing pandas
+        return candles[name].to_numpy(dtype=np.float64)
+
+    return np.fromiter((candle[name] for candle in candles), dtype=np.float64, count=len(candles))
+
+
+def _to_ms(value) -> int:
+    if isinstance(value, datetime):
+        return int(round(value.timestamp() * 1000))
+    return int(value)
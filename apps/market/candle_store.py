@@ -0,0 +1,194 @@
+"""
+Local OHLCV candle store in front of the exchange.
+
+Closed candles never change, so once downloaded they are kept in the database (see `Candle` model)
+and served from there. Only candles missing locally, and the still-open latest candle, are fetched from the exchange.
+"""
+
+MAX_CANDLES_PER_REQUEST = 1000  # Binance API returns a maximum of 1000 candles per request
+
+
+def fetch_ohlcv(exchange, symbol: str, timeframe: str, since: int = None, limit: int = 500) -> list[list]:
+    """
+    Drop-in replacement for `exchange.fetch_ohlcv`, which serves closed candles from the local store.
+
+    Args:
+        exchange: ccxt exchange instance
+        symbol (str): Symbol in exchange format, e.g. 'BTC/USDT'
+        timeframe (str): Time interval, e.g. '1h'
+        since (int): Optional start time in epoch ms. If not provided, the latest {limit} candles are returned.
+        limit (int): Number of candles to return
+
+    Returns:
+        list[list]: Candles in ccxt format [open_time, open, high, low, close, volume], in chronological order
+    """
+    timeframe_ms = exchange.parse_timeframe(timeframe) * 1000
+    now = exchange.milliseconds()
+
+    if since is None:
+        ohlcv = _fetch_latest(exchange, symbol, timeframe, timeframe_ms, limit)
+    else:
+        ohlcv = _fetch_since(exchange, symbol, timeframe, timeframe_ms, since, limit, now)
+
+    return ohlcv
+
+
+def _fetch_since(exchange, symbol, timeframe, timeframe_ms, since, limit, now) -> list[list]:
+    stored = _load_candles(symbol, timeframe, since=since, until=now - timeframe_ms, limit=limit)
+
+    # Exchange returns candles starting with the first one opened at or after {since}
+    if stored and stored[0][0] >= since + timeframe_ms:
+        stored = []
+    stored = _contiguous_prefix(stored, timeframe_ms)
+
+    if len(stored) >= limit:
+        return stored[:limit]
+
+    next_since = stored[-1][0] + timeframe_ms if stored else since
+    fetched = _fetch_from_exchange(exchange, symbol, timeframe, next_since, limit - len(stored))
+    store_candles(symbol, timeframe, fetched, timeframe_ms, now)
+
+    return (stored + fetched)[:limit]
+
+
+def _fetch_latest(exchange, symbol, timeframe, timeframe_ms, limit) -> list[list]:
+    last_stored = _load_candles(symbol, timeframe, limit=1, latest=True)
+
+    if not last_stored:
+        return _download_latest(exchange, symbol, timeframe, timeframe_ms, limit)
+
+    # Download only the tail newer than the last stored candle, but never more than the latest {limit} candles
+    now = exchange.milliseconds()
+    since = max(last_stored[0][0] + timeframe_ms, now - limit * timeframe_ms)
+    tail = _fetch_from_exchange(exchange, symbol, timeframe, since, None)
+    store_candles(symbol, timeframe, tail, timeframe_ms, now)
+
+    if len(tail) >= limit:
+        return tail[-limit:]
+
+    stored = _load_candles(
+        symbol, timeframe, until=last_stored[0][0], limit=limit - len(tail), latest=True
+    )[::-1]
+
+    if (
+        len(stored) < limit - len(tail)
+        or len(_contiguous_prefix(stored + tail, timeframe_ms)) != len(stored) + len(tail)
+    ):
+        # Local history is too short or has gaps, fall back to a plain download
+        return _download_latest(exchange, symbol, timeframe, timeframe_ms, limit)
+
+    return stored + tail
+
+
+def _download_latest(exchange, symbol, timeframe, timeframe_ms, limit) -> list[list]:
+    now = exchange.milliseconds()
+    fetched = _fetch_from_exchange(exchange, symbol, timeframe, now - limit * timeframe_ms, None)
+    store_candles(symbol, timeframe, fetched, timeframe_ms, now)
+
+    return fetched[-limit:]
+
+
+def _fetch_from_exchange(exchange, symbol, timeframe, since, limit) -> list[list]:
+    """
+    Fetch candles from the exchange page by page, starting at {since}. If limit is None, fetches until the latest candle.
+    """
+    candles = []
+
+    while limit is None or len(candles) < limit:
+        page_limit = MAX_CANDLES_PER_REQUEST if limit is None else min(MAX_CANDLES_PER_REQUEST, limit - len(candles))
+        ohlcv = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=page_limit)
+
+        if not ohlcv:
+            break
+
+        candles.extend(ohlcv)
+        since = ohlcv[-1][0] + 1  # move forward
+
+        if len(ohlcv) < page_limit:
+            break
+
+    return candles
+
+
+def _contiguous_prefix(candles: list[list], timeframe_ms: int) -> list[list]:
+    for i in range(1, len(candles)):
+        if candles[i][0] - candles[i - 1][0] != timeframe_ms:
+            return candles[:i]
+    return candles
+
+
+def load_stored_candles(symbol: str, timeframe: str, since: int, until: int) -> list[list]:
+    """
+    Load the stored candles opened between {since} and {until}.
+
+    Args:
+        symbol (str): Symbol in exchange format, e.g. 'BTC/USDT'
+        timeframe (str): Time interval, e.g. '1h'
+        since (int): Start of the range in epoch ms
+        until (int): End of the range in epoch ms, inclusive
+
+    Returns:
+        list[list]: Candles in ccxt format, in chronological order
+    """
+    return _load_candles(symbol, timeframe, since=since, until=until)
+
+
+def count_stored_candles(symbol: str, timeframe: str, since: int, until: int) -> int:
+    """
+    Number of stored candles opened between {since} and {until} (inclusive), without loading them.
+    """
+    from apps.market.models import Candle
+
+    return Candle.objects.filter(
+        symbol=symbol, timeframe=timeframe, open_time__gte=since, open_time__lte=until
+    ).count()
+
+
+def _load_candles(symbol, timeframe, since=None, until=None, limit=None, latest=False) -> list[list]:
+    from apps.market.models import Candle
+
+    queryset = Candle.objects.filter(symbol=symbol, timeframe=timeframe)
+    if since is not None:
+        queryset = queryset.filter(open_time__gte=since)
+    if until is not None:
+        queryset = queryset.filter(open_time__lte=until)
+
+    queryset = queryset.order_by("-open_time" if latest else "open_time").values_list(
+        "open_time", "open", "high", "low", "close", "volume"
+    )
+    if limit is not None:
+        queryset = queryset[:limit]
+
+    return [list(candle) for candle in queryset]
+
+
+def store_candles(symbol: str, timeframe: str, ohlcv: list[list], timeframe_ms: int, now: int) -> None:
+    """
+    Save closed candles to the local store. Candles that are still open or already stored are skipped.
+
+    Args:
+        symbol (str): Symbol in exchange format, e.g. 'BTC/USDT'
+        timeframe (str): Time interval, e.g. '1h'
+        ohlcv (list[list]): Candles in ccxt format
+        timeframe_ms (int): Length of one candle in ms
+        now (int): Current time in epoch ms
+    """
+    from apps.market.models import Candle
+
+    closed = [
+        Candle(
+            symbol=symbol,
+            timeframe=timeframe,
+            open_time=candle[0],
+            open=candle[1],
+            high=candle[2],
+            low=candle[3],
+            close=candle[4],
+            volume=candle[5],
+        )
+        for candle in ohlcv
+        if candle[0] + timeframe_ms <= now
+    ]
+
+    if closed:
+        Candle.objects.bulk_create(closed, ignore_conflicts=True, batch_size=MAX_CANDLES_PER_REQUEST)
@@ -0,0 +1,128 @@
+"""
+Persisted market metadata of the exchange.
+
+`exchange.load_markets()` downloads several MB of metadata. It is stored in the database (see `MarketMetadata` model)
+and reused by every worker for MARKET_METADATA_TTL seconds, so a new process loads it from the database instead of the exchange.
+A SymbolIndex built from the same data validates and normalizes user-provided symbols with dictionary lookups.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+DEFAULT_QUOTE = "USDT"
+
+
+class SymbolIndex:
+    """
+    Maps user input such as 'BTC/USDT', 'btcusdt' or 'BTC' to the spot symbol of the exchange, e.g. 'BTC/USDT'.
+    """
+
+    def __init__(self, markets: dict):
+        """
+        Args:
+            markets (dict): {symbol: market} as returned by ccxt load_markets
+        """
+        self.symbols = {}
+
+        for symbol, market in markets.items():
+            # Derivatives share ids with spot markets (e.g. BTCUSDT), only spot symbols are used in the app
+            if not market.get("spot", True):
+                continue
+
+            self.symbols[symbol.upper()] = symbol
+            self.symbols[symbol.upper().replace("/", "")] = symbol
+            if market.get("id"):
+                self.symbols[str(market["id"]).upper()] = symbol
+
+    def normalize(self, coin: str) -> str | None:
+        """
+        Return the exchange symbol for the given coin, or None if the exchange has no such spot market.
+        A coin without a quote asset (e.g. 'BTC') is paired with DEFAULT_QUOTE.
+        """
+        key = coin.strip().upper()
+        return self.symbols.get(key) or self.symbols.get(f"{key}/{DEFAULT_QUOTE}")
+
+
+class MarketMetadataCache:
+    """
+    Market metadata of one exchange, kept in memory and in the database.
+    """
+
+    def __init__(self, exchange, ttl: float = None):
+        """
+        Args:
+            exchange: ccxt exchange instance
+            ttl (float): Maximum age of the metadata in seconds, defaults to settings.MARKET_METADATA_TTL
+        """
+        self.exchange = exchange
+        self.ttl = timedelta(seconds=ttl or getattr(settings, "MARKET_METADATA_TTL", DEFAULT_TTL))
+        self.markets = None
+        self.fetched_at = None
+        self.index = None
+        self.lock = threading.Lock()
+
+    def get_markets(self) -> dict:
+        """
+        Return {symbol: market} and make sure the exchange client uses it, so ccxt does not download it itself.
+        Order of sources: memory, database, exchange. If the download of expired metadata fails, the old one is used.
+        """
+        if self._is_fresh():
+            return self.markets
+
+        with self.lock:
+            if self._is_fresh():
+                return self.markets
+
+            if self.markets is None:
+                self._load_stored()
+
+            if not self._is_fresh():
+                try:
+                    self._download()
+                except Exception:
+                    if self.markets is None:
+                        raise
+                    logger.warning("Market metadata download failed, using the stored one", exc_info=True)
+
+        return self.markets
+
+    def get_symbol_index(self) -> SymbolIndex:
+        self.get_markets()
+        return self.index
+
+    def _is_fresh(self) -> bool:
+        return self.fetched_at is not None and timezone.now() - self.fetched_at < self.ttl
+
+    def _load_stored(self) -> None:
+        from apps.market.models import MarketMetadata
+
+        stored = MarketMetadata.objects.filter(exchange=self.exchange.id).first()
+        if stored is not None:
+            self._set_markets(stored.markets, stored.fetched_at)
+
+    def _download(self) -> None:
+        from apps.market.models import MarketMetadata
+
+        markets = self.exchange.load_markets(reload=True)
+        fetched_at = timezone.now()
+
+        MarketMetadata.objects.update_or_create(
+            exchange=self.exchange.id,
+            defaults={"markets": markets, "fetched_at": fetched_at},
+        )
+        self._set_markets(markets, fetched_at)
+
+    def _set_markets(self, markets: dict, fetched_at) -> None:
+        if self.exchange.markets is not markets:
+            self.exchange.set_markets(markets)
+
+        self.markets = markets
+        self.fetched_at = fetched_at
+        self.index = SymbolIndex(markets)
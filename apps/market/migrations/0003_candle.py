@@ -0,0 +1,31 @@
+# Generated by Django 5.0 on 2026-10-18 10:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0002_delete_asset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Candle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(help_text='e.g. BTC/USDT', max_length=30)),
+                ('timeframe', models.CharField(help_text='e.g. 1h', max_length=5)),
+                ('open_time', models.BigIntegerField(help_text='epoch ms')),
+                ('open', models.FloatField()),
+                ('high', models.FloatField()),
+                ('low', models.FloatField()),
+                ('close', models.FloatField()),
+                ('volume', models.FloatField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='candle',
+            constraint=models.UniqueConstraint(fields=('symbol', 'timeframe', 'open_time'), name='unique_candle'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0 on 2026-10-18 10:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0003_candle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketMetadata',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exchange', models.CharField(help_text='ccxt exchange id, e.g. binance', max_length=30, unique=True)),
+                ('markets', models.JSONField()),
+                ('fetched_at', models.DateTimeField()),
+            ],
+        ),
+    ]
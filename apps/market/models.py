@@ -1,3 +1,40 @@
 from django.db import models
 
-pass
\ No newline at end of file
+
+class Candle(models.Model):
+    """
+    Closed OHLCV candle stored locally, so history does not have to be downloaded from the exchange again.
+    """
+
+    symbol = models.CharField(max_length=30, help_text="e.g. BTC/USDT")
+    timeframe = models.CharField(max_length=5, help_text="e.g. 1h")
+    open_time = models.BigIntegerField(help_text="epoch ms")
+    open = models.FloatField()
+    high = models.FloatField()
+    low = models.FloatField()
+    close = models.FloatField()
+    volume = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["symbol", "timeframe", "open_time"], name="unique_candle"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.symbol} {self.timeframe} @ {self.open_time}"
+
+
+class MarketMetadata(models.Model):
+    """
+    Market metadata of an exchange (result of ccxt load_markets), shared by all workers,
+    so a new process does not have to download it before serving requests.
+    """
+
+    exchange = models.CharField(max_length=30, unique=True, help_text="ccxt exchange id, e.g. binance")
+    markets = models.JSONField()
+    fetched_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.exchange} markets @ {self.fetched_at}"
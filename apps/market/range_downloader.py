@@ -0,0 +1,225 @@
+"""
+Concurrent download of OHLCV history for a fixed date range.
+
+The open times of all candles in the range are known up front from the timeframe, so the range is split into pages
+of MAX_CANDLES_PER_REQUEST candles which are fetched in parallel (within the exchange rate limit) and put back together in order.
+Pages already complete in the local candle store (see candle_store) are served from it without a request,
+and closed candles of the downloaded pages are saved to it, so a historical range is downloaded only once.
+The exchange is passed in, so any object with the ccxt `fetch_ohlcv` / `parse_timeframe` interface can be used, e.g. a fake exchange.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from apps.market.candle_store import (
+    MAX_CANDLES_PER_REQUEST,
+    count_stored_candles,
+    load_stored_candles,
+    store_candles,
+)
+
+MAX_WORKERS = 8
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing requests at least {interval} ms apart, shared by all download threads.
+    """
+
+    def __init__(self, interval: float):
+        """
+        Args:
+            interval (float): Minimum time between two requests in ms
+        """
+        self.interval = interval / 1000
+        self.next_request = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        if self.interval <= 0:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            request_time = max(now, self.next_request)
+            self.next_request = request_time + self.interval
+
+        if request_time > now:
+            time.sleep(request_time - now)
+
+
+def get_page_starts(since: int, until: int, timeframe_ms: int, page_limit: int = MAX_CANDLES_PER_REQUEST) -> list[tuple[int, int]]:
+    """
+    Split the range into pages.
+
+    Args:
+        since (int): Start of the range in epoch ms, the first candle is the one opened at or after it
+        until (int): End of the range in epoch ms, inclusive
+        timeframe_ms (int): Length of one candle in ms
+        page_limit (int): Maximum number of candles per page
+
+    Returns:
+        list[tuple[int, int]]: (start open_time, number of candles) for every page, in chronological order
+    """
+    first = -(-since // timeframe_ms) * timeframe_ms  # first open time at or after since
+    if first > until:
+        return []
+
+    total = (until - first) // timeframe_ms + 1
+    page_ms = page_limit * timeframe_ms
+
+    return [
+        (first + i * page_ms, min(page_limit, total - i * page_limit))
+        for i in range(-(-total // page_limit))
+    ]
+
+
+def download_ohlcv_range(
+    exchange,
+    symbol: str,
+    timeframe: str,
+    since: int,
+    until: int,
+    max_workers: int = MAX_WORKERS,
+    page_limit: int = MAX_CANDLES_PER_REQUEST,
+    use_store: bool = True,
+) -> list[list]:
+    """
+    Download all candles opened between {since} and {until}.
+
+    Args:
+        exchange: ccxt exchange instance
+        symbol (str): Symbol in exchange format, e.g. 'BTC/USDT'
+        timeframe (str): Time interval, e.g. '1h'
+        since (int): Start of the range in epoch ms
+        until (int): End of the range in epoch ms, inclusive
+        max_workers (int): Maximum number of concurrent requests
+        page_limit (int): Maximum number of candles per request
+        use_store (bool): If True, pages are read from and saved to the local candle store
+
+    Returns:
+        list[list]: Candles in ccxt format [open_time, open, high, low, close, volume], in chronological order, without duplicates
+    """
+    return [
+        candle
+        for page in iter_ohlcv_range_pages(
+            exchange, symbol, timeframe, since, until, max_workers, page_limit, use_store
+        )
+        for candle in page
+    ]
+
+
+def iter_ohlcv_range_pages(
+    exchange,
+    symbol: str,
+    timeframe: str,
+    since: int,
+    until: int,
+    max_workers: int = MAX_WORKERS,
+    page_limit: int = MAX_CANDLES_PER_REQUEST,
+    use_store: bool = True,
+):
+    """
+    Same as download_ohlcv_range, but yields the candles page by page, in chronological order, as soon as each page is ready.
+    At most {max_workers} pages are downloaded ahead of the consumer, so memory does not grow with the length of the range.
+
+    Yields:
+        list[list]: Candles of one page in ccxt format
+    """
+    timeframe_ms = exchange.parse_timeframe(timeframe) * 1000
+    now = exchange.milliseconds()
+    until = min(until, now)  # no candles in the future, don't request them
+    pages = get_page_starts(since, until, timeframe_ms, page_limit)
+
+    if not pages:
+        return
+
+    # ccxt throttling is not thread-safe, so requests are spaced by a limiter shared between the threads
+    rate_limiter = RateLimiter(getattr(exchange, "rateLimit", 0) if getattr(exchange, "enableRateLimit", False) else 0)
+
+    def get_page_end(page: tuple[int, int]) -> int:
+        start, amount = page
+        return min(start + amount * timeframe_ms, until + 1)
+
+    def request_page(page: tuple[int, int]) -> list[list]:
+        start, amount = page
+        rate_limiter.wait()
+        return exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=start, limit=amount)
+
+    def filter_page(page: tuple[int, int], ohlcv: list[list]) -> list[list]:
+        # Exchange skips missing candles and continues with the next ones, which belong to the following page
+        start, _ = page
+        end = get_page_end(page)
+        return [candle for candle in ohlcv if start <= candle[0] < end]
+
+    def fetch_page(page: tuple[int, int]) -> list[list]:
+        return filter_page(page, request_page(page))
+
+    def is_stored(page: tuple[int, int]) -> bool:
+        # Only a page with all its candles stored is served from the store. Pages with candles missing on the exchange
+        # itself are downloaded again every time, which is rare and cheaper than tracking what the exchange lacks.
+        start, amount = page
+        return use_store and count_stored_candles(symbol, timeframe, start, get_page_end(page) - 1) == amount
+
+    # The store is read and written only by this (consumer) thread, download threads never touch the database
+    def load_page(page: tuple[int, int]) -> list[list]:
+        start, _ = page
+        return load_stored_candles(symbol, timeframe, start, get_page_end(page) - 1)
+
+    def save_page(ohlcv: list[list]) -> list[list]:
+        if use_store:
+            store_candles(symbol, timeframe, ohlcv, timeframe_ms, now)
+        return ohlcv
+
+    def get_page(item) -> list[list]:
+        # Item of the pending queue, a stored page or the future of a page being downloaded
+        return save_page(item.result()) if isinstance(item, Future) else load_page(item)
+
+    if not is_stored(pages[0]):
+        # First page is requested alone. If the range starts before the symbol was listed, the exchange answers with
+        # the first candles after the listing, and the range continues from there instead of requesting every empty page.
+        ohlcv = request_page(pages[0])
+        if not ohlcv:
+            return  # No candles from the start of the range until now
+
+        if ohlcv[0][0] >= get_page_end(pages[0]):
+            pages = get_page_starts(ohlcv[0][0], until, timeframe_ms, page_limit)
+            if not pages:
+                return
+
+        yield save_page(filter_page(pages[0], ohlcv))
+        pages = pages[1:]
+
+    if len(pages) <= 1:
+        for page in pages:
+            yield load_page(page) if is_stored(page) else save_page(fetch_page(page))
+        return
+
+    workers = min(max_workers, len(pages))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        downloading = 0
+        try:
+            for page in pages:
+                if is_stored(page):
+                    pending.append(page)
+                else:
+                    pending.append(executor.submit(fetch_page, page))
+                    downloading += 1
+
+                # Stored pages are yielded right away, downloads wait until {workers} of them are in flight
+                while pending and (not isinstance(pending[0], Future) or downloading >= workers):
+                    item = pending.popleft()
+                    downloading -= isinstance(item, Future)
+                    yield get_page(item)
+
+            while pending:
+                yield get_page(pending.popleft())
+        finally:
+            # Consumer stopped early (e.g. client disconnected), don't download the rest
+            for item in pending:
+                if isinstance(item, Future):
+                    item.cancel()
+
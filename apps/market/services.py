@@ -1,10 +1,46 @@
-import ccxt
 from datetime import datetime, timezone
+from functools import lru_cache
 
-exchange = ccxt.binance({"enableRateLimit": True})
+from apps.market import candle_store, range_downloader
+from apps.market.candle_series import CandleSeries
+from apps.market.market_metadata import MarketMetadataCache
+from apps.market.ticker_cache import TickerCache
+from apps.market.ticker_snapshot import TickerSnapshotRefresher
 
 
-def get_binance_ohlcv_and_timestamp(coin: str, interval: str, candle_amount: int = 500, start_date: str = None):
+@lru_cache(maxsize=None)
+def get_market_metadata() -> MarketMetadataCache:
+    """
+    Market metadata of the shared Binance client. The client is created on first use,
+    so importing this module (e.g. by management commands) does not load ccxt.
+    """
+    import ccxt
+
+    return MarketMetadataCache(ccxt.binance({"enableRateLimit": True}))
+
+
+def get_exchange():
+    """
+    Shared Binance client, with market metadata loaded from the shared store instead of being downloaded by ccxt.
+    """
+    market_metadata = get_market_metadata()
+    market_metadata.get_markets()
+    return market_metadata.exchange
+
+
+@lru_cache(maxsize=None)
+def get_ticker_snapshots() -> TickerSnapshotRefresher:
+    return TickerSnapshotRefresher(get_exchange())
+
+
+@lru_cache(maxsize=None)
+def get_ticker_cache() -> TickerCache:
+    return TickerCache(get_exchange())
+
+
+def get_binance_ohlcv_and_timestamp(
+    coin: str, interval: str, candle_amount: int = 500, start_date: str = None, as_series: bool = False
+):
     """
     Fetch latest data for a given coin and interval from Binance using CCXT.
 
@@ -13,6 +49,7 @@ def get_binance_ohlcv_and_timestamp(coin: str, interval: str, candle_amount: int
         interval (str): Time interval, e.g., '1h', '1d'
         candle_amount (int): Number of candles to fetch, default is 500
         start_date (str): Optional start date in ISO format, e.g., '2023-01-01T00:00:00Z'. If not provided, fetches the most recent candles.
+        as_series (bool): If True, candles are returned as a columnar CandleSeries instead of a list of dicts.
 
     Returns:
         dict: Basic info (open_time, open, high, low, close, volume, close_time) for the latest {candle_amount} candles
@@ -32,12 +69,20 @@ def get_binance_ohlcv_and_timestamp(coin: str, interval: str, candle_amount: int
     if start_date:
         since = int(start_date.timestamp() * 1000)
     
-    ohlcv = exchange.fetch_ohlcv(
-        coin.upper(), timeframe=interval, since=since, limit=int(candle_amount)
+    exchange = get_exchange()
+
+    # Closed candles are served from the local store, only the missing ones are downloaded
+    ohlcv = candle_store.fetch_ohlcv(
+        exchange, coin.upper(), interval, since=since, limit=int(candle_amount)
     )
 
     if not ohlcv:
         return None
+
+    if as_series:
+        return CandleSeries.from_ohlcv(ohlcv, exchange.parse_timeframe(interval) * 1000)
+
+    timeframe_seconds = exchange.parse_timeframe(interval)
     candles = []
 
     for candle in ohlcv:
@@ -45,7 +90,7 @@ def get_binance_ohlcv_and_timestamp(coin: str, interval: str, candle_amount: int
             {
                 "open_time": datetime.fromtimestamp(candle[0] / 1000, tz=timezone.utc),
                 "close_time": datetime.fromtimestamp(
-                    candle[0] / 1000 + exchange.parse_timeframe(interval) * 1000,
+                    candle[0] / 1000 + timeframe_seconds,
                     tz=timezone.utc
                 ),
                 "open": candle[1],
@@ -116,7 +161,9 @@ def get_binance_ohlcv_range(coin: str, interval: str, start_date: str, end_date:
     ]
 
 
-def get_binance_ohlcv_and_timestamp_range(coin: str, interval: str, start_date: str, end_date: str):
+def get_binance_ohlcv_and_timestamp_range(
+    coin: str, interval: str, start_date: str, end_date: str, as_series: bool = False
+):
     """
     Get OHLCV data with timestamps for a coin and interval from Binance using CCXT within a specified date range.
     
@@ -125,44 +172,41 @@ def get_binance_ohlcv_and_timestamp_range(coin: str, interval: str, start_date:
         interval (str): Time interval, e.g., '1h', '1d'
         start_date (str): Start date in ISO format, e.g., '2023-01-01T00:00:00Z'
         end_date (str): End date in ISO format, e.g., '2023-01-31T23:59:59Z'
+        as_series (bool): If True, candles are returned as a columnar CandleSeries instead of a list of dicts.
 
     Returns:
         list: List of OHLCV data points with timestamps within the specified date range
     """
+    if as_series:
+        exchange, pages = _iter_ohlcv_range_pages(coin, interval, start_date, end_date)
+        return CandleSeries.from_ohlcv(
+            [candle for page in pages for candle in page], exchange.parse_timeframe(interval) * 1000
+        )
 
-    coin = format_coin_symbol(coin)
-
-    if not check_interval(interval):
-        raise ValueError("Invalid interval format. Accessible intervals: 1s, 1m, 3m, 5m, 15m, 30m, 1h, 2h, 4h, 6h, 8h, 12h, 1d, 3d, 1w")
-
-    since = int(start_date.timestamp() * 1000)
-    all_candles = []    
-
-    # Binance API returns a maximum of 1000 candles per request, so we need to loop until we get all candles in the specified date range
-    while True:
-        ohlcv = exchange.fetch_ohlcv(coin.upper(), timeframe=interval, since=since, limit=1000)
-
-        if not ohlcv:
-            break
-
-        for candle in ohlcv:
-            candle_time = candle[0]
-
-            if candle_time > int(end_date.timestamp() * 1000):
-                break
+    return [
+        candle
+        for page in iter_binance_ohlcv_and_timestamp_range(coin, interval, start_date=start_date, end_date=end_date)
+        for candle in page
+    ]
 
-            all_candles.append(candle)
 
-        since = ohlcv[-1][0] + 1  # move forward
+def iter_binance_ohlcv_and_timestamp_range(coin: str, interval: str, start_date: str, end_date: str):
+    """
+    Same as get_binance_ohlcv_and_timestamp_range, but returns an iterator of pages (lists of candles in chronological order),
+    each yielded as soon as it is downloaded. Arguments are validated immediately, before the first page is requested.
 
-    formatted_candles = []
+    Returns:
+        Iterator[list[dict]]: Pages of OHLCV data points with timestamps within the specified date range
+    """
+    exchange, pages = _iter_ohlcv_range_pages(coin, interval, start_date, end_date)
+    timeframe_seconds = exchange.parse_timeframe(interval)
 
-    for candle in all_candles:
-        formatted_candles.append(
+    return (
+        [
             {
                 "open_time": datetime.fromtimestamp(candle[0] / 1000, tz=timezone.utc),
                 "close_time": datetime.fromtimestamp(
-                    candle[0] / 1000 + exchange.parse_timeframe(interval),
+                    candle[0] / 1000 + timeframe_seconds,
                     tz=timezone.utc
                 ),
                 "open": candle[1],
@@ -171,13 +215,30 @@ def get_binance_ohlcv_and_timestamp_range(coin: str, interval: str, start_date:
                 "close": candle[4],
                 "volume": candle[5],
             }
-        )
+            for candle in page
+        ]
+        for page in pages
+    )
 
-    return formatted_candles
+
+def _iter_ohlcv_range_pages(coin, interval, start_date, end_date):
+    coin = format_coin_symbol(coin)
+
+    if not check_interval(interval):
+        raise ValueError("Invalid interval format. Accessible intervals: 1s, 1m, 3m, 5m, 15m, 30m, 1h, 2h, 4h, 6h, 8h, 12h, 1d, 3d, 1w")
+
+    since = int(start_date.timestamp() * 1000)
+    until = int(end_date.timestamp() * 1000)
+
+    exchange = get_exchange()
+
+    # Pages of the range are known up front, so they are downloaded concurrently
+    return exchange, range_downloader.iter_ohlcv_range_pages(exchange, coin.upper(), interval, since, until)
 
 def format_coin_symbol(coin: str):
     """
-    Format a coin symbol to match Binance's format (e.g., 'BTCUSDT').
+    Format a coin symbol to match Binance's format (e.g., 'BTC/USDT').
+    Symbols are looked up in the exchange market metadata, unknown ones are guessed from the suffix.
 
     Args:
         coin (str): Coin symbol, e.g., 'BTC/USDT', 'BTCUSDT', 'BTC' etc.
@@ -185,6 +246,10 @@ def format_coin_symbol(coin: str):
     Returns:
         str: Formatted coin symbol, e.g., 'BTC/USDT'
     """
+    symbol = get_market_metadata().get_symbol_index().normalize(coin)
+    if symbol:
+        return symbol
+
     if not coin.endswith("USDT") and not coin.endswith("USDC") and not coin.endswith("BUSD"):
         return f"{coin.upper()}/USDT"
     
@@ -214,6 +279,12 @@ def calculate_start_and_end_dates(candles: list[dict]):
     if not candles:
         return None, None
 
+    if isinstance(candles, CandleSeries):
+        start_date = datetime.fromtimestamp(int(candles.open_time.min()) / 1000, tz=timezone.utc)
+        close_time = candles.close_time if candles.close_time is not None else candles.open_time
+        end_date = datetime.fromtimestamp(int(close_time.max()) / 1000, tz=timezone.utc)
+        return start_date, end_date
+
     start_date = min(candle["open_time"] for candle in candles)
     end_date = max(candle["close_time"] for candle in candles)
 
@@ -229,7 +300,7 @@ def get_live_binance_price(coin: str):
     Returns:
         float: Current price of the coin
     """
-    ticker = exchange.fetch_ticker(coin.upper())
+    ticker = get_ticker_cache().get_ticker(coin.upper())
     return ticker["last"] if "last" in ticker else None
 
 
@@ -242,7 +313,7 @@ def get_live_binance_change(coin: str):
     Returns:
         float: 24-hour price change of the coin
     """
-    ticker = exchange.fetch_ticker(coin.upper())
+    ticker = get_ticker_cache().get_ticker(coin.upper())
     return ticker["change"] if "change" in ticker else None
 
 
@@ -254,11 +325,17 @@ def get_market_summary(coin_list: list[str]):
         coin_list (list[str]): List of symbols, e.g., ['BTC/USDT', 'ETH/USDT']
 
     Returns:
-        dict: Market summary including current price and 24-hour change for each coin
+        dict: Market summary including current price and 24-hour change for each coin, coins without a ticker are left out
     """
+    symbols = {coin: format_coin_symbol(coin) for coin in coin_list}
+    # All coins are fetched in one batch
+    tickers = get_ticker_cache().get_tickers(list(symbols.values()))
+
     summary = {}
-    for coin in coin_list:
-        ticker = exchange.fetch_ticker(coin.upper())
+    for coin, symbol in symbols.items():
+        ticker = tickers.get(symbol)
+        if ticker is None:
+            continue  # No ticker on the exchange, e.g. a delisted coin
         summary[coin] = {
             "current_price": ticker["last"] if "last" in ticker else None,
             "24h_change": ticker["change"] if "change" in ticker else None,
@@ -273,7 +350,7 @@ def get_supported_binance_symbols():
     Returns:
         list: List of supported trading pairs
     """
-    markets = exchange.load_markets()
+    markets = get_market_metadata().get_markets()
     return list(markets.keys())
 
 
@@ -290,52 +367,7 @@ def get_hot_coins(
     Returns:
         list: List of hot coins with their current price, 24-hour change, and volume
     """
-    hot_coins = []
-    markets = exchange.fetch_tickers()
-
-    if not markets:
-        return hot_coins
-
-    # Filter to only USDT pairs
-    markets = {k: v for k, v in markets.items() if k.endswith("/USDT")}
-
-    for ticker, value in markets.items():
-        if "percentage" in value:
-            if value["percentage"] is None:
-                continue
-
-            market = exchange.markets[ticker]
-            spot_url = None
-
-            if not market.get("active", False):
-                continue
-
-            if "spot" in market and market["spot"]:
-                base = market["base"] if "base" in market else "BTC"
-                quote = market["quote"] if "quote" in market else "USDT"
-                spot_url = f"https://www.binance.com/en/trade/{base}_{quote}?type=spot"
-            else:
-                continue
-
-            if (only_positive and value["percentage"] >= threshold_change) or (
-                not only_positive and value["percentage"] <= -threshold_change
-            ):
-                hot_coins.append(
-                    {
-                        "symbol": ticker,
-                        "current_price": value["last"] if "last" in value else None,
-                        "24h_change": (
-                            value["percentage"] if "percentage" in value else None
-                        ),
-                        "volume": (
-                            value["baseVolume"] if "baseVolume" in value else None
-                        ),
-                        "spot_url": spot_url if spot_url else None,
-                    }
-                )
-
-    hot_coins = sorted(hot_coins, key=lambda x: x["24h_change"], reverse=only_positive)[
-        :limit
-    ]
-
-    return hot_coins
+    # Tickers of the whole exchange are refreshed in the background, the query is answered from memory
+    return get_ticker_snapshots().get_snapshot().get_hot_coins(
+        threshold_change=threshold_change, only_positive=only_positive, limit=limit
+    )
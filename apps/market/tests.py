@@ -1,3 +1,622 @@
+import json
+import random
+import time
+
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone as django_timezone
+
+from apps.backtests.models import Asset
+from apps.market import candle_store, services, ticker_cache, ticker_snapshot
+from apps.market.candle_series import COLUMNS
+from apps.market.market_metadata import MarketMetadataCache, SymbolIndex
+from apps.market.models import Candle, MarketMetadata
+from apps.market.range_downloader import download_ohlcv_range, iter_ohlcv_range_pages
+from apps.market.ticker_cache import TickerCache
+from apps.market.ticker_snapshot import TickerSnapshot, TickerSnapshotRefresher
+
+HOUR = 3600 * 1000
+NOW = 10000 * HOUR + HOUR // 2  # In the middle of the open candle 10000
+SYMBOL = "BTC/USDT"
+
+
+class FakeExchange:
+    """
+    Exchange with hourly candles from {listed_at} to now, without the candles in {missing}.
+    Every fetch_ohlcv request is recorded as (since, limit).
+    """
+
+    def __init__(self, now: int = NOW, listed_at: int = 0, missing: set = (), rate_limit: int = 0):
+        self.now = now
+        self.listed_at = listed_at
+        self.missing = set(missing)
+        self.rateLimit = rate_limit
+        self.enableRateLimit = rate_limit > 0
+        self.requests = []
+        self.request_times = []
+
+    def parse_timeframe(self, timeframe: str) -> int:
+        return 3600
+
+    def milliseconds(self) -> int:
+        return self.now
+
+    def candle(self, open_time: int) -> list:
+        price = 100 + open_time // HOUR % 17
+        return [open_time, price, price + 1.5, price - 1.25, price + 0.5, 10.0]
+
+    def fetch_ohlcv(self, symbol, timeframe="1h", since=None, limit=500):
+        self.requests.append((since, limit))
+        self.request_times.append(time.monotonic())
+
+        open_time = max(self.listed_at, -(-since // HOUR) * HOUR)
+        ohlcv = []
+        while open_time <= self.now and len(ohlcv) < min(limit, candle_store.MAX_CANDLES_PER_REQUEST):
+            if open_time not in self.missing:
+                ohlcv.append(self.candle(open_time))
+            open_time += HOUR
+        return ohlcv
+
+
+def store(exchange: FakeExchange, first: int, last: int) -> None:
+    candle_store.store_candles(
+        SYMBOL, "1h", [exchange.candle(i * HOUR) for i in range(first, last + 1)], HOUR, exchange.now
+    )
+
+
+class CandleStoreTests(TestCase):
+    def test_latest_candles_download_only_the_tail(self):
+        exchange = FakeExchange()
+        store(exchange, 9000, 9995)
+
+        ohlcv = candle_store.fetch_ohlcv(exchange, SYMBOL, "1h", limit=100)
+
+        self.assertEqual([candle[0] for candle in ohlcv], [i * HOUR for i in range(9901, 10001)])
+        self.assertEqual(exchange.requests, [(9996 * HOUR, candle_store.MAX_CANDLES_PER_REQUEST)])
+        self.assertEqual(Candle.objects.count(), 1000)  # Open candle 10000 is not stored
+
+    def test_tail_is_clamped_to_the_limit(self):
+        exchange = FakeExchange()
+        store(exchange, 0, 10)  # Stored long ago
+
+        ohlcv = candle_store.fetch_ohlcv(exchange, SYMBOL, "1h", limit=100)
+
+        self.assertEqual([candle[0] for candle in ohlcv], [i * HOUR for i in range(9901, 10001)])
+        self.assertEqual(exchange.requests, [(NOW - 100 * HOUR, candle_store.MAX_CANDLES_PER_REQUEST)])
+
+    def test_short_history_falls_back_to_a_download(self):
+        exchange = FakeExchange()
+        store(exchange, 9950, 9990)
+
+        ohlcv = candle_store.fetch_ohlcv(exchange, SYMBOL, "1h", limit=100)
+
+        self.assertEqual([candle[0] for candle in ohlcv], [i * HOUR for i in range(9901, 10001)])
+        self.assertEqual(len(exchange.requests), 2)  # Tail, then the whole fallback download
+
+    def test_gap_in_history_falls_back_to_a_download(self):
+        exchange = FakeExchange()
+        store(exchange, 9800, 9900)
+        store(exchange, 9950, 9990)
+
+        ohlcv = candle_store.fetch_ohlcv(exchange, SYMBOL, "1h", limit=100)
+
+        self.assertEqual([candle[0] for candle in ohlcv], [i * HOUR for i in range(9901, 10001)])
+        self.assertEqual(len(exchange.requests), 2)
+
+    def test_candles_since_are_served_from_the_store(self):
+        exchange = FakeExchange()
+        store(exchange, 5000, 5099)
+
+        ohlcv = candle_store.fetch_ohlcv(exchange, SYMBOL, "1h", since=5000 * HOUR, limit=150)
+
+        self.assertEqual([candle[0] for candle in ohlcv], [i * HOUR for i in range(5000, 5150)])
+        self.assertEqual(exchange.requests, [(5100 * HOUR, 50)])
+
+
+class RangeDownloaderTests(TestCase):
+    def test_range_is_downloaded_once(self):
+        exchange = FakeExchange()
+        since, until = 5000 * HOUR, 5999 * HOUR
+
+        first = download_ohlcv_range(exchange, SYMBOL, "1h", since, until, page_limit=100)
+        requests = len(exchange.requests)
+        second = download_ohlcv_range(exchange, SYMBOL, "1h", since, until, page_limit=100)
+
+        self.assertEqual(requests, 10)
+        self.assertEqual(len(exchange.requests), requests)  # All pages served from the store
+        self.assertEqual(first, second)
+        self.assertEqual([candle[0] for candle in first], [i * HOUR for i in range(5000, 6000)])
+
+    def test_incomplete_pages_are_downloaded_again(self):
+        exchange = FakeExchange()
+        store(exchange, 5000, 5150)
+
+        ohlcv = download_ohlcv_range(exchange, SYMBOL, "1h", 5000 * HOUR, 5299 * HOUR, page_limit=100)
+
+        self.assertEqual([candle[0] for candle in ohlcv], [i * HOUR for i in range(5000, 5300)])
+        self.assertEqual(exchange.requests, [(5100 * HOUR, 100), (5200 * HOUR, 100)])
+
+    def test_range_without_store(self):
+        exchange = FakeExchange()
+
+        download_ohlcv_range(exchange, SYMBOL, "1h", 5000 * HOUR, 5299 * HOUR, page_limit=100, use_store=False)
+
+        self.assertFalse(Candle.objects.exists())
+
+    def test_missing_candles_are_skipped(self):
+        # Around a page boundary and at the start of a page
+        missing = {i * HOUR for i in (5098, 5099, 5100, 5101, 5200)}
+        exchange = FakeExchange(missing=missing)
+
+        pages = list(iter_ohlcv_range_pages(exchange, SYMBOL, "1h", 5000 * HOUR, 5299 * HOUR, page_limit=100, use_store=False))
+
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(
+            [candle[0] for page in pages for candle in page],
+            [i * HOUR for i in range(5000, 5300) if i * HOUR not in missing],
+        )
+
+    def test_range_ends_exactly_at_end_date(self):
+        exchange = FakeExchange()
+
+        ohlcv = download_ohlcv_range(exchange, SYMBOL, "1h", 5000 * HOUR, 5250 * HOUR, page_limit=100, use_store=False)
+        self.assertEqual(ohlcv[-1][0], 5250 * HOUR)
+        self.assertEqual(exchange.requests[-1], (5200 * HOUR, 51))
+
+        ohlcv = download_ohlcv_range(exchange, SYMBOL, "1h", 5000 * HOUR, 5250 * HOUR - 1, page_limit=100, use_store=False)
+        self.assertEqual(ohlcv[-1][0], 5249 * HOUR)
+
+    def test_range_is_clamped_to_now(self):
+        exchange = FakeExchange()
+
+        ohlcv = download_ohlcv_range(exchange, SYMBOL, "1h", 9950 * HOUR, 20000 * HOUR, page_limit=100, use_store=False)
+
+        self.assertEqual(ohlcv[-1][0], 10000 * HOUR)
+        self.assertEqual(len(exchange.requests), 1)
+
+    def test_closing_the_iterator_cancels_the_rest(self):
+        exchange = FakeExchange()
+        pages = iter_ohlcv_range_pages(
+            exchange, SYMBOL, "1h", 5000 * HOUR, 6999 * HOUR, max_workers=2, page_limit=100, use_store=False
+        )
+
+        next(pages)
+        next(pages)
+        pages.close()
+
+        # First page, and the two pages downloaded ahead at most, out of 20
+        self.assertLessEqual(len(exchange.requests), 3)
+
+    def test_requests_are_spaced_by_the_rate_limit(self):
+        exchange = FakeExchange(rate_limit=20)
+
+        download_ohlcv_range(exchange, SYMBOL, "1h", 5000 * HOUR, 5999 * HOUR, max_workers=4, page_limit=100, use_store=False)
+
+        times = sorted(exchange.request_times)
+        self.assertEqual(len(times), 10)
+        # Nine intervals of 20 ms at least, although four threads request at the same time
+        self.assertGreaterEqual(times[-1] - times[0], 9 * 0.02)
+
+    def test_range_starting_before_listing_skips_empty_pages(self):
+        exchange = FakeExchange(listed_at=5550 * HOUR)
+
+        ohlcv = download_ohlcv_range(exchange, SYMBOL, "1h", 5000 * HOUR, 5999 * HOUR, page_limit=100, use_store=False)
+
+        self.assertEqual([candle[0] for candle in ohlcv], [i * HOUR for i in range(5550, 6000)])
+        self.assertEqual(
+            exchange.requests,
+            [(5000 * HOUR, 100), (5650 * HOUR, 100), (5750 * HOUR, 100), (5850 * HOUR, 100), (5950 * HOUR, 50)],
+        )
+
+    def test_range_before_listing(self):
+        exchange = FakeExchange(listed_at=9000 * HOUR)
+
+        ohlcv = download_ohlcv_range(exchange, SYMBOL, "1h", 5000 * HOUR, 5999 * HOUR, page_limit=100, use_store=False)
+
+        self.assertEqual(ohlcv, [])
+        self.assertEqual(len(exchange.requests), 1)
+
+
+class OhlcvServiceTests(TestCase):
+    def setUp(self):
+        for name, value in (("get_exchange", FakeExchange), ("format_coin_symbol", lambda coin: coin)):
+            patcher = mock.patch.object(services, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_close_time_is_one_timeframe_after_open_time(self):
+        candles = services.get_binance_ohlcv_and_timestamp(SYMBOL, "1h", 3)
+        series = services.get_binance_ohlcv_and_timestamp(SYMBOL, "1h", 3, as_series=True)
+
+        self.assertEqual(candles[-1]["open_time"], datetime.fromtimestamp(10000 * 3600, tz=timezone.utc))
+        self.assertEqual(candles[-1]["close_time"], datetime.fromtimestamp(10001 * 3600, tz=timezone.utc))
+        self.assertEqual(
+            [candle["close_time"] for candle in candles],
+            [datetime.fromtimestamp(close_time / 1000, tz=timezone.utc) for close_time in series.close_time.tolist()],
+        )
+
+
+class FakeTickerExchange:
+    """
+    Exchange with a ticker for every symbol in {prices}, recording every fetch_tickers and fetch_ticker request.
+    """
+
+    def __init__(self, prices: dict, bulk: bool = True):
+        self.prices = prices
+        self.has = {"fetchTickers": bulk}
+        self.bulk_requests = []
+        self.requests = []
+
+    def ticker(self, symbol: str) -> dict:
+        return {"symbol": symbol, "last": self.prices[symbol], "change": 1.5}
+
+    def fetch_tickers(self, symbols=None):
+        self.bulk_requests.append(list(symbols))
+        return {symbol: self.ticker(symbol) for symbol in symbols if symbol in self.prices}
+
+    def fetch_ticker(self, symbol):
+        self.requests.append(symbol)
+        return self.ticker(symbol)
+
+
+class TickerCacheTests(TestCase):
+    PRICES = {"BTC/USDT": 60000.0, "ETH/USDT": 3000.0, "SOL/USDT": 150.0}
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(ticker_cache, "time", mock.Mock(monotonic=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_symbols_are_fetched_once_in_one_bulk_request(self):
+        exchange = FakeTickerExchange(self.PRICES)
+        cache = TickerCache(exchange, ttl=5)
+
+        tickers = cache.get_tickers(["BTC/USDT", "ETH/USDT", "BTC/USDT"])
+
+        self.assertEqual(exchange.bulk_requests, [["BTC/USDT", "ETH/USDT"]])
+        self.assertEqual(
+            {symbol: ticker["last"] for symbol, ticker in tickers.items()}, {"BTC/USDT": 60000.0, "ETH/USDT": 3000.0}
+        )
+
+    def test_tickers_are_served_from_the_cache_until_the_ttl_expires(self):
+        exchange = FakeTickerExchange(self.PRICES)
+        cache = TickerCache(exchange, ttl=5)
+
+        cache.get_tickers(["BTC/USDT", "ETH/USDT"])
+        self.now += 4
+        cache.get_ticker("BTC/USDT")
+        cache.get_tickers(["ETH/USDT", "BTC/USDT"])
+        self.assertEqual(len(exchange.bulk_requests), 1)
+        self.assertEqual(exchange.requests, [])
+
+        # Only the missing symbol is fetched
+        cache.get_tickers(["BTC/USDT", "SOL/USDT"])
+        self.assertEqual(exchange.requests, ["SOL/USDT"])
+
+        self.now += 2
+        cache.get_tickers(["BTC/USDT", "ETH/USDT", "SOL/USDT"])
+        self.assertEqual(exchange.bulk_requests[-1], ["BTC/USDT", "ETH/USDT"])  # SOL/USDT is still fresh
+
+    def test_exchange_without_bulk_endpoint_fetches_tickers_one_by_one(self):
+        exchange = FakeTickerExchange(self.PRICES, bulk=False)
+        cache = TickerCache(exchange, ttl=5)
+
+        tickers = cache.get_tickers(["BTC/USDT", "ETH/USDT", "SOL/USDT", "ETH/USDT"])
+
+        self.assertEqual(exchange.bulk_requests, [])
+        self.assertEqual(sorted(exchange.requests), ["BTC/USDT", "ETH/USDT", "SOL/USDT"])
+        self.assertEqual(set(tickers), {"BTC/USDT", "ETH/USDT", "SOL/USDT"})
+
+    def test_market_summary_skips_coins_without_a_ticker(self):
+        exchange = FakeTickerExchange(self.PRICES)
+        normalize = {"btcusdt": "BTC/USDT", "ETH": "ETH/USDT", "LUNA": "LUNA/USDT"}
+
+        with (
+            mock.patch.object(services, "get_ticker_cache", return_value=TickerCache(exchange, ttl=5)),
+            mock.patch.object(services, "format_coin_symbol", normalize.get),
+        ):
+            summary = services.get_market_summary(["btcusdt", "ETH", "LUNA"])
+
+        self.assertEqual(exchange.bulk_requests, [["BTC/USDT", "ETH/USDT", "LUNA/USDT"]])
+        self.assertEqual(
+            summary,
+            {
+                "btcusdt": {"current_price": 60000.0, "24h_change": 1.5},
+                "ETH": {"current_price": 3000.0, "24h_change": 1.5},
+            },
+        )
+
+
+def get_hot_coins_by_sort(tickers: dict, markets: dict, threshold_change: float, only_positive: bool, limit: int) -> list:
+    # Filter and full sort of every ticker, as get_hot_coins did before the snapshot
+    hot_coins = []
+    for symbol, ticker in tickers.items():
+        market = markets[symbol]
+        if not symbol.endswith("/USDT") or ticker["percentage"] is None or not market["active"] or not market["spot"]:
+            continue
+        if (only_positive and ticker["percentage"] >= threshold_change) or (
+            not only_positive and ticker["percentage"] <= -threshold_change
+        ):
+            hot_coins.append(
+                {
+                    "symbol": symbol,
+                    "current_price": ticker["last"],
+                    "24h_change": ticker["percentage"],
+                    "volume": ticker["baseVolume"],
+                    "spot_url": f"https://www.binance.com/en/trade/{market['base']}_{market['quote']}?type=spot",
+                }
+            )
+
+    return sorted(hot_coins, key=lambda coin: coin["24h_change"], reverse=only_positive)[:limit]
+
+
+class FakeSnapshotExchange:
+    def __init__(self, tickers: dict, markets: dict):
+        self.tickers = tickers
+        self.markets = markets
+        self.fail = False
+        self.requests = 0
+
+    def fetch_tickers(self):
+        self.requests += 1
+        if self.fail:
+            raise RuntimeError("Exchange is down")
+        return self.tickers
+
+
+class TickerSnapshotTests(TestCase):
+    def _get_market_data(self) -> tuple[dict, dict]:
+        rng = random.Random(4)
+        tickers, markets = {}, {}
+        for i in range(500):
+            quote = rng.choice(["USDT", "USDT", "USDT", "BTC"])
+            symbol = f"C{i}/{quote}"
+            tickers[symbol] = {
+                # Many coins with the same change, their order must not change either
+                "percentage": rng.choice([None, rng.randint(-20, 20), rng.uniform(-20, 20)]),
+                "last": rng.uniform(1, 100),
+                "baseVolume": rng.uniform(1, 1000),
+            }
+            markets[symbol] = {"base": f"C{i}", "quote": quote, "active": rng.random() > 0.1, "spot": rng.random() > 0.1}
+        return tickers, markets
+
+    def test_hot_coins_equal_a_full_sort(self):
+        tickers, markets = self._get_market_data()
+        snapshot = TickerSnapshot(tickers, markets)
+
+        for threshold_change in (0, 5, 12.5, 19, 25):
+            for only_positive in (True, False):
+                for limit in (0, 1, 10, 1000):
+                    with self.subTest(threshold_change=threshold_change, only_positive=only_positive, limit=limit):
+                        self.assertEqual(
+                            snapshot.get_hot_coins(threshold_change, only_positive, limit),
+                            get_hot_coins_by_sort(tickers, markets, threshold_change, only_positive, limit),
+                        )
+
+    def test_failed_refresh_serves_the_previous_snapshot(self):
+        tickers, markets = self._get_market_data()
+        exchange = FakeSnapshotExchange(tickers, markets)
+        refresher = TickerSnapshotRefresher(exchange, interval=10)
+
+        with mock.patch.object(TickerSnapshotRefresher, "_start"):  # No background thread
+            first = refresher.get_snapshot()
+            self.assertIs(refresher.get_snapshot(), first)
+            self.assertEqual(exchange.requests, 1)
+
+            # Up to three intervals old, the background refresh is waited for
+            first.created_at -= 29
+            self.assertIs(refresher.get_snapshot(), first)
+            self.assertEqual(exchange.requests, 1)
+
+            # Older, it is refreshed by the request. If that fails, the old one is still served.
+            first.created_at -= 2
+            exchange.fail = True
+            with self.assertLogs(ticker_snapshot.logger, "WARNING"):
+                self.assertIs(refresher.get_snapshot(), first)
+            self.assertEqual(exchange.requests, 2)
+
+            exchange.fail = False
+            second = refresher.get_snapshot()
+            self.assertIsNot(second, first)
+            self.assertEqual(exchange.requests, 3)
+
+    def test_first_snapshot_failure_is_raised(self):
+        exchange = FakeSnapshotExchange({}, {})
+        exchange.fail = True
+
+        with mock.patch.object(TickerSnapshotRefresher, "_start"), self.assertRaises(RuntimeError):
+            TickerSnapshotRefresher(exchange, interval=10).get_snapshot()
+
+
+MARKETS = {
+    "BTC/USDT": {"id": "BTCUSDT", "spot": True},
+    "ETH/BTC": {"id": "ETHBTC", "spot": True},
+    "BTC/USDT:USDT": {"id": "BTCUSDT", "spot": False},
+}
+
+
+class FakeMetadataExchange:
+    id = "binance"
+
+    def __init__(self, markets: dict = MARKETS):
+        self.remote_markets = markets
+        self.markets = None
+        self.fail = False
+        self.requests = 0
+
+    def load_markets(self, reload=False):
+        self.requests += 1
+        if self.fail:
+            raise RuntimeError("Exchange is down")
+        self.markets = self.remote_markets
+        return self.markets
+
+    def set_markets(self, markets):
+        self.markets = markets
+
+
+class MarketMetadataTests(TestCase):
+    def test_symbols_are_normalized_to_spot_markets(self):
+        index = SymbolIndex(MARKETS)
+
+        for coin, symbol in (
+            ("BTC/USDT", "BTC/USDT"),
+            ("btcusdt", "BTC/USDT"),
+            (" btc ", "BTC/USDT"),
+            ("ETHBTC", "ETH/BTC"),
+            ("eth/btc", "ETH/BTC"),
+            ("DOGE", None),
+            ("BTC/USDT:USDT", None),
+        ):
+            with self.subTest(coin=coin):
+                self.assertEqual(index.normalize(coin), symbol)
+
+    def test_markets_are_loaded_from_memory_then_database_then_exchange(self):
+        exchange = FakeMetadataExchange()
+        cache = MarketMetadataCache(exchange, ttl=3600)
+
+        self.assertEqual(cache.get_markets(), MARKETS)
+        cache.get_markets()
+        self.assertEqual(exchange.requests, 1)
+        self.assertEqual(MarketMetadata.objects.get(exchange="binance").markets, MARKETS)
+
+        # New worker reads the stored metadata, without a request
+        other_exchange = FakeMetadataExchange()
+        other = MarketMetadataCache(other_exchange, ttl=3600)
+        self.assertEqual(other.get_symbol_index().normalize("btc"), "BTC/USDT")
+        self.assertEqual(other_exchange.requests, 0)
+        self.assertEqual(other_exchange.markets, MARKETS)
+
+    def test_stored_markets_are_used_when_the_download_fails(self):
+        MarketMetadata.objects.create(
+            exchange="binance", markets=MARKETS, fetched_at=django_timezone.now() - timedelta(hours=2)
+        )
+        exchange = FakeMetadataExchange(markets={})
+        exchange.fail = True
+        cache = MarketMetadataCache(exchange, ttl=3600)
+
+        with self.assertLogs("apps.market.market_metadata", "WARNING"):
+            self.assertEqual(cache.get_markets(), MARKETS)
+        self.assertEqual(exchange.requests, 1)
+        self.assertEqual(exchange.markets, MARKETS)
+
+        exchange.fail = False
+        self.assertEqual(cache.get_markets(), {})  # Expired, downloaded again on the next call
+
+    def test_download_failure_without_stored_markets_is_raised(self):
+        exchange = FakeMetadataExchange()
+        exchange.fail = True
+
+        with self.assertRaises(RuntimeError):
+            MarketMetadataCache(exchange, ttl=3600).get_markets()
+
+
+class FailingExchange(FakeExchange):
+    """
+    Exchange failing every request after the first {requests} ones.
+    """
+
+    def __init__(self, requests: int = 1, **kwargs):
+        super().__init__(**kwargs)
+        self.allowed_requests = requests
+
+    def fetch_ohlcv(self, symbol, timeframe="1h", since=None, limit=500):
+        if len(self.requests) >= self.allowed_requests:
+            raise RuntimeError("Exchange is down")
+        return super().fetch_ohlcv(symbol, timeframe, since, limit)
+
+
+class CandleViewTests(TestCase):
+    START = datetime.fromtimestamp(5000 * 3600, tz=timezone.utc)
+    END = datetime.fromtimestamp(7499 * 3600, tz=timezone.utc)
+
+    def setUp(self):
+        self.asset = Asset.objects.create(symbol=SYMBOL, name="Bitcoin")
+        self.exchange = FakeExchange()
+        for name, value in (("get_exchange", lambda: self.exchange), ("format_coin_symbol", lambda coin: coin)):
+            patcher = mock.patch.object(services, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _post_range(self, payload: dict = None, **headers):
+        return self.client.post(
+            reverse("token-candles-in-range", args=[self.asset.id]),
+            {"interval": "1h", "start_date": self.START.isoformat(), "end_date": self.END.isoformat(), **(payload or {})},
+            content_type="application/json",
+            headers=headers,
+        )
+
+    def test_range_is_streamed_as_ndjson(self):
+        for payload, headers in (({"format": "ndjson"}, {}), ({}, {"Accept": "application/x-ndjson"})):
+            with self.subTest(payload=payload, headers=headers):
+                response = self._post_range(payload, **headers)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Content-Type"], "application/x-ndjson")
+                lines = b"".join(response.streaming_content).decode().splitlines()
+                candles = [json.loads(line) for line in lines]
+
+                self.assertEqual(len(candles), 2500)
+                self.assertEqual(candles[0]["open_time"], self.START.isoformat().replace("+00:00", "Z"))
+                self.assertEqual(candles[-1]["open_time"], self.END.isoformat().replace("+00:00", "Z"))
+                self.assertEqual(
+                    [candle["close"] for candle in candles],
+                    [self.exchange.candle(i * HOUR)[4] for i in range(5000, 7500)],
+                )
+
+    def test_failure_while_streaming_is_the_last_line(self):
+        self.exchange = FailingExchange(requests=1)
+
+        response = self._post_range({"format": "ndjson"})
+
+        with self.assertLogs("apps.market.api.views", "ERROR"):
+            lines = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(lines), candle_store.MAX_CANDLES_PER_REQUEST + 1)  # First page, then the error
+        self.assertEqual(json.loads(lines[-1]), {"status": "error", "message": "Error: Exchange is down"})
+
+    def _get_expected_columns(self, first: int, last: int) -> dict:
+        ohlcv = [self.exchange.candle(i * HOUR) for i in range(first, last + 1)]
+        return {name: [candle[i] for candle in ohlcv] for i, name in enumerate(COLUMNS)}
+
+    def test_range_as_columns(self):
+        response = self._post_range({"format": "columnar"})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["format"], "columnar")
+        self.assertEqual(data["candles"], self._get_expected_columns(5000, 7499))
+
+    def test_range_as_packed_float64(self):
+        response = self._post_range(Accept="application/octet-stream")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/octet-stream")
+        self.assertEqual(response["X-Candle-Columns"], ",".join(COLUMNS))
+        self.assertEqual(response["X-Candle-Count"], "2500")
+
+        columns = np.frombuffer(response.content, dtype="<f8").reshape(len(COLUMNS), 2500)
+        self.assertEqual(
+            {name: column.tolist() for name, column in zip(COLUMNS, columns)}, self._get_expected_columns(5000, 7499)
+        )
+
+    def test_latest_candles_as_packed_float64(self):
+        response = self.client.post(
+            reverse("token-candles", args=[self.asset.id]),
+            {"interval": "1h", "candle_amount": 50},
+            content_type="application/json",
+            headers={"Accept": "application/octet-stream"},
+        )
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Candle-Count"], "50")
+        columns = np.frombuffer(response.content, dtype="<f8").reshape(len(COLUMNS), 50)
+        self.assertEqual(
+            {name: column.tolist() for name, column in zip(COLUMNS, columns)}, self._get_expected_columns(9951, 10000)
+        )
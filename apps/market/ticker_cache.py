@@ -0,0 +1,81 @@
+"""
+Short-lived per-symbol ticker cache with batched fetching.
+
+A set of symbols is resolved with one bulk `fetch_tickers` request (or concurrent `fetch_ticker` requests if the exchange
+has no bulk endpoint). Fetched tickers are kept for TICKER_CACHE_TTL seconds, so e.g. the live price and the 24h change
+of the same coin share a single request.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+DEFAULT_TTL = 5  # seconds
+MAX_WORKERS = 8
+
+
+class TickerCache:
+    def __init__(self, exchange, ttl: float = None):
+        """
+        Args:
+            exchange: ccxt exchange instance
+            ttl (float): How long a fetched ticker is served from the cache, in seconds. Defaults to settings.TICKER_CACHE_TTL.
+        """
+        self.exchange = exchange
+        self.ttl = ttl if ttl is not None else getattr(settings, "TICKER_CACHE_TTL", DEFAULT_TTL)
+        self.tickers = {}  # symbol -> (fetched_at, ticker)
+        self.lock = threading.Lock()
+
+    def get_ticker(self, symbol: str) -> dict:
+        return self.get_tickers([symbol])[symbol]
+
+    def get_tickers(self, symbols: list[str]) -> dict[str, dict]:
+        """
+        Return tickers of the given symbols, fetching only the ones missing in the cache, in a single batch.
+
+        Args:
+            symbols (list[str]): Symbols in exchange format, e.g. ['BTC/USDT', 'ETH/USDT']. Duplicates are fetched once.
+
+        Returns:
+            dict[str, dict]: {symbol: ticker}
+        """
+        symbols = list(dict.fromkeys(symbols))
+        result = self._get_cached(symbols)
+
+        missing = [symbol for symbol in symbols if symbol not in result]
+        if missing:
+            # Requests for the same symbols wait for the running fetch instead of sending their own
+            with self.lock:
+                result.update(self._get_cached(missing))
+                missing = [symbol for symbol in missing if symbol not in result]
+
+                if missing:
+                    fetched = self._fetch(missing)
+                    now = time.monotonic()
+                    for symbol, ticker in fetched.items():
+                        self.tickers[symbol] = (now, ticker)
+                    result.update(fetched)
+
+        return result
+
+    def _get_cached(self, symbols: list[str]) -> dict[str, dict]:
+        now = time.monotonic()
+        cached = {}
+        for symbol in symbols:
+            entry = self.tickers.get(symbol)
+            if entry is not None and now - entry[0] < self.ttl:
+                cached[symbol] = entry[1]
+        return cached
+
+    def _fetch(self, symbols: list[str]) -> dict[str, dict]:
+        if len(symbols) > 1 and getattr(self.exchange, "has", {}).get("fetchTickers"):
+            tickers = self.exchange.fetch_tickers(symbols)
+            return {symbol: tickers[symbol] for symbol in symbols if symbol in tickers}
+
+        if len(symbols) == 1:
+            return {symbols[0]: self.exchange.fetch_ticker(symbols[0])}
+
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(symbols))) as executor:
+            return dict(zip(symbols, executor.map(self.exchange.fetch_ticker, symbols)))
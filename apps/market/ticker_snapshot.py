@@ -0,0 +1,150 @@
+"""
+In-memory snapshot of all exchange tickers.
+
+Fetching every ticker of the exchange is expensive, so it is done by a background thread every TICKER_SNAPSHOT_INTERVAL seconds
+instead of on every request. Each snapshot is indexed by quote asset and sorted by 24h percentage change once in both directions,
+so hot-coin queries only bisect the threshold and take the top {limit} coins.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_right
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 30  # seconds
+
+
+class TickerSnapshot:
+    def __init__(self, tickers: dict, markets: dict, created_at: float = None):
+        """
+        Args:
+            tickers (dict): Result of exchange.fetch_tickers(), {symbol: ticker}
+            markets (dict): exchange.markets, {symbol: market}
+            created_at (float): time.monotonic() of the fetch
+        """
+        self.tickers = tickers
+        self.created_at = time.monotonic() if created_at is None else created_at
+
+        by_quote = {}
+        for symbol, ticker in tickers.items():
+            percentage = ticker.get("percentage")
+            if percentage is None:
+                continue
+
+            market = markets.get(symbol)
+            if not market or not market.get("active", False) or not market.get("spot"):
+                continue
+
+            base = market.get("base", "BTC")
+            quote = market.get("quote", "USDT")
+            coin = {
+                "symbol": symbol,
+                "current_price": ticker.get("last"),
+                "24h_change": percentage,
+                "volume": ticker.get("baseVolume"),
+                "spot_url": f"https://www.binance.com/en/trade/{base}_{quote}?type=spot",
+            }
+            by_quote.setdefault(quote, []).append((percentage, coin))
+
+        # quote -> (percentages ascending, coins in the same order, negated percentages descending, coins in the same order)
+        # Both orders are stable sorts, so coins with the same change keep the order of the tickers in both directions
+        self.by_quote = {}
+        for quote, items in by_quote.items():
+            ascending = sorted(items, key=lambda item: item[0])
+            descending = sorted(items, key=lambda item: item[0], reverse=True)
+            self.by_quote[quote] = (
+                [item[0] for item in ascending],
+                [item[1] for item in ascending],
+                [-item[0] for item in descending],
+                [item[1] for item in descending],
+            )
+
+    def get_hot_coins(
+        self, threshold_change: float = 5.0, only_positive: bool = False, limit: int = 10, quote: str = "USDT"
+    ) -> list[dict]:
+        """
+        Coins with 24h change >= threshold_change (only_positive) or <= -threshold_change, biggest moves first.
+        """
+        if quote not in self.by_quote:
+            return []
+        percentages, coins, negated_percentages, descending_coins = self.by_quote[quote]
+
+        if only_positive:
+            end = min(bisect_right(negated_percentages, -threshold_change), limit)
+            selected = descending_coins[:end]
+        else:
+            end = min(bisect_right(percentages, -threshold_change), limit)
+            selected = coins[:end]
+
+        return [dict(coin) for coin in selected]
+
+    def get_age(self) -> float:
+        return time.monotonic() - self.created_at
+
+
+class TickerSnapshotRefresher:
+    """
+    Keeps the latest TickerSnapshot of the exchange, refreshed by a daemon thread started on first use.
+    """
+
+    def __init__(self, exchange, interval: float = None):
+        """
+        Args:
+            exchange: ccxt exchange instance
+            interval (float): Refresh interval in seconds, defaults to settings.TICKER_SNAPSHOT_INTERVAL
+        """
+        self.exchange = exchange
+        self.interval = interval or getattr(settings, "TICKER_SNAPSHOT_INTERVAL", DEFAULT_INTERVAL)
+        self.snapshot = None
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def get_snapshot(self) -> TickerSnapshot:
+        """
+        Return the latest snapshot. If there is none yet, or the background refresh has fallen behind, it is fetched now.
+        """
+        self._start()
+
+        snapshot = self.snapshot
+        if snapshot is None or snapshot.get_age() > 3 * self.interval:
+            with self.lock:
+                # Another request may have refreshed it while waiting for the lock
+                if self.snapshot is snapshot:
+                    try:
+                        self.refresh()
+                    except Exception:
+                        if snapshot is None:
+                            raise
+                        logger.warning("Ticker snapshot refresh failed, serving the old one", exc_info=True)
+            snapshot = self.snapshot
+
+        return snapshot
+
+    def refresh(self) -> TickerSnapshot:
+        tickers = self.exchange.fetch_tickers()
+        self.snapshot = TickerSnapshot(tickers or {}, self.exchange.markets or {})
+        return self.snapshot
+
+    def _start(self) -> None:
+        if self.thread is not None and self.thread.is_alive():
+            return
+
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="ticker-snapshot", daemon=True)
+                self.thread.start()
+
+    def _run(self) -> None:
+        # The first snapshot is fetched by the request which started the thread
+        while True:
+            time.sleep(self.interval)
+
+            try:
+                with self.lock:
+                    self.refresh()
+            except Exception:
+                logger.warning("Ticker snapshot refresh failed", exc_info=True)
@@ -1,4 +1,24 @@
-from apps.strategies.services.atomic_strategies.rsi_strategy import RSIStrategy
-from apps.strategies.services.atomic_strategies.sma_strategy import SMAStrategy
-from apps.strategies.services.atomic_strategies.arima_strategy import ARIMAStrategy
-from apps.strategies.services.atomic_strategies.macd_strategy import MACDStrategy
+import importlib
+
+# Atomic strategies are imported on first use, not with the app, because they load pandas and the exchange client.
+# IndicatorStrategy and PredictionModelStrategy find them by their subclasses, see load_strategies.
+STRATEGY_MODULES = {
+    "RSIStrategy": "apps.strategies.services.atomic_strategies.rsi_strategy",
+    "SMAStrategy": "apps.strategies.services.atomic_strategies.sma_strategy",
+    "ARIMAStrategy": "apps.strategies.services.atomic_strategies.arima_strategy",
+    "MACDStrategy": "apps.strategies.services.atomic_strategies.macd_strategy",
+}
+
+
+def load_strategies() -> None:
+    """
+    Import all atomic strategies, so they are registered as subclasses of IndicatorStrategy / PredictionModelStrategy.
+    """
+    for module in STRATEGY_MODULES.values():
+        importlib.import_module(module)
+
+
+def __getattr__(name):
+    if name in STRATEGY_MODULES:
+        return getattr(importlib.import_module(STRATEGY_MODULES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
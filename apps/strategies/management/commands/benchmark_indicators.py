@@ -0,0 +1,83 @@
+import math
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.strategies.services.base.base_indicator import BaseIndicator
+from apps.strategies.services.indicators.rsi_indicator import RSIIndicator
+from apps.strategies.services.indicators.sma_indicator import SMAIndicator
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark of SMA and RSI get_list_from_candles against recalculating every candle prefix. "
+        "Uses generated candles, no market data is downloaded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--candles", type=int, default=2000, help="Number of candles (default 2000)")
+        parser.add_argument(
+            "--min-speedup",
+            type=float,
+            default=None,
+            help="Fail if any indicator is less than this many times faster than the prefix recalculation",
+        )
+
+    def handle(self, *args, **options):
+        candles = self._generate_candles(options["candles"])
+
+        benchmarks = [
+            ("SMA(30)", SMAIndicator(window=30), (30,)),
+            ("RSI(14)", RSIIndicator(period=14), ()),
+        ]
+
+        slow_indicators = []
+        for name, indicator, params in benchmarks:
+            start = time.perf_counter()
+            values = indicator.get_list_from_candles(candles, *params)
+            list_time = time.perf_counter() - start
+
+            # Reference: calculate() on every prefix, which is how the lists used to be built
+            start = time.perf_counter()
+            expected = BaseIndicator.calculate_series(indicator, candles, *params).tolist()
+            prefix_time = time.perf_counter() - start
+
+            # calculate() returns -1 where the list has None padding
+            if [-1 if value is None else value for value in values] != expected:
+                raise CommandError(f"{name}: get_list_from_candles does not match the prefix calculation")
+
+            speedup = prefix_time / list_time if list_time else math.inf
+            self.stdout.write(
+                f"{name}: {len(candles)} candles, get_list_from_candles {list_time * 1000:.1f} ms, "
+                f"prefix recalculation {prefix_time * 1000:.1f} ms, speedup {speedup:.0f}x"
+            )
+
+            if options["min_speedup"] is not None and speedup < options["min_speedup"]:
+                slow_indicators.append(name)
+
+        if slow_indicators:
+            raise CommandError(
+                f"Speedup below {options['min_speedup']}x for: {', '.join(slow_indicators)}"
+            )
+
+    @staticmethod
+    def _generate_candles(amount: int) -> list[dict]:
+        rng = random.Random(0)
+        price = 100.0
+        candles = []
+
+        for _ in range(amount):
+            close = price * math.exp(rng.gauss(0, 0.01))
+            candles.append(
+                {
+                    "open": price,
+                    "high": max(price, close) * 1.002,
+                    "low": min(price, close) * 0.998,
+                    "close": close,
+                    "volume": rng.random() * 100,
+                }
+            )
+            price = close
+
+        return candles
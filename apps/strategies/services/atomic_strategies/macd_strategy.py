@@ -104,6 +104,55 @@ class MACDStrategy(IndicatorStrategy):
         else:
             return ("HOLD", None)
 
+    def get_indicator_nodes(self) -> list[tuple[BaseIndicator, tuple]]:
+        return [(self.macd_indicator, ())]
+
+    def get_signal_list_from_series(self, series, candles_amount) -> list:
+        """
+        Calculate MACD signals for every candle from the MACD series.
+
+        Args:
+            series (list[np.ndarray]): [MACD series with (macd_line, signal_line, histogram) rows]
+            candles_amount (int): Number of candles.
+
+        Returns:
+            list: Signal for each candle in the same format as get_signal_from_candles.
+        """
+        macd_series = series[0]
+        signals = []
+
+        for i in range(candles_amount):
+            if i < self.slow_period:
+                signals.append("NOT ENOUGH DATA")
+                continue
+
+            # Previous candle values, as get_signal_from_candles evaluates candles[:-1]
+            macd_line_1, signal_line_1 = macd_series[i - 1, 0], macd_series[i - 1, 1]
+
+            if macd_line_1 <= signal_line_1:
+                signals.append(("BUY", None))
+            elif macd_line_1 >= signal_line_1:
+                signals.append(("SELL", None))
+            else:
+                signals.append(("HOLD", None))
+
+        return signals
+
+    def get_last_signal_from_series(self, series, candles_amount):
+        """
+        Calculate the MACD signal of the last candle from the MACD values of the previous candle.
+        """
+        if candles_amount - 1 < self.slow_period:
+            return "NOT ENOUGH DATA"
+
+        macd_line_1, signal_line_1 = series[0][-2, 0], series[0][-2, 1]
+
+        if macd_line_1 <= signal_line_1:
+            return ("BUY", None)
+        elif macd_line_1 >= signal_line_1:
+            return ("SELL", None)
+        return ("HOLD", None)
+
     def get_signal_from_coin(self, coin: str, interval: str):
         """
         Calculate MACD crossover signals from a list of OHLCV candles with timestamps.
@@ -1,4 +1,5 @@
 # apps/strategies/strategies/rsi.py
+import numpy as np
 import pandas as pd
 
 from apps.strategies.services.base.base_indicator import BaseIndicator
@@ -93,6 +94,44 @@ class RSIStrategy(IndicatorStrategy):
         else:
             return "HOLD"
 
+    def get_indicator_nodes(self) -> list[tuple[BaseIndicator, tuple]]:
+        return [(self.rsi_indicator, ())]
+
+    def get_signal_list_from_series(self, series, candles_amount) -> list[str]:
+        """
+        Calculate RSI signals for every candle from the RSI series.
+
+        Args:
+            series (list[np.ndarray]): [RSI series]
+            candles_amount (int): Number of candles.
+
+        Returns:
+            list[str]: 'BUY', 'SELL', 'HOLD' or 'NOT ENOUGH DATA' for each candle.
+        """
+        RSI = series[0]
+
+        signals = np.full(candles_amount, "HOLD", dtype=object)
+        signals[RSI < self.oversold] = "BUY"
+        signals[RSI > self.overbought] = "SELL"
+        signals[: self.period - 1] = "NOT ENOUGH DATA"
+
+        return signals.tolist()
+
+    def get_last_signal_from_series(self, series, candles_amount) -> str:
+        """
+        Calculate the RSI signal of the last candle from the last RSI value.
+        """
+        RSI = series[0][-1]
+
+        if candles_amount < self.period:
+            return "NOT ENOUGH DATA"
+        # Same precedence as in get_signal_list_from_series, where SELL is assigned last
+        if RSI > self.overbought:
+            return "SELL"
+        if RSI < self.oversold:
+            return "BUY"
+        return "HOLD"
+
     def get_signal_from_coin(self, coin: str, interval: str):
         """
         Calculate RSI signal from a list of OHLCV candles with timestamps.
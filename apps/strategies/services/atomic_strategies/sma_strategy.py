@@ -1,4 +1,5 @@
 # apps/strategies/strategies/sma.py
+import numpy as np
 import pandas as pd
 
 from apps.strategies.services.base.base_indicator import BaseIndicator
@@ -100,6 +101,46 @@ class SMAStrategy(IndicatorStrategy):
         else:
             return "HOLD"
 
+    def get_indicator_nodes(self) -> list[tuple[BaseIndicator, tuple]]:
+        return [
+            (self.indicator(), (self.short_window,)),
+            (self.indicator(), (self.long_window,)),
+        ]
+
+    def get_signal_list_from_series(self, series, candles_amount) -> list[str]:
+        """
+        Calculate SMA crossover signals for every candle from the short and long SMA series.
+
+        Args:
+            series (list[np.ndarray]): [short SMA series, long SMA series]
+            candles_amount (int): Number of candles.
+
+        Returns:
+            list[str]: 'BUY', 'SELL', 'HOLD' or 'NOT ENOUGH DATA' for each candle.
+        """
+        SMA_short, SMA_long = series
+
+        signals = np.full(candles_amount, "HOLD", dtype=object)
+        signals[SMA_short > SMA_long] = "BUY"
+        signals[SMA_short < SMA_long] = "SELL"
+        signals[: self.long_window - 1] = "NOT ENOUGH DATA"
+
+        return signals.tolist()
+
+    def get_last_signal_from_series(self, series, candles_amount) -> str:
+        """
+        Calculate the SMA crossover signal of the last candle from the last short and long SMA values.
+        """
+        SMA_short, SMA_long = series[0][-1], series[1][-1]
+
+        if candles_amount < self.long_window:
+            return "NOT ENOUGH DATA"
+        if SMA_short > SMA_long:
+            return "BUY"
+        if SMA_short < SMA_long:
+            return "SELL"
+        return "HOLD"
+
     def get_signal_from_coin(self, coin: str, interval: str) -> str:
         """
         Calculate SMA crossover signals from a list of OHLCV candles with timestamps.
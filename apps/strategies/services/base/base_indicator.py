@@ -1,7 +1,11 @@
+import copy
 from abc import ABC, abstractmethod
-from typing import Union
-import ccxt
-import pandas as pd
+from typing import TYPE_CHECKING, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 class BaseIndicator(ABC):
@@ -12,7 +16,7 @@ class BaseIndicator(ABC):
 
     @abstractmethod
     def get_list_from_candles(
-        self, candles: list[dict[str, float]] | pd.DataFrame
+        self, candles: "list[dict[str, float]] | pd.DataFrame"
     ) -> list[float]:
         """
         Return a list of indicator values (e.g., RSI list, SMA list) for given candles.
@@ -47,3 +51,84 @@ class BaseIndicator(ABC):
         Returns a result after indicator's calculations on the set of candles based on indicator's parametrs
         """
         pass
+
+    @abstractmethod
+    def update(
+        self, candle: dict[str, float]
+    ) -> Union[float, tuple[float, ...]]:
+        """
+        Streaming API. Feed the next candle into the indicator's internal state and return the indicator's value for it, in O(1).
+        After feeding candles one by one, the returned value is equal to calculate() over all the candles fed since the last reset().
+
+        Args:
+            candle (dict): OHLCV candle, the one after the previously fed one.
+
+        Returns:
+            float | tuple[float, ...]: Same value as calculate() would return.
+        """
+        pass
+
+    @abstractmethod
+    def reset(self) -> None:
+        """
+        Clear the streaming state, so the next update() starts a new series.
+        """
+        pass
+
+    @abstractmethod
+    def get_state(self) -> dict:
+        """
+        Return the streaming state as plain JSON serializable values, e.g. to store it in a backtest checkpoint.
+        """
+        pass
+
+    @abstractmethod
+    def set_state(self, state: dict) -> None:
+        """
+        Restore a streaming state returned by get_state(), so the next update() continues that series.
+
+        Raises:
+            ValueError: The state does not belong to this indicator
+        """
+        pass
+
+    def streaming(self, *args) -> "BaseIndicator":
+        """
+        Return a new indicator with an empty streaming state, whose update() returns the rows of calculate_series(candles, *args).
+        Default implementation copies the indicator, indicators whose series depends on args should override it.
+
+        Returns:
+            BaseIndicator: Indicator ready to be fed candle by candle.
+        """
+        indicator = copy.copy(self)
+        indicator.reset()
+        return indicator
+
+    def series_key(self, *args) -> tuple:
+        """
+        Identity of the series returned by calculate_series(candles, *args).
+        Indicators with the same key produce the same series, so it is calculated only once per strategy (see IndicatorGraph).
+
+        Returns:
+            tuple: Hashable key made of the indicator class, its public parameters and args.
+        """
+        parameters = tuple(
+            sorted((name, value) for name, value in vars(self).items() if not name.startswith("_"))
+        )
+        return (type(self).__name__, parameters, args)
+
+    def calculate_series(self, candles: list[dict[str, float]], *args) -> np.ndarray:
+        """
+        Returns the result of `calculate` for every prefix of candles, i.e. element i equals calculate(candles[:i + 1], *args).
+        Default implementation recalculates every prefix, indicators should override it with a single pass over the whole series.
+
+        Args:
+            candles (list[dict]): OHLCV candles data.
+
+        Returns:
+            np.ndarray: One row of indicator values per candle.
+        """
+        return np.array(
+            [self.calculate(candles[: i + 1], *args) for i in range(len(candles))],
+            dtype=float,
+        )
@@ -1,6 +1,4 @@
 from abc import ABC, abstractmethod
-import ccxt
-import pandas as pd
 
 
 class BasePredictionModel(ABC):
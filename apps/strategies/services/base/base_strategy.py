@@ -1,10 +1,12 @@
 from abc import ABC, abstractmethod
-import ccxt
-import pandas as pd
+from typing import TYPE_CHECKING
 
 from apps.strategies.services.base.base_indicator import BaseIndicator
 from apps.strategies.services.core.trade_risk_model import TradeRiskModel
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class BaseStrategy(ABC):
     """
@@ -28,7 +30,7 @@ class BaseStrategy(ABC):
 
     @abstractmethod
     def get_signal_from_candles(
-        self, candles: list[dict[str, float]] | pd.DataFrame
+        self, candles: "list[dict[str, float]] | pd.DataFrame"
     ) -> tuple[str, TradeRiskModel]:
         """
         Return the latest signal based on the strategy for given candles.
@@ -41,6 +43,22 @@ class BaseStrategy(ABC):
         """
         pass
 
+    def get_signal_list_from_candles(
+        self, candles: list[dict[str, float]], indicator_series: dict = None
+    ) -> list:
+        """
+        Return the signal for every prefix of the given candles, i.e. element i equals get_signal_from_candles(candles[:i + 1]).
+        Default implementation evaluates every prefix, strategies should override it with a single pass over the whole series.
+
+        Args:
+            candles (list[dict]): OHLCV candles data.
+            indicator_series (dict): Optional already calculated indicator series, keyed by BaseIndicator.series_key (see IndicatorGraph).
+
+        Returns:
+            list: Signals, one per candle.
+        """
+        return [self.get_signal_from_candles(candles[: i + 1]) for i in range(len(candles))]
+
     @abstractmethod
     def get_json(self) -> dict:
         """
@@ -1,4 +1,9 @@
+from abc import abstractmethod
+
+import numpy as np
+
 from apps.strategies.services.base.atomic_strategy import AtomicStrategy
+from apps.strategies.services.base.base_indicator import BaseIndicator
 
 
 class IndicatorStrategy(AtomicStrategy):
@@ -24,7 +29,66 @@ class IndicatorStrategy(AtomicStrategy):
             json_data.get("name", "Unnamed Indicator Strategy").strip().replace(" ", "")
         )
 
+        from apps.strategies import load_strategies
+
+        load_strategies()
+
         for subclass in cls.__subclasses__():
             # It needs to evaluate the name without "Strategy" suffix to match the class name, e.g. "SMA" for "SMAStrategy"
             if subclass.__name__ == name or subclass.__name__.replace("Strategy", "") == name:
                 return subclass._from_json(json_data.get("parameters", {}))
+
+    @abstractmethod
+    def get_indicator_nodes(self) -> list[tuple[BaseIndicator, tuple]]:
+        """
+        Return the indicator series the strategy's signals are calculated from.
+
+        Returns:
+            list[tuple[BaseIndicator, tuple]]: (indicator, args) pairs, each standing for indicator.calculate_series(candles, *args).
+        """
+        pass
+
+    @abstractmethod
+    def get_signal_list_from_series(self, series: list[np.ndarray], candles_amount: int) -> list:
+        """
+        Calculate signals for every candle from the indicator series.
+
+        Args:
+            series (list[np.ndarray]): Series of the nodes returned by get_indicator_nodes, in the same order.
+            candles_amount (int): Number of candles.
+
+        Returns:
+            list: Signal for each candle in the same format as get_signal_from_candles.
+        """
+        pass
+
+    @abstractmethod
+    def get_last_signal_from_series(self, series: list[np.ndarray], candles_amount: int):
+        """
+        Calculate the signal of the last candle from the last rows of the indicator series, used by StrategyStream.
+        Result is equal to get_signal_list_from_series(full series, candles_amount)[-1].
+
+        Args:
+            series (list[np.ndarray]): Last rows (at most StrategyStream.HISTORY) of the series of the nodes returned by get_indicator_nodes, in the same order.
+            candles_amount (int): Number of candles fed so far, including the last one.
+
+        Returns:
+            Signal of the last candle in the same format as get_signal_from_candles.
+        """
+        pass
+
+    def get_signal_list_from_candles(self, candles, indicator_series: dict = None) -> list:
+        """
+        Calculate signals for every candle in a single pass.
+        Element i is equal to get_signal_from_candles(candles[:i + 1]).
+        Series found in indicator_series are reused, the rest is calculated.
+        """
+        series = []
+        for indicator, args in self.get_indicator_nodes():
+            key = indicator.series_key(*args)
+            if indicator_series is not None and key in indicator_series:
+                series.append(indicator_series[key])
+            else:
+                series.append(indicator.calculate_series(candles, *args))
+
+        return self.get_signal_list_from_series(series, len(candles))
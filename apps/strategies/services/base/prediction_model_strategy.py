@@ -25,6 +25,11 @@ class PredictionModelStrategy(AtomicStrategy):
             .strip()
             .replace(" ", "")
         )
+
+        from apps.strategies import load_strategies
+
+        load_strategies()
+
         for subclass in cls.__subclasses__():
             if subclass.__name__ == name:
                 return subclass._from_json(json_data.get("parameters", {}))
@@ -0,0 +1,40 @@
+import numpy as np
+
+from apps.strategies.services.base.base_indicator import BaseIndicator
+
+
+class IndicatorGraph:
+    """
+    Set of unique indicator series needed by a strategy.
+    Conditions and atomic strategies using the same indicator with the same parameters (e.g. RSI(14) in two conditions)
+    share one node, so each series is calculated only once per set of candles.
+    """
+
+    def __init__(self):
+        self.nodes: dict[tuple, tuple[BaseIndicator, tuple]] = {}
+
+    def add(self, indicator: BaseIndicator, args: tuple = ()) -> tuple:
+        """
+        Add the series indicator.calculate_series(candles, *args) to the graph, unless the same series is already there.
+
+        Returns:
+            tuple: Key of the node, see BaseIndicator.series_key.
+        """
+        key = indicator.series_key(*args)
+        self.nodes.setdefault(key, (indicator, args))
+        return key
+
+    def evaluate(self, candles: list[dict[str, float]]) -> dict[tuple, np.ndarray]:
+        """
+        Calculate every node once over the whole series.
+
+        Returns:
+            dict[tuple, np.ndarray]: Series keyed by node key.
+        """
+        return {
+            key: indicator.calculate_series(candles, *args)
+            for key, (indicator, args) in self.nodes.items()
+        }
+
+    def __len__(self):
+        return len(self.nodes)
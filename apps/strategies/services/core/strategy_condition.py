@@ -1,4 +1,3 @@
-import pandas as pd
 from apps.strategies.services.core.trade_risk_model import TradeRiskModel
 from apps.strategies.services.base.atomic_strategy import AtomicStrategy
 from apps.strategies.services.base.indicator_strategy import IndicatorStrategy
@@ -47,6 +46,70 @@ class StrategyCondition:
 
         return "HOLD"
     
+    def evaluate_list(self, candles: list[dict[str, float]], indicator_series: dict = None) -> list[str]:
+        """
+        Evaluate the condition for every candle in a single pass over the whole series.
+        Element i is equal to evaluate(candles[:i + 1]).
+
+        Args:
+            candles (list[dict]): OHLCV candles data.
+            indicator_series (dict): Optional precomputed indicator series, see IndicatorGraph.evaluate.
+
+        Returns:
+            list[str]: 'BUY', 'SELL' or 'HOLD' for each candle.
+        """
+        signal_sources = self.strategy_list
+
+        if not signal_sources:  # No indicators or models to evaluate
+            return ["HOLD"] * len(candles)
+
+        signal_lists = [
+            src.get_signal_list_from_candles(candles, indicator_series) for src in signal_sources
+        ]
+
+        results = []
+        for signals in zip(*signal_lists):
+            # All signals must agree to trigger an action
+            if all(signal == "BUY" for signal in signals):
+                results.append("BUY")
+            elif all(signal == "SELL" for signal in signals):
+                results.append("SELL")
+            else:
+                results.append("HOLD")
+
+        return results
+
+    def evaluate_last(self, indicator_series: dict, candles_amount: int) -> str:
+        """
+        Evaluate the condition for the last candle from the last rows of the indicator series, see StrategyStream.
+        Result is equal to evaluate_list(candles)[-1].
+
+        Args:
+            indicator_series (dict): Last rows of every indicator series keyed by node key, see IndicatorGraph.
+            candles_amount (int): Number of candles, including the last one.
+
+        Returns:
+            str: 'BUY', 'SELL' or 'HOLD'.
+        """
+        signal_sources = self.strategy_list
+
+        if not signal_sources:  # No indicators or models to evaluate
+            return "HOLD"
+
+        signals = []
+        for src in signal_sources:
+            series = [indicator_series[indicator.series_key(*args)] for indicator, args in src.get_indicator_nodes()]
+            signals.append(src.get_last_signal_from_series(series, candles_amount))
+
+        # All signals must agree to trigger an action
+        if all(signal == "BUY" for signal in signals):
+            return "BUY"
+
+        if all(signal == "SELL" for signal in signals):
+            return "SELL"
+
+        return "HOLD"
+
     def get_trade_risk_model(self, signal_type: str) -> TradeRiskModel:
         """
         Get the appropriate TradeRiskModel based on the signal type.
@@ -1,10 +1,14 @@
-from typing import Union
-import pandas as pd
+from typing import TYPE_CHECKING, Union
+
 from apps.strategies.services.core.trade_risk_model import TradeRiskModel
-from apps.market.services import get_binance_ohlcv
 from apps.strategies.services.base.atomic_strategy import AtomicStrategy
+from apps.strategies.services.base.indicator_strategy import IndicatorStrategy
+from apps.strategies.services.core.indicator_graph import IndicatorGraph
 from apps.strategies.services.core.strategy_condition import StrategyCondition
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class StrategyEngine():
     """
@@ -14,6 +18,7 @@ class StrategyEngine():
     """
     def __init__(self, conditions: list[StrategyCondition]):
         self.conditions = conditions
+        self._graph = None
 
     def add_strategy(
         self,
@@ -28,14 +33,35 @@ class StrategyEngine():
                 sell_risk_model=sell_risk_model,
             )
             self.conditions.append(condition)
+            self._graph = None
 
     def add_condition(self, condition: StrategyCondition) -> None:
         if condition:
             self.conditions.append(condition)
+            self._graph = None
+
+    def compile(self) -> IndicatorGraph:
+        """
+        Collect the indicator series needed by all conditions into one graph.
+        Indicators shared between conditions (same indicator and parameters) become a single node, so they are calculated once.
+
+        Returns:
+            IndicatorGraph: Graph of unique indicator series, cached until the conditions change.
+        """
+        if self._graph is None:
+            graph = IndicatorGraph()
+            for condition in self.conditions:
+                for strategy in condition.strategy_list:
+                    if isinstance(strategy, IndicatorStrategy):
+                        for indicator, args in strategy.get_indicator_nodes():
+                            graph.add(indicator, args)
+            self._graph = graph
+
+        return self._graph
 
 
     def get_signal_and_risk_model_from_candles(
-        self, candles: list[dict[str, float]] | pd.DataFrame
+        self, candles: "list[dict[str, float]] | pd.DataFrame"
     ) -> tuple[str, TradeRiskModel]:
         """
         Evaluate the strategy conditions based on the provided candles and return the generated signal along with the associated risk model.
@@ -58,6 +84,36 @@ class StrategyEngine():
         return "HOLD", None
 
 
+    def get_signal_and_risk_model_list_from_candles(
+        self, candles: list[dict[str, float]]
+    ) -> list[tuple[str, TradeRiskModel]]:
+        """
+        Evaluate the strategy conditions for every candle in a single pass over the whole series.
+        Element i is equal to get_signal_and_risk_model_from_candles(candles[:i + 1]).
+
+        Args:
+            candles (list[dict]): OHLCV candles data to evaluate against the strategy conditions.
+
+        Returns:
+            list[tuple[str, TradeRiskModel]]: Signal and associated TradeRiskModel (or None if 'HOLD') for each candle.
+        """
+        indicator_series = self.compile().evaluate(candles)
+        condition_signals = [
+            condition.evaluate_list(candles, indicator_series) for condition in self.conditions
+        ]
+
+        results = []
+        for i in range(len(candles)):
+            for condition, signals in zip(self.conditions, condition_signals):
+                if signals[i] == "BUY" or signals[i] == "SELL":
+                    results.append((signals[i], condition.get_trade_risk_model(signals[i])))
+                    break
+            else:
+                results.append(("HOLD", None))
+
+        return results
+
+
     def get_json(self) -> dict:
         return {"conditions": [c.get_json() for c in self.conditions]}
     
@@ -0,0 +1,93 @@
+from collections import deque
+
+import numpy as np
+
+from apps.strategies.services.base.indicator_strategy import IndicatorStrategy
+from apps.strategies.services.core.strategy_engine import StrategyEngine
+from apps.strategies.services.core.trade_risk_model import TradeRiskModel
+
+
+class StrategyStream:
+    """
+    Evaluates a StrategyEngine one candle at a time, in O(1) per candle.
+    Every indicator series of the strategy (see IndicatorGraph) is kept as a streaming indicator (see BaseIndicator.update)
+    together with its last HISTORY rows, which is all the atomic strategies need to decide the signal of the last candle.
+    Its state can be exported as plain values (get_state), e.g. as a part of a backtest checkpoint,
+    and restored into a new stream of the same strategy (set_state), which is fed the next candles later.
+    """
+
+    HISTORY = 2  # MACD looks at the previous candle
+
+    def __init__(self, strategy: StrategyEngine):
+        """
+        Args:
+            strategy (StrategyEngine): Strategy to evaluate. Only indicator based strategies can be streamed.
+        """
+        for condition in strategy.conditions:
+            for src in condition.strategy_list:
+                if not isinstance(src, IndicatorStrategy):
+                    raise ValueError(f"Strategy '{type(src).__name__}' can not be evaluated candle by candle.")
+
+        self.strategy = strategy
+        self.indicators = {
+            key: indicator.streaming(*args) for key, (indicator, args) in strategy.compile().nodes.items()
+        }
+        self.series = {key: deque(maxlen=self.HISTORY) for key in self.indicators}
+        self.candles_amount = 0
+
+    def update(self, candle: dict[str, float]) -> tuple[str, TradeRiskModel]:
+        """
+        Feed the next candle and return the signal for it.
+        After feeding candles one by one, the result is equal to get_signal_and_risk_model_from_candles over all the candles fed so far.
+
+        Args:
+            candle (dict): OHLCV candle, the one after the previously fed one.
+
+        Returns:
+            tuple[str, TradeRiskModel]: Signal ('BUY', 'SELL', or 'HOLD') and the risk model of the triggered action (or None if 'HOLD').
+        """
+        self.candles_amount += 1
+        for key, indicator in self.indicators.items():
+            self.series[key].append(indicator.update(candle))
+
+        series = {key: np.array(rows, dtype=float) for key, rows in self.series.items()}
+        for condition in self.strategy.conditions:
+            result = condition.evaluate_last(series, self.candles_amount)
+            if result == "BUY" or result == "SELL":
+                return (result, condition.get_trade_risk_model(result))
+
+        return "HOLD", None
+
+    def get_state(self) -> dict:
+        """
+        Return the streaming state as plain JSON serializable values: the number of candles fed,
+        and the indicator state and last HISTORY rows of every indicator series, identified by its series key.
+        """
+        return {
+            "candles_amount": self.candles_amount,
+            "series": [
+                {
+                    "key": repr(key),
+                    "indicator": indicator.get_state(),
+                    "rows": [list(row) if isinstance(row, tuple) else row for row in self.series[key]],
+                }
+                for key, indicator in self.indicators.items()
+            ],
+        }
+
+    def set_state(self, state: dict) -> None:
+        """
+        Continue from a state returned by get_state() of a stream of the same strategy.
+
+        Raises:
+            ValueError: The state belongs to a strategy with other indicator series
+        """
+        keys = [series["key"] for series in state["series"]]
+        if keys != [repr(key) for key in self.indicators]:
+            raise ValueError("Stream state belongs to a strategy with other indicators.")
+
+        for key, series in zip(self.indicators, state["series"]):
+            self.indicators[key].set_state(series["indicator"])
+            self.series[key].clear()
+            self.series[key].extend(tuple(row) if isinstance(row, list) else row for row in series["rows"])
+        self.candles_amount = int(state["candles_amount"])
@@ -1,9 +1,14 @@
+from apps.market.candle_series import get_column
+
+
 class TradeRiskModel:
     """
     Manages trade risk parameters like stop-loss and take-profit.
     Supports fixed percentage and ATR-based relative calculations.
     """
 
+    ATR_PERIOD = 14  # Lookback of the ATR-based relative stop-loss, in candles
+
     def __init__(
         self,
         stop_loss_pct: float = 1.5,
@@ -147,7 +152,7 @@ class TradeRiskModel:
 
 
     def _calculate_relative_stop_loss_percentage(self, 
-        candles: list[dict], period: int = 14, atr_multiplier: float = 5
+        candles: list[dict], period: int = ATR_PERIOD, atr_multiplier: float = 5
     ) -> float:
         """
         Calculate relative stop loss based on ATR volatility.
@@ -166,13 +171,16 @@ class TradeRiskModel:
             return self.stop_loss_pct  # Not enough data to calculate ATR, return default stop loss percentage
 
         recent_candles = candles[-(period + 1) :]
+        highs = get_column(recent_candles, "high").tolist()
+        lows = get_column(recent_candles, "low").tolist()
+        closes = get_column(recent_candles, "close").tolist()
         true_ranges = []
-        entry_price = candles[-1]["close"]
+        entry_price = closes[-1]
 
         for i in range(1, len(recent_candles)):
-            high = recent_candles[i]["high"]
-            low = recent_candles[i]["low"]
-            prev_close = recent_candles[i - 1]["close"]
+            high = highs[i]
+            low = lows[i]
+            prev_close = closes[i - 1]
 
             tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
             true_ranges.append(tr)
@@ -0,0 +1,206 @@
+import math
+from collections import deque
+
+
+class RollingMeanState:
+    """
+    Streaming rolling mean over the last `window` values, O(1) per update.
+    Uses the same compensated (Kahan) summation as pandas `rolling(window).mean()`, so values are equal to the batch calculation.
+    """
+
+    def __init__(self, window: int):
+        """
+        Args:
+            window (int): Number of values in the rolling window
+        """
+        self.window = window
+        self.reset()
+
+    def reset(self) -> None:
+        self.values = deque()
+        self.nobs = 0
+        self.sum = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.neg_count = 0
+        self.consecutive_same = 0
+        self.prev_value = math.nan
+
+    def get_state(self) -> dict:
+        """
+        Plain (JSON serializable) copy of the state, see set_state.
+        """
+        return {
+            "values": list(self.values),
+            "nobs": self.nobs,
+            "sum": self.sum,
+            "compensation_add": self.compensation_add,
+            "compensation_remove": self.compensation_remove,
+            "neg_count": self.neg_count,
+            "consecutive_same": self.consecutive_same,
+            "prev_value": self.prev_value,
+        }
+
+    def set_state(self, state: dict) -> None:
+        """
+        Continue from a state returned by get_state.
+        """
+        values = [float(value) for value in state["values"]]
+        if len(values) > self.window:
+            raise ValueError(f"Rolling mean state has {len(values)} values, window is {self.window}.")
+
+        self.values = deque(values)
+        self.nobs = int(state["nobs"])
+        self.sum = float(state["sum"])
+        self.compensation_add = float(state["compensation_add"])
+        self.compensation_remove = float(state["compensation_remove"])
+        self.neg_count = int(state["neg_count"])
+        self.consecutive_same = int(state["consecutive_same"])
+        self.prev_value = float(state["prev_value"])
+
+    def update(self, value: float) -> float:
+        """
+        Add a new value to the window.
+
+        Args:
+            value (float): New value
+
+        Returns:
+            float: Mean of the window, or NaN if the window is not full yet
+        """
+        value = float(value)
+
+        if len(self.values) == self.window:
+            if self.window == 1:
+                # Window does not overlap the previous one, start from scratch like pandas does
+                self.reset()
+            else:
+                self._remove(self.values.popleft())
+
+        self.values.append(value)
+        self._add(value)
+
+        if len(self.values) < self.window or self.nobs == 0:
+            return math.nan
+
+        result = self.sum / self.nobs
+        if self.consecutive_same >= self.nobs:
+            result = self.prev_value
+        elif self.neg_count == 0 and result < 0:
+            result = 0.0
+        elif self.neg_count == self.nobs and result > 0:
+            result = 0.0
+
+        return result
+
+    def _add(self, value: float) -> None:
+        if math.isnan(value):
+            return
+
+        self.nobs += 1
+        y = value - self.compensation_add
+        t = self.sum + y
+        self.compensation_add = t - self.sum - y
+        self.sum = t
+
+        if math.copysign(1.0, value) < 0:
+            self.neg_count += 1
+
+        if value == self.prev_value:
+            self.consecutive_same += 1
+        else:
+            self.consecutive_same = 1
+        self.prev_value = value
+
+    def _remove(self, value: float) -> None:
+        if math.isnan(value):
+            return
+
+        self.nobs -= 1
+        y = -value - self.compensation_remove
+        t = self.sum + y
+        self.compensation_remove = t - self.sum - y
+        self.sum = t
+
+        if math.copysign(1.0, value) < 0:
+            self.neg_count -= 1
+
+
+class EWMState:
+    """
+    Streaming exponentially weighted mean, O(1) per update.
+    Follows the same recursion as pandas `ewm(...).mean()`, so values are equal to the batch calculation.
+    """
+
+    def __init__(self, com: float, adjust: bool = True, min_periods: int = 0):
+        """
+        Args:
+            com (float): Center of mass, alpha = 1 / (1 + com). Use from_span or from_alpha for the other pandas parametrizations.
+            adjust (bool): Same meaning as in pandas, True divides by the decaying sum of weights
+            min_periods (int): Minimum number of observations before a value is returned
+        """
+        self.alpha = 1.0 / (1.0 + com)
+        self.adjust = adjust
+        self.min_periods = max(int(min_periods), 1)
+        self.reset()
+
+    @classmethod
+    def from_span(cls, span: int, adjust: bool = True, min_periods: int = 0) -> "EWMState":
+        return cls(com=(span - 1) / 2, adjust=adjust, min_periods=min_periods)
+
+    @classmethod
+    def from_alpha(cls, alpha: float, adjust: bool = True, min_periods: int = 0) -> "EWMState":
+        return cls(com=(1 - alpha) / alpha, adjust=adjust, min_periods=min_periods)
+
+    def reset(self) -> None:
+        self.weighted = None
+        self.old_weight = 1.0
+        self.nobs = 0
+
+    def get_state(self) -> dict:
+        """
+        Plain (JSON serializable) copy of the state, see set_state.
+        """
+        return {"weighted": self.weighted, "old_weight": self.old_weight, "nobs": self.nobs}
+
+    def set_state(self, state: dict) -> None:
+        """
+        Continue from a state returned by get_state.
+        """
+        self.weighted = None if state["weighted"] is None else float(state["weighted"])
+        self.old_weight = float(state["old_weight"])
+        self.nobs = int(state["nobs"])
+
+    def update(self, value: float) -> float:
+        """
+        Add a new value to the mean.
+
+        Args:
+            value (float): New value
+
+        Returns:
+            float: Current weighted mean, or NaN if there are fewer than min_periods observations
+        """
+        value = float(value)
+        is_observation = not math.isnan(value)
+        self.nobs += is_observation
+
+        if self.weighted is None:
+            self.weighted = value
+        elif not math.isnan(self.weighted):
+            if is_observation:
+                new_weight = 1.0 if self.adjust else self.alpha
+                self.old_weight *= 1.0 - self.alpha
+
+                # Avoid numerical errors on constant series
+                if self.weighted != value:
+                    self.weighted = self.old_weight * self.weighted + new_weight * value
+                    self.weighted /= self.old_weight + new_weight
+
+                self.old_weight = self.old_weight + new_weight if self.adjust else 1.0
+            else:
+                self.old_weight *= 1.0 - self.alpha
+        elif is_observation:
+            self.weighted = value
+
+        return self.weighted if self.nobs >= self.min_periods else math.nan
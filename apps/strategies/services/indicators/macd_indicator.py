@@ -1,7 +1,10 @@
+import numpy as np
 import pandas as pd
 
+from apps.market.candle_series import CandleSeries, get_column
 from apps.market.services import get_binance_ohlcv
 from apps.strategies.services.base.base_indicator import BaseIndicator
+from apps.strategies.services.indicators.indicator_state import EWMState
 
 
 class MACDIndicator(BaseIndicator):
@@ -17,6 +20,7 @@ class MACDIndicator(BaseIndicator):
         self.fast_period = fast_period
         self.slow_period = slow_period
         self.signal_period = signal_period
+        self.reset()
 
     def get_list_from_candles(self, candles):
         """
@@ -31,13 +35,14 @@ class MACDIndicator(BaseIndicator):
         if not candles or len(candles) < self.slow_period:
             return []
 
-        for candle in candles:
-            if "close" not in candle:
-                return []
+        if not isinstance(candles, CandleSeries):
+            for candle in candles:
+                if "close" not in candle:
+                    return []
 
-        df = pd.DataFrame(candles)
-        ema_fast = df["close"].ewm(span=self.fast_period, adjust=False).mean()
-        ema_slow = df["close"].ewm(span=self.slow_period, adjust=False).mean()
+        close = pd.Series(get_column(candles, "close"))
+        ema_fast = close.ewm(span=self.fast_period, adjust=False).mean()
+        ema_slow = close.ewm(span=self.slow_period, adjust=False).mean()
         macd_line = ema_fast - ema_slow
 
         return macd_line.round(3).tolist()
@@ -72,8 +77,7 @@ class MACDIndicator(BaseIndicator):
         if not candles or len(candles) < self.slow_period:
             return -1, -1, -1  # not enough data
 
-        df = pd.DataFrame(candles)
-        close = df["close"]
+        close = pd.Series(get_column(candles, "close"))
 
         ema_fast = close.ewm(span=self.fast_period, adjust=False).mean()
         ema_slow = close.ewm(span=self.slow_period, adjust=False).mean()
@@ -90,3 +94,85 @@ class MACDIndicator(BaseIndicator):
 
     def calculate(self, candles) -> tuple[float, float, float]:
         return self.calculate_macd(candles)
+
+    def reset(self) -> None:
+        self._candle_count = 0
+        self._ema_fast = EWMState.from_span(self.fast_period, adjust=False)
+        self._ema_slow = EWMState.from_span(self.slow_period, adjust=False)
+        self._ema_signal = EWMState.from_span(self.signal_period, adjust=False)
+
+    def get_state(self) -> dict:
+        return {
+            "candle_count": self._candle_count,
+            "ema_fast": self._ema_fast.get_state(),
+            "ema_slow": self._ema_slow.get_state(),
+            "ema_signal": self._ema_signal.get_state(),
+        }
+
+    def set_state(self, state: dict) -> None:
+        self._candle_count = int(state["candle_count"])
+        self._ema_fast.set_state(state["ema_fast"])
+        self._ema_slow.set_state(state["ema_slow"])
+        self._ema_signal.set_state(state["ema_signal"])
+
+    def update(self, candle: dict[str, float]) -> tuple[float, float, float]:
+        """
+        Feed the next candle and return MACD line, signal line, and histogram for it, in O(1).
+
+        Args:
+            candle (dict): Dictionary containing: close
+
+        Returns:
+            tuple: (macd_line, signal_line, histogram) or (-1, -1, -1) if not enough data
+        """
+        close = candle["close"]
+        self._candle_count += 1
+
+        macd_line = np.float64(self._ema_fast.update(close)) - np.float64(self._ema_slow.update(close))
+        signal_line = np.float64(self._ema_signal.update(macd_line))
+        histogram = macd_line - signal_line
+
+        if self._candle_count < self.slow_period:
+            return -1, -1, -1  # not enough data
+
+        return (
+            round(macd_line, 3),
+            round(signal_line, 3),
+            round(histogram, 3),
+        )
+
+    def calculate_macd_series(self, candles: list[dict[str, float]]) -> np.ndarray:
+        """
+        Calculate MACD line, signal line, and histogram for every candle in a single pass.
+        Row i is equal to calculate_macd(candles[:i + 1]).
+
+        Args:
+            candles (list[dict]): List of dictionaries, each containing: close
+
+        Returns:
+            np.ndarray: Array of shape (len(candles), 3) with (macd_line, signal_line, histogram) rows, (-1, -1, -1) for candles without enough data
+        """
+        if not candles:
+            return np.empty((0, 3), dtype=float)
+
+        close = pd.Series(get_column(candles, "close"))
+
+        ema_fast = close.ewm(span=self.fast_period, adjust=False).mean()
+        ema_slow = close.ewm(span=self.slow_period, adjust=False).mean()
+
+        macd_line = ema_fast - ema_slow
+        signal_line = macd_line.ewm(span=self.signal_period, adjust=False).mean()
+        histogram = macd_line - signal_line
+
+        macd_series = np.round(
+            np.column_stack(
+                (macd_line.to_numpy(), signal_line.to_numpy(), histogram.to_numpy())
+            ),
+            3,
+        )
+        macd_series[: self.slow_period - 1] = -1
+
+        return macd_series
+
+    def calculate_series(self, candles) -> np.ndarray:
+        return self.calculate_macd_series(candles)
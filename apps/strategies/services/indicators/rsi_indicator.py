@@ -1,7 +1,10 @@
+import numpy as np
 import pandas as pd
 
+from apps.market.candle_series import CandleSeries, get_column
 from apps.market.services import get_binance_ohlcv
 from apps.strategies.services.base.base_indicator import BaseIndicator
+from apps.strategies.services.indicators.indicator_state import EWMState
 
 
 class RSIIndicator(BaseIndicator):
@@ -11,6 +14,7 @@ class RSIIndicator(BaseIndicator):
             period ()
         """
         self.period = period
+        self.reset()
 
     def calculate_rsi(self, candles) -> float:
         """
@@ -24,9 +28,9 @@ class RSIIndicator(BaseIndicator):
         if not candles or len(candles) < self.period:
             return -1
 
-        df = pd.DataFrame(candles)
+        close = pd.Series(get_column(candles, "close"))
 
-        delta = df["close"].diff()
+        delta = close.diff()
         gain = delta.where(delta > 0, 0)
         loss = -delta.where(delta < 0, 0)
 
@@ -41,6 +45,92 @@ class RSIIndicator(BaseIndicator):
     def calculate(self, candles, *args) -> float:
         return self.calculate_rsi(candles)
 
+    def reset(self) -> None:
+        self._prev_close = None
+        self._candle_count = 0
+        # Wilder's smoothing, the same averages as in calculate_rsi
+        self._avg_gain = EWMState.from_alpha(1 / self.period, min_periods=self.period)
+        self._avg_loss = EWMState.from_alpha(1 / self.period, min_periods=self.period)
+
+    def get_state(self) -> dict:
+        return {
+            "prev_close": None if self._prev_close is None else float(self._prev_close),
+            "candle_count": self._candle_count,
+            "avg_gain": self._avg_gain.get_state(),
+            "avg_loss": self._avg_loss.get_state(),
+        }
+
+    def set_state(self, state: dict) -> None:
+        self._prev_close = None if state["prev_close"] is None else float(state["prev_close"])
+        self._candle_count = int(state["candle_count"])
+        self._avg_gain.set_state(state["avg_gain"])
+        self._avg_loss.set_state(state["avg_loss"])
+
+    def update(self, candle) -> float:
+        """
+        Feed the next candle and return the RSI for it, in O(1).
+
+        Args:
+            candle (dict): Dictionary containing: close
+        Returns:
+            float: Latest RSI value or -1 if not enough data
+        """
+        close = candle["close"]
+        delta = close - self._prev_close if self._prev_close is not None else np.nan
+        self._prev_close = close
+        self._candle_count += 1
+
+        gain = delta if delta > 0 else 0.0
+        loss = -(delta if delta < 0 else 0.0)
+
+        avg_gain = self._avg_gain.update(gain)
+        avg_loss = self._avg_loss.update(loss)
+
+        if self._candle_count < self.period:
+            return -1
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = np.float64(avg_gain) / np.float64(avg_loss)
+            rsi = 100 - (100 / (1 + rs))
+
+        return round(float(rsi), 3) if pd.notna(rsi) else -1
+
+    def calculate_rsi_series(self, candles) -> np.ndarray:
+        """
+        Calculate Relative Strength Index (RSI) for every candle in a single pass.
+        Element i is equal to calculate_rsi(candles[:i + 1]).
+
+        Args:
+            candles (list[dict]): List of dictionaries, each containing: close
+        Returns:
+            np.ndarray: RSI values, -1 for candles without enough data
+        """
+        if not candles:
+            return np.array([], dtype=float)
+
+        close = pd.Series(get_column(candles, "close"))
+
+        delta = close.diff()
+        gain = delta.where(delta > 0, 0)
+        loss = -delta.where(delta < 0, 0)
+
+        avg_gain = gain.ewm(alpha=1 / self.period, min_periods=self.period).mean()
+        avg_loss = loss.ewm(alpha=1 / self.period, min_periods=self.period).mean()
+
+        rs = avg_gain / avg_loss
+        rsi = 100 - (100 / (1 + rs))
+
+        rsi_series = np.array(
+            [round(float(value), 3) if pd.notna(value) else -1 for value in rsi],
+            dtype=float,
+        )
+        rsi_series[: self.period - 1] = -1
+
+        return rsi_series
+
+    def calculate_series(self, candles, *args) -> np.ndarray:
+        return self.calculate_rsi_series(candles)
+
     def get_list_from_candles(self, candles) -> list[float]:
         """
         Calculate Relative Strength Index (RSI) list from a list of OHLCV candles.
@@ -53,21 +143,15 @@ class RSIIndicator(BaseIndicator):
         if not candles or len(candles) < self.period:
             return []
 
-        for candle in candles:
-            if "close" not in candle:
-                return []
-
-        temp_candles = candles.copy()
-        rsi_list = []
+        if not isinstance(candles, CandleSeries):
+            for candle in candles:
+                if "close" not in candle:
+                    return []
 
-        for i in range(len(temp_candles)):
-            if not temp_candles or len(temp_candles) < self.period:
-                rsi_list.append(None)
-            else:
-                rsi_list.append(self.calculate_rsi(temp_candles))
-            temp_candles = temp_candles[:-1]
+        rsi_list = self.calculate_rsi_series(candles).tolist()
 
-        return rsi_list[::-1]  # Reverse the list to have the latest value at the end
+        # None for candles without enough data
+        return [None] * (self.period - 1) + rsi_list[self.period - 1 :]
 
     def get_list_from_coin(self, coin: str, interval: str, candle_amount: int = 20):
         """
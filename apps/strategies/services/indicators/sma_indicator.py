@@ -1,12 +1,16 @@
+import numpy as np
 import pandas as pd
 
+from apps.market.candle_series import CandleSeries, get_column
 from apps.market.services import get_binance_ohlcv
 from apps.strategies.services.base.base_indicator import BaseIndicator
+from apps.strategies.services.indicators.indicator_state import RollingMeanState
 
 
 class SMAIndicator(BaseIndicator):
     def __init__(self, window: int = 10):
         self.window = window
+        self.reset()
 
     def calculate_sma(self, candles, window: int) -> float:
         """
@@ -22,16 +26,69 @@ class SMAIndicator(BaseIndicator):
         if not candles or len(candles) < window:
             return -1
 
-        # Převod na DataFrame
-        df = pd.DataFrame(candles, columns=["close"])
-        df["SMA"] = df["close"].rolling(window).mean()
-        value = df["SMA"].iloc[-1]
+        close = pd.Series(get_column(candles, "close"))
+        value = close.rolling(window).mean().iloc[-1]
 
         return round(float(value), 3) if pd.notna(value) else -1
 
     def calculate(self, candles, window=10) -> float:
         return self.calculate_sma(candles, window=window)
 
+    def reset(self) -> None:
+        self._sma_state = RollingMeanState(self.window)
+
+    def get_state(self) -> dict:
+        return self._sma_state.get_state()
+
+    def set_state(self, state: dict) -> None:
+        self._sma_state.set_state(state)
+
+    def update(self, candle) -> float:
+        """
+        Feed the next candle and return the SMA of the indicator's window for it, in O(1).
+
+        Args:
+            candle (dict): Dictionary containing: close
+        Returns:
+            float: Latest SMA value or -1 if not enough data
+        """
+        value = self._sma_state.update(candle["close"])
+
+        return round(float(value), 3) if pd.notna(value) else -1
+
+    def calculate_sma_series(self, candles, window: int) -> np.ndarray:
+        """
+        Calculate Simple Moving Average (SMA) for every candle in a single pass.
+        Element i is equal to calculate_sma(candles[:i + 1], window).
+
+        Args:
+            candles (list[dict]): List of dictionaries, each containing:
+                - close
+            window (int): Period for SMA
+        Returns:
+            np.ndarray: SMA values, -1 for candles without enough data
+        """
+        if not candles:
+            return np.array([], dtype=float)
+
+        sma = pd.Series(get_column(candles, "close")).rolling(window).mean()
+
+        return np.array(
+            [round(float(value), 3) if pd.notna(value) else -1 for value in sma],
+            dtype=float,
+        )
+
+    def calculate_series(self, candles, window=10) -> np.ndarray:
+        return self.calculate_sma_series(candles, window=window)
+
+    def streaming(self, window=10) -> "SMAIndicator":
+        # Series depends only on the window argument, like in series_key
+        return SMAIndicator(window=window)
+
+    def series_key(self, window=10) -> tuple:
+        # Series depends only on the window argument, not on the indicator's own window
+        return (type(self).__name__, window)
+
     def get_list_from_candles(self, candles, window: int = None) -> list[float]:
         """
         Calculate Simple Moving Average (SMA) list from a list of OHLCV candles.
@@ -50,21 +107,15 @@ class SMAIndicator(BaseIndicator):
         if not candles or len(candles) < window:
             return []
 
-        for candle in candles:
-            if "close" not in candle:
-                return []
-
-        temp_candles = candles.copy()
-        sma_list = []
+        if not isinstance(candles, CandleSeries):
+            for candle in candles:
+                if "close" not in candle:
+                    return []
 
-        for i in range(len(temp_candles)):
-            if not temp_candles or len(temp_candles) < window:
-                sma_list.append(None)
-            else:
-                sma_list.append(self.calculate_sma(temp_candles, window))
-            temp_candles = temp_candles[:-1]
+        sma_list = self.calculate_sma_series(candles, window).tolist()
 
-        return sma_list[::-1]  # Reverse the list to have the latest value at the end
+        # None for candles without enough data
+        return [None] * (window - 1) + sma_list[window - 1 :]
 
     def get_list_from_coin(
         self, coin: str, interval: str, candle_amount: int = 20, window: int = None
@@ -1,3 +1,65 @@
+import math
+import random
+
+import numpy as np
 from django.test import TestCase
 
-# Create your tests here.
+from apps.strategies.services.indicators.macd_indicator import MACDIndicator
+from apps.strategies.services.indicators.rsi_indicator import RSIIndicator
+from apps.strategies.services.indicators.sma_indicator import SMAIndicator
+
+
+def get_candles(amount: int, seed: int = 0) -> list[dict]:
+    """
+    Random walk of close prices with a flat stretch in the middle, which pandas' rolling and ewm code special-cases.
+    """
+    rng = random.Random(seed)
+    candles = []
+    price = 100.0
+    for i in range(amount):
+        if not amount // 3 <= i < amount // 3 + 20:
+            price *= math.exp(rng.gauss(0, 0.02))
+        candles.append({"open": price, "high": price, "low": price, "close": price, "volume": 1.0})
+    return candles
+
+
+class StreamingIndicatorTests(TestCase):
+    """
+    update() re-implements pandas' rolling mean and ewm recursions, its values must stay equal to the pandas based calculations.
+    """
+
+    def _assert_streaming_equals_batch(self, indicator, candles, *args):
+        series = indicator.calculate_series(candles, *args)
+        streamed = np.array([indicator.update(candle) for candle in candles], dtype=float)
+        np.testing.assert_array_equal(streamed, series)
+
+        # And calculate() over the prefixes, which builds the pandas objects from scratch
+        for i in (0, len(candles) // 2, len(candles) - 1):
+            np.testing.assert_array_equal(np.asarray(indicator.calculate(candles[: i + 1], *args), dtype=float), series[i])
+
+    def test_sma(self):
+        candles = get_candles(300)
+        for window in (1, 7):
+            with self.subTest(window=window):
+                self._assert_streaming_equals_batch(SMAIndicator(window=window), candles, window)
+
+    def test_rsi(self):
+        candles = get_candles(300, seed=1)
+        for period in (3, 14):
+            with self.subTest(period=period):
+                self._assert_streaming_equals_batch(RSIIndicator(period=period), candles)
+
+    def test_macd(self):
+        candles = get_candles(300, seed=2)
+        for periods in ((12, 26, 9), (3, 5, 2)):
+            with self.subTest(periods=periods):
+                self._assert_streaming_equals_batch(MACDIndicator(*periods), candles)
+
+    def test_reset_starts_a_new_series(self):
+        candles = get_candles(50)
+        indicator = SMAIndicator(window=7)
+        for candle in candles:
+            indicator.update(candle)
+        indicator.reset()
+
+        self._assert_streaming_equals_batch(indicator, candles[10:], 7)
@@ -0,0 +1,78 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+HEAVY_MODULES = ["ccxt", "pandas", "numpy"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cold startup time of 'manage.py check' in fresh interpreters "
+        "and report which heavy modules (ccxt, pandas, numpy) are imported during startup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Number of measured runs (default 5)")
+        parser.add_argument(
+            "--max-seconds",
+            type=float,
+            default=None,
+            help="Fail if the median startup time is above this many seconds",
+        )
+        parser.add_argument(
+            "--fail-on-import",
+            nargs="*",
+            default=[],
+            metavar="MODULE",
+            help="Fail if any of these modules is imported during startup, e.g. --fail-on-import ccxt pandas",
+        )
+
+    def handle(self, *args, **options):
+        command = [sys.executable, os.path.join(settings.BASE_DIR, "manage.py"), "check"]
+
+        times = []
+        for _ in range(options["runs"]):
+            start = time.perf_counter()
+            self._run(command)
+            times.append(time.perf_counter() - start)
+
+        median = statistics.median(times)
+        self.stdout.write(
+            f"manage.py check: median {median * 1000:.0f} ms, min {min(times) * 1000:.0f} ms ({len(times)} runs)"
+        )
+
+        # -X importtime reports every import with its cumulative time in microseconds
+        import_log = self._run([sys.executable, "-X", "importtime"] + command[1:]).stderr
+        imported = {}
+        for match in re.finditer(r"^import time:\s+\d+ \|\s+(\d+) \|(\s+)(\S+)$", import_log, re.MULTILINE):
+            name = match.group(3)
+            if name in HEAVY_MODULES or name in options["fail_on_import"]:
+                imported[name] = int(match.group(1)) / 1000
+
+        for name in sorted(set(HEAVY_MODULES + options["fail_on_import"])):
+            status = f"imported ({imported[name]:.0f} ms)" if name in imported else "not imported"
+            self.stdout.write(f"  {name}: {status}")
+
+        errors = []
+        if options["max_seconds"] is not None and median > options["max_seconds"]:
+            errors.append(f"median startup {median:.2f} s is above {options['max_seconds']} s")
+
+        unexpected = [name for name in options["fail_on_import"] if name in imported]
+        if unexpected:
+            errors.append(f"imported during startup: {', '.join(unexpected)}")
+
+        if errors:
+            raise CommandError("; ".join(errors))
+
+    @staticmethod
+    def _run(command: list[str]) -> subprocess.CompletedProcess:
+        result = subprocess.run(command, capture_output=True, text=True, cwd=settings.BASE_DIR)
+        if result.returncode != 0:
+            raise CommandError(f"{' '.join(command)} failed:\n{result.stderr}")
+        return result
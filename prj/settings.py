@@ -98,6 +98,28 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Results of finished backtests, least recently used entries are evicted when full
+    "backtests": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "backtests",
+        "TIMEOUT": env.int("BACKTEST_CACHE_TIMEOUT", default=60 * 60),
+        "OPTIONS": {"MAX_ENTRIES": env.int("BACKTEST_CACHE_MAX_ENTRIES", default=200)},
+    },
+}
+
+# Refresh interval of the in-memory exchange ticker snapshot (hot coins), in seconds
+TICKER_SNAPSHOT_INTERVAL = env.int("TICKER_SNAPSHOT_INTERVAL", default=30)
+# How long a single coin ticker (live price, market summary) is reused, in seconds
+TICKER_CACHE_TTL = env.int("TICKER_CACHE_TTL", default=5)
+# How long the stored exchange market metadata (symbols, precision, limits) is used before it is downloaded again, in seconds
+MARKET_METADATA_TTL = env.int("MARKET_METADATA_TTL", default=24 * 60 * 60)
+# Saved backtests with at least this many trades store them as one compressed columnar blob instead of Trade rows
+BACKTEST_TRADE_BLOB_MIN_TRADES = env.int("BACKTEST_TRADE_BLOB_MIN_TRADES", default=1000)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators